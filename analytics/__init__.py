@@ -0,0 +1 @@
+"""Data and aggregation layer behind the Student Depression dashboard."""
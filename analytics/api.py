@@ -0,0 +1,334 @@
+"""Headless JSON API over the dashboard's KPIs and chart aggregates.
+
+Usage (from the repository root):
+
+    python -m analytics.api
+    python -m analytics.api --host 0.0.0.0 --port 8502 --csv IP_Student_Depression.csv
+
+A small HTTP/1.1 server on ``asyncio`` streams (standard library only)
+serves the same cube the dashboard uses, including ingested batches and the
+risk measures when a model is present. All endpoints are GET:
+
+- ``/health``: cube version, row count and response cache counters
+- ``/filters``: the values the sidebar offers
+- ``/kpis``: the six tiles, the city ranking and, with a model, the
+  predicted risk
+- ``/breakdowns``: every chart aggregate; ``/breakdowns/<name>`` returns one
+  (names as in ``analytics.pipeline.CHART_NAMES``)
+- ``/associations``: chi-square tests and Cramér's V per risk factor, and
+  odds ratios and relative risks per level (see ``analytics.associations``)
+
+Filters are query parameters named after the sidebar: ``gender`` (repeat it
+or separate with commas), ``age_min``, ``age_max``, ``depression`` (``all``,
+``with``, ``without``, ``0`` or ``1``) and ``city``. They are normalized
+like the dashboard's, so equivalent requests share one cache entry.
+Response bodies are kept in an LRU keyed by the cube version, path and
+filters. Every response carries a strong ETag, and a matching
+``If-None-Match`` gets ``304 Not Modified``.
+
+Cached responses are answered on the event loop. Refreshing the cube and
+computing a body run on a small thread pool, so a slow request never
+stalls the other connections.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from analytics.associations import associations
+from analytics.cube import FilterCube
+from analytics.figure_cache import FigureCache
+from analytics.filters import DEPRESSION_OPTIONS, normalize
+from analytics.ingest import INGEST_DIR, LiveCube
+from analytics.pipeline import CHART_AGGREGATES, CHART_NAMES
+from analytics.scoring import RiskModel
+from analytics.storage import read_survey
+
+DATA_FILE = 'IP_Student_Depression.csv'
+MODEL_FILE = 'models/risk_model.json'
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+
+# Seconds between checks of the ingest directory for new batches
+REFRESH_INTERVAL = 1.0
+
+# Label column of the aggregates that are plain Series
+SERIES_LABELS = {
+    'gender': 'Gender',
+    'age': 'Age Group',
+    'cities': 'City'
+}
+
+DEPRESSION_PARAMS = {
+    **{label.lower(): value for label, value in DEPRESSION_OPTIONS.items()},
+    'with': 1,
+    'without': 0,
+    '1': 1,
+    '0': 0
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _jsonable(value):
+    """Plain Python values for ``json.dumps``; NaN becomes null."""
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _records(data, label='label'):
+    """An aggregate as a list of row dicts."""
+    if isinstance(data, pd.Series):
+        data = pd.DataFrame({label: data.index, 'Count': data.to_numpy()})
+    return [dict(zip(data.columns, row)) for row in data.itertuples(index=False)]
+
+
+def _first(params, name):
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+class DashboardAPI:
+    """Request handling, independent of the transport."""
+
+    def __init__(self, live_cube, cache=None, workers=1):
+        self.live_cube = live_cube
+        self.cache = cache or FigureCache(max_entries=4096, max_bytes=64 * 1024 * 1024)
+        # Where the transport runs the blocking work (see ``respond``)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self._cube = live_cube.refresh()
+        self._refreshed = time.monotonic()
+
+    @property
+    def refresh_due(self):
+        # New batches are picked up at most every REFRESH_INTERVAL seconds
+        return time.monotonic() - self._refreshed >= REFRESH_INTERVAL
+
+    @property
+    def cube(self):
+        if self.refresh_due:
+            self._cube = self.live_cube.refresh()
+            self._refreshed = time.monotonic()
+        return self._cube
+
+    def filter_state(self, cube, params):
+        genders = [g for value in params.get('gender', []) for g in value.split(',') if g]
+        unknown = [g for g in genders if g not in cube.genders]
+        if unknown:
+            raise BadRequest(f"unknown gender: {', '.join(unknown)}")
+
+        age_range = None
+        if 'age_min' in params or 'age_max' in params:
+            try:
+                age_range = (int(_first(params, 'age_min') or cube.ages[0]),
+                             int(_first(params, 'age_max') or cube.ages[-1]))
+            except ValueError:
+                raise BadRequest('age_min and age_max must be integers') from None
+
+        depression = (_first(params, 'depression') or 'all').lower()
+        if depression not in DEPRESSION_PARAMS:
+            raise BadRequest(f"depression must be one of {', '.join(DEPRESSION_PARAMS)}")
+
+        city = _first(params, 'city')
+        if city not in (None, 'All') and city not in cube.cities:
+            raise BadRequest(f"unknown city: {city}")
+
+        return normalize(genders, age_range, DEPRESSION_PARAMS[depression], city,
+                         all_genders=cube.genders, age_bounds=(cube.ages[0], cube.ages[-1]))
+
+    def payload(self, cube, path, state):
+        """The JSON document for an endpoint; raises ``LookupError`` if unknown."""
+        if path == '/health':
+            return {'status': 'ok', 'cube_version': cube.version,
+                    'rows': int(cube.counts.sum()), 'cache': self.cache.stats()}
+        if path == '/filters':
+            return {'genders': cube.genders, 'age_min': cube.ages[0], 'age_max': cube.ages[-1],
+                    'depression': list(DEPRESSION_OPTIONS), 'cities': cube.cities}
+
+        filtered = cube.slice(**state._asdict())
+        if path == '/associations':
+            result = associations(filtered)
+            return {'tests': _records(result.tests), 'levels': _records(result.levels)}
+        kpis = filtered.kpis()
+        if path == '/kpis':
+            document = {key: value for key, value in kpis.items() if key != 'city_ranking'}
+            document['city_ranking'] = _records(kpis['city_ranking'], 'City')
+            document['predicted_risk'] = filtered.predicted_risk()
+            return document
+        if path == '/breakdowns':
+            names = CHART_NAMES
+        elif path.startswith('/breakdowns/') and path[len('/breakdowns/'):] in CHART_AGGREGATES:
+            names = [path[len('/breakdowns/'):]]
+        else:
+            raise LookupError(path)
+        return {name: _records(CHART_AGGREGATES[name](filtered, kpis),
+                               SERIES_LABELS.get(name, 'label'))
+                for name in names}
+
+    def respond(self, method, target, headers, cached_only=False):
+        """(status, headers, body) for one request.
+
+        With ``cached_only`` it returns None instead of doing anything that
+        may block: refreshing the cube or computing a body.
+        """
+        if method != 'GET':
+            return self.error(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed",
+                              {'Allow': 'GET'})
+        if cached_only and self.refresh_due:
+            return None
+        url = urlsplit(target)
+        cube = self.cube
+        try:
+            state = self.filter_state(cube, parse_qs(url.query))
+        except BadRequest as exc:
+            return self.error(HTTPStatus.BAD_REQUEST, str(exc))
+
+        # Health reports live counters, so it is never cached
+        key = (cube.version, url.path, state)
+        body = self.cache.get(key) if url.path != '/health' else None
+        if body is None:
+            if cached_only:
+                return None
+            try:
+                document = self.payload(cube, url.path, state)
+            except LookupError:
+                return self.error(HTTPStatus.NOT_FOUND, f"no endpoint {url.path}")
+            body = json.dumps(_jsonable(document), separators=(',', ':')).encode()
+            if url.path != '/health':
+                self.cache.put(key, body)
+
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        response_headers = {
+            'Content-Type': 'application/json',
+            'ETag': etag,
+            'Cache-Control': 'no-cache'
+        }
+        if etag in (tag.strip() for tag in headers.get('if-none-match', '').split(',')):
+            return HTTPStatus.NOT_MODIFIED, response_headers, b''
+        return HTTPStatus.OK, response_headers, body
+
+    def error(self, status, message, headers=None):
+        body = json.dumps({'error': message}).encode()
+        return status, {'Content-Type': 'application/json', **(headers or {})}, body
+
+
+async def _read_request(reader):
+    """(method, target, version, headers) or None at end of stream.
+
+    A ``Content-Length`` body is read and dropped, so the next request on
+    the connection starts where this one ends.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, version = line.decode('latin-1').split()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    remaining = int(headers.get('content-length', 0))
+    if remaining < 0:
+        raise ValueError('negative Content-Length')
+    while remaining:
+        chunk = await reader.read(min(remaining, 1 << 16))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+    return method, target, version, headers
+
+
+def _response(status, headers, body, keep_alive):
+    lines = [f'HTTP/1.1 {status.value} {status.phrase}',
+             *(f'{name}: {value}' for name, value in headers.items()),
+             f'Content-Length: {len(body)}',
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def make_handler(api):
+    """``asyncio.start_server`` callback serving ``api`` with keep-alive."""
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ValueError:
+                    writer.write(_response(*api.error(HTTPStatus.BAD_REQUEST, 'malformed request'),
+                                           keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request
+                # Chunked bodies are not parsed, so their connection is closed
+                keep_alive = (version == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close'
+                              and 'transfer-encoding' not in headers)
+                response = api.respond(method, target, headers, cached_only=True)
+                if response is None:
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        api.executor, api.respond, method, target, headers)
+                writer.write(_response(*response, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+def load_api(csv_path=DATA_FILE, model_path=MODEL_FILE, store_dir=INGEST_DIR):
+    """The API over the cube of ``csv_path`` plus ingested batches."""
+    model = RiskModel.load(model_path) if model_path and os.path.exists(model_path) else None
+    base = FilterCube.from_frame(read_survey(csv_path), model)
+    return DashboardAPI(LiveCube(base, store_dir, model=model))
+
+
+async def serve(api, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = await asyncio.start_server(make_handler(api), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--csv', default=DATA_FILE, help='cleaned survey extract')
+    parser.add_argument('--model', default=MODEL_FILE, help='exported risk model, if present')
+    parser.add_argument('--store', default=INGEST_DIR, help='ingested partition directory')
+    args = parser.parse_args()
+
+    api = load_api(args.csv, args.model, args.store)
+    print(f"serving {int(api.cube.counts.sum()):,} rows on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(api, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+"""Approximate cube from a stratified sample, with confidence intervals.
+
+For very large extracts, the exact cube is a pass over every row and every
+breakdown column. An ``ApproximateCube`` needs only a pass over the three
+stratum columns. Rows are drawn independently within each City × Gender ×
+Depression stratum, at a rate that gives about ``rate`` of the stratum and
+at least ``min_per_stratum`` rows (small strata are taken whole). Each
+sampled row stands for ``N_h / n_h`` rows of its stratum.
+
+Weighting the sample cube's counts and sums by that factor gives an
+ordinary ``FilterCube`` of estimates, so every KPI and chart method works
+unchanged. Because the strata are sidebar filters, student and depression
+counts are exact unless an age range cuts through a stratum. Intervals come
+from the stratified estimator of a total,
+``Var = sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h``. Rates, shares and means
+use the linearized ratio estimator. They are shown as 95% half-widths:
+``kpis()['intervals']`` for the tiles, and an ``Error`` column on the
+breakdowns and stress means that the charts draw as error bars.
+"""
+import numpy as np
+
+from analytics.cube import DEPRESSION_VALUES, FilterCube
+from analytics.dataset import MEAN_COLUMNS, display_labels
+from analytics.pipeline import ERROR
+
+DEFAULT_RATE = 0.01
+MIN_PER_STRATUM = 30
+
+# Normal quantile for the 95% intervals
+Z = 1.959964
+
+
+def squared(column):
+    return f'{column} (squared)'
+
+
+def _variance(sum_d, sum_d2, sampled, population):
+    """Stratified variance of an estimated total, summed over the strata given.
+
+    ``sum_d`` and ``sum_d2`` are per-stratum sums of the linearized values
+    and their squares over the sampled rows, with strata on the leading axes.
+    """
+    n = np.maximum(sampled, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s2 = np.where(sampled > 1, (sum_d2 - sum_d ** 2 / n) / np.maximum(sampled - 1, 1), 0.0)
+        fpc = np.where(population > 0, 1 - sampled / np.maximum(population, 1), 0.0)
+    return population ** 2 * fpc * np.maximum(s2, 0.0) / n
+
+
+def _ratio_error(y, y2, xy, x, x2, sampled, population, weight):
+    """Half-width of ``R = sum w y / sum w x`` per stratum array ``weight``.
+
+    ``y``, ``y2``, ``xy``, ``x`` and ``x2`` are per-stratum sample sums of
+    y, y², xy, x and x². Returns (ratio, half-width).
+    """
+    total_y, total_x = float((weight * y).sum()), float((weight * x).sum())
+    if total_x <= 0:
+        return np.nan, np.nan
+    ratio = total_y / total_x
+    sum_d = y - ratio * x
+    sum_d2 = y2 - 2 * ratio * xy + ratio ** 2 * x2
+    variance = _variance(sum_d, sum_d2, sampled, population).sum() / total_x ** 2
+    return ratio, Z * float(np.sqrt(variance))
+
+
+def _total_error(y, y2, sampled, population):
+    return Z * float(np.sqrt(_variance(y, y2, sampled, population).sum()))
+
+
+class ApproximateCube:
+    """A ``FilterCube`` of estimates plus what its intervals need."""
+
+    def __init__(self, estimate, sample, population, sampled):
+        # Weighted counts and sums; answers every query like an exact cube
+        self.estimate = estimate
+        # Raw counts and sums of the sampled rows, for the variances
+        self.sample = sample
+        # Stratum sizes, (gender, depression, city) in the cubes' label order
+        self.population = population
+        self.sampled = sampled
+        self._gender_pos = {g: i for i, g in enumerate(estimate.genders)}
+        self._city_pos = {c: i for i, c in enumerate(estimate.cities)}
+
+    @property
+    def genders(self):
+        return self.estimate.genders
+
+    @property
+    def ages(self):
+        return self.estimate.ages
+
+    @property
+    def cities(self):
+        return self.estimate.cities
+
+    @property
+    def version(self):
+        return self.estimate.version
+
+    @property
+    def sample_size(self):
+        return int(self.sampled.sum())
+
+    @classmethod
+    def build(cls, dataset, rate=DEFAULT_RATE, min_per_stratum=MIN_PER_STRATUM, seed=0):
+        """Draw the stratified sample from a ``Dataset`` and weight it."""
+        # Strata on the same axes and label order as the cube
+        genders, gender_lookup = dataset.gender_axis()
+        shape = (len(genders), len(DEPRESSION_VALUES), len(dataset.labels['City']))
+
+        # Stratum id per row, int32 (smaller than any numeric column)
+        ids = gender_lookup[dataset.codes['Gender']].astype(np.int32)
+        ids *= shape[1]
+        ids += dataset.values['Depression'].astype(np.int32)
+        ids *= shape[2]
+        ids += dataset.codes['City']
+        population = np.bincount(ids, minlength=int(np.prod(shape)))
+
+        target = np.maximum(np.ceil(rate * population), min_per_stratum)
+        probability = np.minimum(target / np.maximum(population, 1), 1.0).astype(np.float32)
+        keep = np.random.default_rng(seed).random(len(ids), dtype=np.float32) < probability[ids]
+        rows = np.flatnonzero(keep)
+        sampled = np.bincount(ids[rows], minlength=len(population))
+        population, sampled = population.reshape(shape), sampled.reshape(shape)
+
+        measures = {squared(column): dataset.numeric(column).astype(np.float64) ** 2
+                    for column in MEAN_COLUMNS}
+        sample = FilterCube.from_dataset(dataset, rows, measures=measures)
+
+        # Each sampled row stands for N_h / n_h rows; the age axis is constant
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(sampled > 0, population / np.maximum(sampled, 1), 0.0)
+        cell = weight[:, None, :, :]
+
+        def weighted(table):
+            return table * cell.reshape(cell.shape + (1,) * (table.ndim - 4))
+
+        estimate = FilterCube(
+            sample.genders, sample.ages, sample.cities,
+            weighted(sample.counts),
+            {name: (labels, weighted(table)) for name, (labels, table) in sample.breakdowns.items()},
+            {name: weighted(table) for name, table in sample.sums.items() if name in MEAN_COLUMNS},
+            {name: weighted(table) for name, table in sample.nonnull.items()
+             if name in MEAN_COLUMNS}
+        )
+        return cls(estimate, sample, population, sampled)
+
+    def slice(self, genders=None, age_range=None, depression=None, city=None):
+        estimate = self.estimate.slice(genders, age_range, depression, city)
+        sample = self.sample.slice(genders, age_range, depression, city)
+        index = np.ix_([self._gender_pos[g] for g in estimate.genders],
+                       range(len(DEPRESSION_VALUES)),
+                       [self._city_pos[c] for c in estimate.cities])
+        population = self.population[index]
+        if depression is not None:
+            mask = np.array(DEPRESSION_VALUES) == depression
+            population = population * mask[None, :, None]
+        return ApproximateSlice(estimate, sample, population, self.sampled[index])
+
+
+class ApproximateSlice:
+    """A ``CubeSlice`` of estimates whose KPIs and breakdowns carry intervals."""
+
+    def __init__(self, estimate, sample, population, sampled):
+        self.estimate = estimate
+        self.sample = sample
+        self.population = population
+        self.sampled = sampled
+
+    def __getattr__(self, name):
+        # total, by_depression, predicted_risk and friends come from the estimates
+        return getattr(self.estimate, name)
+
+    def _per_stratum(self, table):
+        """Sum a sliced (gender, age, depression, city, ...) table over age."""
+        return table.sum(axis=1)
+
+    def _weight(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.sampled > 0, self.population / np.maximum(self.sampled, 1), 0.0)
+
+    def _yes(self, column):
+        labels, table = self.sample.breakdowns[column]
+        if 'Yes' not in labels:
+            return np.zeros(self.sampled.shape)
+        return self._per_stratum(table[..., labels.index('Yes')])
+
+    def by_gender(self):
+        return self.estimate.by_gender().round()
+
+    def by_age_group(self):
+        return self.estimate.by_age_group().round()
+
+    def kpis(self, *args, **kwargs):
+        """``CubeSlice.kpis`` of the estimates plus 95% half-widths per tile."""
+        kpis = self.estimate.kpis(*args, **kwargs)
+        kpis['city_ranking'] = kpis['city_ranking'].round()
+
+        students = self._per_stratum(self.sample.counts)
+        depressed = students * (np.array(DEPRESSION_VALUES) == 1)[None, :, None]
+        high_risk = self._yes('Suicidal thoughts') * (np.array(DEPRESSION_VALUES) == 1)[None, :, None]
+        history = self._yes('Family History of Mental Illness') * (
+            np.array(DEPRESSION_VALUES) == 1)[None, :, None]
+        strata = (self.sampled, self.population)
+        weight = self._weight()
+
+        # Indicators: y² = y, and xy = y whenever y implies x
+        kpis['intervals'] = {
+            'total_students': _total_error(students, students, *strata),
+            'depression_cases': _total_error(depressed, depressed, *strata),
+            'depression_rate': 100 * _ratio_error(
+                depressed, depressed, depressed, students, students, *strata, weight)[1],
+            'high_risk': _total_error(high_risk, high_risk, *strata),
+            'family_history_pct': 100 * _ratio_error(
+                history, history, history, depressed, depressed, *strata, weight)[1]
+        }
+        return kpis
+
+    def breakdown(self, column, display=False):
+        """``CubeSlice.breakdown`` of the estimates with an ``Error`` column."""
+        frame = self.estimate.breakdown(column, display)
+        labels, table = self.sample.breakdowns[column]
+        # (gender, depression, city, label): variance per (depression, label)
+        y = self._per_stratum(table)
+        variance = _variance(y, y, self.sampled[..., None], self.population[..., None])
+        errors = Z * np.sqrt(variance.sum(axis=(0, 2)))
+        if display:
+            labels = display_labels(column, labels)
+        label_pos = {label: i for i, label in enumerate(labels)}
+        frame['Count'] = frame['Count'].round()
+        frame[ERROR] = [errors[DEPRESSION_VALUES.index(d), label_pos[label]]
+                        for label, d in zip(frame[column], frame['Depression'])]
+        return frame
+
+    def means(self):
+        """``CubeSlice.means`` of the estimates with ``<column> Error`` columns."""
+        frame = self.estimate.means()
+        weight = self._weight()
+        for column in MEAN_COLUMNS:
+            y = self._per_stratum(self.sample.sums[column])
+            y2 = self._per_stratum(self.sample.sums[squared(column)])
+            x = self._per_stratum(self.sample.nonnull[column])
+            errors = {}
+            for i, value in enumerate(DEPRESSION_VALUES):
+                take = (slice(None), slice(i, i + 1))
+                errors[value] = _ratio_error(y[take], y2[take], y[take], x[take], x[take],
+                                             self.sampled[take], self.population[take],
+                                             weight[take])[1]
+            frame[f'{column} {ERROR}'] = frame['Depression'].map(errors).to_numpy()
+        return frame
+
+
+def coverage(approximate, exact, states):
+    """Share of (state, tile) pairs whose exact value lies inside the interval."""
+    hits = []
+    for state in states:
+        estimated = approximate.slice(**state).kpis()
+        actual = exact.slice(**state).kpis()
+        for key, half_width in estimated['intervals'].items():
+            if not np.isnan(half_width):
+                hits.append(abs(estimated[key] - actual[key]) <= half_width + 1e-9)
+    return float(np.mean(hits)) if hits else np.nan
+
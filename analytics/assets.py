@@ -0,0 +1,66 @@
+"""Static images shipped with the repository, pre-resized once.
+
+The dashboard used to point ``st.image`` at the logo on
+raw.githubusercontent.com, so every page load waited on an outbound fetch
+for a 512 px image shown at 180 px. ``resized_image`` scales the
+repository's copy down once, to a 256-color palette for PNGs, and keeps it
+under ``.cache/assets`` next to the Feather cache. The cached file is keyed
+by a hash of the source, so an updated image is picked up.
+``data_uri`` inlines the small result (about 11 KB for the logo at 2x) into
+the page.
+
+Only the standard library is imported here; Pillow is imported the first
+time an image has to be resized, so the login page does not load it.
+"""
+import base64
+import hashlib
+import mimetypes
+import os
+
+# Under the Feather cache's directory (``analytics.storage.CACHE_DIR``), which
+# is not imported here because it brings in pandas and pyarrow
+ASSET_DIR = os.path.join('.cache', 'assets')
+
+PALETTE_COLORS = 256
+
+
+def resized_path_for(path, width, cache_dir=None):
+    """Location of ``path`` resized to ``width`` pixels, for its current contents."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), ASSET_DIR)
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    name, ext = os.path.splitext(os.path.basename(path))
+    return os.path.join(cache_dir, f'{name}-{width}w-{digest}{ext}')
+
+
+def resized_image(path, width, cache_dir=None):
+    """Path of a copy of ``path`` at most ``width`` pixels wide, built if missing."""
+    resized = resized_path_for(path, width, cache_dir)
+    if os.path.exists(resized):
+        return resized
+
+    from PIL import Image
+
+    name, ext = os.path.splitext(resized)
+    # Write then rename so concurrent replicas never serve a partial file
+    tmp_path = f'{name}.{os.getpid()}.tmp{ext}'
+    os.makedirs(os.path.dirname(resized), exist_ok=True)
+    with Image.open(path) as image:
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)),
+                                 Image.Resampling.LANCZOS)
+        # Logos have few colors; a 256-color palette is a quarter of the size
+        if ext.lower() == '.png' and image.mode != 'P':
+            image = image.quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+        image.save(tmp_path, optimize=True)
+    os.replace(tmp_path, resized)
+    return resized
+
+
+def data_uri(path):
+    """The file at ``path`` as a ``data:`` URI."""
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    with open(path, 'rb') as f:
+        encoded = base64.b64encode(f.read()).decode('ascii')
+    return f'data:{mimetype};base64,{encoded}'
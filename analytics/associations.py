@@ -0,0 +1,133 @@
+"""Association statistics between each risk factor and Depression.
+
+For a filtered slice, the cube's breakdown tables of the factors are summed
+into one contingency tensor of shape (factor, level, depression). Factors
+with fewer levels are padded with empty levels. Every statistic is then
+computed for all factors at once with array arithmetic on that tensor:
+
+- Pearson's chi-square test of independence, its degrees of freedom,
+  p-value and Cramér's V, per factor
+- per level, the odds ratio and relative risk of depression against the
+  other levels of the same factor (one vs rest), with 95% Wald intervals
+  on the log scale
+
+The tensor holds a few dozen cells whatever the number of rows, so a filter
+change costs the same on 10M rows as on the 28k-row extract. Levels without
+students in the slice are left out. A level whose 2×2 table has an empty
+cell gets 0.5 added to each of its cells (Haldane–Anscombe). With a single
+depression status selected nothing can be compared, and every statistic is
+NaN.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Factors tested against Depression, in the order the tables list them
+FACTORS = [
+    'Family History of Mental Illness',
+    'Sleep Duration',
+    'Dietary Habits',
+    'Degree_Level',
+    'Academic Pressure',
+    'Financial Stress'
+]
+
+# Normal quantile for the 95% intervals
+Z = 1.959964
+
+# tests: one row per factor; levels: one row per (factor, level)
+Associations = namedtuple('Associations', ['tests', 'levels'])
+
+
+def contingency(filtered, factors=FACTORS):
+    """Level labels per factor and the (factor, level, depression) count tensor."""
+    labels = [filtered.breakdowns[factor][0] for factor in factors]
+    tensor = np.zeros((len(factors), max(map(len, labels), default=0), 2))
+    for i, factor in enumerate(factors):
+        # (gender, age, depression, city, level) -> (level, depression)
+        tensor[i, :len(labels[i])] = filtered.breakdowns[factor][1].sum(axis=(0, 1, 3)).T
+    return labels, tensor
+
+
+def chi2_sf(x, dof):
+    """P(X >= x) for a chi-square variable with a positive integer ``dof``."""
+    if math.isnan(x) or dof < 1:
+        return np.nan
+    half = x / 2
+    if dof % 2 == 0:
+        term = total = math.exp(-half)
+        for i in range(1, dof // 2):
+            term *= half / i
+            total += term
+    else:
+        total = math.erfc(math.sqrt(half))
+        term = math.exp(-half) * math.sqrt(half) / math.gamma(1.5)
+        for i in range(dof // 2):
+            total += term
+            term *= half / (i + 1.5)
+    return min(total, 1.0)
+
+
+def _interval(log_ratio, se):
+    return np.exp(log_ratio), np.exp(log_ratio - Z * se), np.exp(log_ratio + Z * se)
+
+
+def associations(filtered, factors=FACTORS):
+    """Test and per-level effect tables for a ``CubeSlice``."""
+    labels, observed = contingency(filtered, factors)
+    students = observed.sum(axis=2)            # (factor, level)
+    by_status = observed.sum(axis=1)           # (factor, depression)
+    total = students.sum(axis=1)               # (factor,)
+    levels_present = (students > 0).sum(axis=1)
+    comparable = (by_status > 0).all(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = students[:, :, None] * by_status[:, None, :] / total[:, None, None]
+        chi2 = np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0).sum(axis=(1, 2))
+        dof = np.where(comparable, levels_present - 1, 0)
+        chi2 = np.where(dof > 0, chi2, np.nan)
+        cramers_v = np.sqrt(chi2 / total)
+
+        # Each level against the rest of its factor: a, b at the level, c, d elsewhere
+        a, b = observed[:, :, 1], observed[:, :, 0]
+        c, d = by_status[:, None, 1] - a, by_status[:, None, 0] - b
+        corrected = (np.minimum(np.minimum(a, b), np.minimum(c, d)) == 0) * 0.5
+        a, b, c, d = a + corrected, b + corrected, c + corrected, d + corrected
+        odds = _interval(np.log(a * d / (b * c)), np.sqrt(1 / a + 1 / b + 1 / c + 1 / d))
+        risk = _interval(np.log(a / (a + b) * (c + d) / c),
+                         np.sqrt(1 / a - 1 / (a + b) + 1 / c - 1 / (c + d)))
+        rate = 100 * observed[:, :, 1] / students
+
+    tests = pd.DataFrame({
+        'Factor': factors,
+        'Levels': levels_present,
+        'Students': total.astype(np.int64),
+        'Chi-square': chi2,
+        'dof': dof,
+        'p-value': [chi2_sf(x, k) for x, k in zip(chi2, dof)],
+        "Cramér's V": cramers_v
+    })
+
+    # Levels without students are dropped; a factor with one level has no rest
+    factor_idx, level_idx = np.nonzero(students > 0)
+    defined = (comparable & (levels_present > 1))[factor_idx]
+
+    def effect(values):
+        return np.where(defined, values[factor_idx, level_idx], np.nan)
+
+    levels = pd.DataFrame({
+        'Factor': [factors[i] for i in factor_idx],
+        'Level': [labels[i][j] for i, j in zip(factor_idx, level_idx)],
+        'Students': students[factor_idx, level_idx].astype(np.int64),
+        'Depressed': observed[factor_idx, level_idx, 1].astype(np.int64),
+        'Depression %': rate[factor_idx, level_idx],
+        'Odds Ratio': effect(odds[0]),
+        'OR Low': effect(odds[1]),
+        'OR High': effect(odds[2]),
+        'Relative Risk': effect(risk[0]),
+        'RR Low': effect(risk[1]),
+        'RR High': effect(risk[2])
+    })
+    return Associations(tests, levels)
@@ -0,0 +1,165 @@
+"""Packed bitmap index over the sidebar filter columns.
+
+One bitset per Gender, City and Depression value, plus cumulative age
+bitsets so any age range is ``prefix[hi] & ~prefix[lo - 1]``. Filters
+combine with word-wide AND/OR on ``uint64`` arrays (n / 64 words), and row
+ids are only materialized when a caller needs the raw rows.
+"""
+import numpy as np
+
+
+def _pack(mask):
+    """Pack a boolean array into little-endian uint64 words."""
+    packed = np.packbits(mask, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def _popcount(words):
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum())
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+
+class Bitmap:
+    """A set of row ids stored as packed bits."""
+
+    def __init__(self, words, n_rows):
+        self.words = words
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_mask(cls, mask):
+        mask = np.asarray(mask, dtype=bool)
+        return cls(_pack(mask), len(mask))
+
+    @classmethod
+    def full(cls, n_rows):
+        return cls.from_mask(np.ones(n_rows, dtype=bool))
+
+    @classmethod
+    def empty(cls, n_rows):
+        return cls(np.zeros(-(-n_rows // 64), dtype=np.uint64), n_rows)
+
+    def __and__(self, other):
+        return Bitmap(self.words & other.words, self.n_rows)
+
+    def __or__(self, other):
+        return Bitmap(self.words | other.words, self.n_rows)
+
+    def andnot(self, other):
+        """Rows in this set but not in ``other``."""
+        return Bitmap(self.words & ~other.words, self.n_rows)
+
+    def count(self):
+        """Number of selected rows, without materializing them."""
+        return _popcount(self.words)
+
+    def to_mask(self):
+        bits = np.unpackbits(self.words.view(np.uint8), count=self.n_rows,
+                             bitorder='little')
+        return bits.astype(bool)
+
+    def row_ids(self):
+        """Materialize the selected row positions."""
+        return np.flatnonzero(self.to_mask())
+
+
+class BitmapIndex:
+    """Bitsets for every Gender, City, Depression and Age value of a frame."""
+
+    def __init__(self, n_rows, gender, city, depression, ages, age_prefix):
+        self.n_rows = n_rows
+        self.gender = gender
+        self.city = city
+        self.depression = depression
+        self.ages = ages
+        self.age_prefix = age_prefix
+
+    @staticmethod
+    def _value_bitmaps(codes, labels):
+        return {label: Bitmap.from_mask(codes == i) for i, label in enumerate(labels)}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Index a frame; see ``Dataset.index`` for the usual entry point."""
+        from analytics.dataset import Dataset
+        return Dataset.from_frame(df).index
+
+    @classmethod
+    def from_arrays(cls, gender, city, depression, age):
+        """Build the index from (codes, labels) pairs and numeric arrays."""
+        age = np.asarray(age, dtype=np.int64)
+        ages = list(range(int(age.min()), int(age.max()) + 1)) if len(age) else []
+
+        # prefix[i] holds every row with Age <= ages[i]
+        order = np.argsort(age, kind='stable')
+        sorted_age = age[order]
+        mask = np.zeros(len(age), dtype=bool)
+        age_prefix = []
+        start = 0
+        for value in ages:
+            stop = np.searchsorted(sorted_age, value, side='right')
+            mask[order[start:stop]] = True
+            age_prefix.append(Bitmap.from_mask(mask))
+            start = stop
+
+        depression = np.asarray(depression)
+        return cls(
+            n_rows=len(age),
+            gender=cls._value_bitmaps(*gender),
+            city=cls._value_bitmaps(*city),
+            depression={value: Bitmap.from_mask(depression == value) for value in (0, 1)},
+            ages=ages,
+            age_prefix=age_prefix
+        )
+
+    def age_range(self, lo, hi):
+        """Rows with ``lo <= Age <= hi``."""
+        if not self.ages:
+            return Bitmap.empty(self.n_rows)
+        lo = max(int(lo), self.ages[0])
+        hi = min(int(hi), self.ages[-1])
+        if lo > hi:
+            return Bitmap.empty(self.n_rows)
+        upper = self.age_prefix[hi - self.ages[0]]
+        if lo == self.ages[0]:
+            return upper
+        return upper.andnot(self.age_prefix[lo - 1 - self.ages[0]])
+
+    def age(self, value):
+        """Rows with exactly this age, derived from the prefix bitsets."""
+        return self.age_range(value, value)
+
+    def select(self, genders=None, age_range=None, depression=None, city=None):
+        """Combine the sidebar filters into one bitmap.
+
+        Arguments follow ``FilterCube.slice``: empty ``genders`` keeps every
+        gender, ``depression`` is 0, 1 or None and ``city`` None/"All" keeps
+        every city.
+        """
+        chosen = []
+
+        if genders:
+            either = Bitmap.empty(self.n_rows)
+            for gender in genders:
+                if gender in self.gender:
+                    either = either | self.gender[gender]
+            chosen.append(either)
+
+        if age_range is not None:
+            chosen.append(self.age_range(*age_range))
+
+        if depression is not None:
+            chosen.append(self.depression.get(depression, Bitmap.empty(self.n_rows)))
+
+        if city is not None and city != 'All':
+            chosen.append(self.city.get(city, Bitmap.empty(self.n_rows)))
+
+        if not chosen:
+            return Bitmap.full(self.n_rows)
+        selection = chosen[0]
+        for bitmap in chosen[1:]:
+            selection = selection & bitmap
+        return selection
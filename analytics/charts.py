@@ -0,0 +1,237 @@
+"""Plotly figures for the dashboard's chart grid.
+
+Each builder takes the aggregate for its chart (see ``CHART_AGGREGATES`` in
+``analytics.pipeline``) and returns a figure, so every chart is an
+independent unit that only needs rebuilding when its own data changes.
+
+Figures are assembled from plain trace dicts over the aggregate's NumPy
+arrays instead of going through plotly.express, and share one base layout.
+The plotly template is left empty because Streamlit's frontend themes every
+chart itself, which keeps each serialized figure to a few hundred bytes.
+"""
+import numpy as np
+import plotly.graph_objects as go
+
+from analytics.pipeline import CHART_NAMES, ERROR, chart_data
+
+# Color palette for charts
+colors = ['#03045E', '#0077B6', '#00B4D8', '#90E0EF', '#CAF0F8']
+
+# Top chart of each column, rendered before the secondary row below them
+PRIMARY_CHARTS = ['gender', 'age', 'family', 'cities']
+
+DEPRESSION_STATUS = {0: 'No Depression', 1: 'Depression'}
+
+# Layout shared by every chart card, built once
+BASE_LAYOUT = dict(
+    height=280,
+    font=dict(size=11),
+    margin=dict(t=35, b=0, l=0, r=0),
+    template=go.layout.Template()
+)
+
+# Horizontal legend centred under the plot; charts only set its offset
+LEGEND_BELOW = dict(
+    orientation="h",
+    yanchor="top",
+    xanchor="center",
+    x=0.5,
+    font=dict(size=10)
+)
+
+
+def chart_figure(traces, title, **layout):
+    """Figure from trace dicts on the shared base layout."""
+    return go.Figure(data=traces, layout=dict(
+        BASE_LAYOUT, title=dict(text=title, font=dict(size=14)), **layout))
+
+
+def hover(*fields):
+    """Hover template listing ``label=value`` pairs."""
+    return '<br>'.join(f'{label}={value}' for label, value in fields) + '<extra></extra>'
+
+
+def status_traces(data, x, y, trace_type='bar', **trace):
+    """One trace per depression status from ``x``, ``Depression`` and ``y`` columns.
+
+    ``data`` is a DataFrame or a dict of arrays. Statuses and categories keep
+    their order of appearance, and the statuses take the two chart colors in
+    that order. An ``Error`` column (95% half-widths, from the approximate
+    cube) is drawn as error bars.
+    """
+    depression = np.asarray(data['Depression'])
+    labels = np.asarray(data[x])
+    values = np.asarray(data[y])
+    errors = np.asarray(data[ERROR]) if ERROR in data else None
+    style = 'line' if trace_type == 'scatter' else 'marker'
+    traces = []
+    for color, status in zip([colors[0], colors[2]], dict.fromkeys(depression.tolist())):
+        rows = depression == status
+        name = DEPRESSION_STATUS[status]
+        traces.append(dict(
+            trace,
+            type=trace_type,
+            name=name,
+            x=labels[rows].tolist(),
+            y=values[rows].tolist(),
+            hovertemplate=hover(('Depression_Status', name), (x, '%{x}'), (y, '%{y}')),
+            **{style: dict(color=color)}
+        ))
+        if errors is not None:
+            traces[-1]['error_y'] = dict(type='data', array=errors[rows].round(3).tolist(),
+                                         thickness=1.5, width=3, color=colors[3])
+    return traces
+
+
+def gender_figure(gender_counts):
+    """1. Gender pie chart"""
+    return chart_figure(
+        [dict(type='pie',
+              labels=gender_counts.index.tolist(),
+              values=gender_counts.to_numpy().tolist(),
+              name='',
+              hovertemplate=hover(('label', '%{label}'), ('value', '%{value}')))],
+        "Gender Distribution",
+        piecolorway=colors[:len(gender_counts)],
+        showlegend=True
+    )
+
+
+def stress_figure(stress_data):
+    """Academic Pressure and Financial Stress grouped bar chart"""
+    # One row per (depression status, stress type), stress types on the x axis
+    stress_types = ['Academic Pressure', 'Financial Stress']
+    depression = stress_data['Depression'].to_numpy()
+    stress_melted = {
+        'Stress Type': np.tile(stress_types, len(depression)),
+        'Depression': depression.repeat(len(stress_types)),
+        'Average Score': stress_data[stress_types].to_numpy().ravel()
+    }
+    error_columns = [f'{stress_type} {ERROR}' for stress_type in stress_types]
+    if all(column in stress_data for column in error_columns):
+        stress_melted[ERROR] = stress_data[error_columns].to_numpy().ravel()
+    return chart_figure(
+        status_traces(stress_melted, 'Stress Type', 'Average Score'),
+        "Academic & Financial Stress",
+        barmode='group',
+        showlegend=True,
+        legend=dict(LEGEND_BELOW, y=-0.2),
+        margin=dict(t=35, b=50, l=0, r=0),
+        xaxis_title="",
+        yaxis_title="Avg Score",
+        yaxis=dict(range=[0, 5.5])
+    )
+
+
+def age_figure(age_dist):
+    """2. Age distribution"""
+    return chart_figure(
+        [dict(type='bar',
+              x=age_dist.index.tolist(),
+              y=age_dist.to_numpy().tolist(),
+              marker=dict(color=colors[1]),
+              name='',
+              hovertemplate=hover(('Age Group', '%{x}'), ('Count', '%{y}')))],
+        "Age Distribution",
+        showlegend=False,
+        xaxis_title="Age Group",
+        yaxis_title="Count"
+    )
+
+
+def degree_figure(degree_data):
+    """Degree Level stacked chart"""
+    return chart_figure(
+        status_traces(degree_data, 'Degree_Level', 'Count'),
+        "Depression by Degree Level",
+        barmode='stack',
+        showlegend=True,
+        legend=dict(LEGEND_BELOW, y=-0.4),
+        margin=dict(t=35, b=85, l=0, r=0),
+        xaxis_title="",
+        yaxis_title="Students",
+        xaxis_tickangle=-45
+    )
+
+
+def family_figure(family_depression):
+    """3. Family history and depression"""
+    return chart_figure(
+        status_traces(family_depression.rename(columns={'Count': 'count'}),
+                      'Family History of Mental Illness', 'count'),
+        "Family History & Depression",
+        barmode='group',
+        showlegend=True,
+        legend=dict(LEGEND_BELOW, y=-0.2),
+        margin=dict(t=35, b=50, l=0, r=0),
+        xaxis_title="",
+        yaxis_title="Count"
+    )
+
+
+def sleep_figure(sleep_data):
+    """Sleep Hours line chart"""
+    return chart_figure(
+        status_traces(sleep_data, 'Sleep Duration', 'Count',
+                      trace_type='scatter', mode='lines+markers'),
+        "Sleep Hours by Depression",
+        showlegend=True,
+        legend=dict(LEGEND_BELOW, y=-0.5),
+        margin=dict(t=35, b=110, l=0, r=0),
+        xaxis_title="",
+        yaxis_title="Students"
+    )
+
+
+def cities_figure(city_ranking):
+    """4. Top 5 cities lollipop chart"""
+    # Ascending, so the largest count is drawn at the top
+    top_5_cities = city_ranking.sort_values(ascending=True, kind='stable')
+    cases = top_5_cities.to_numpy().tolist()
+    cities = top_5_cities.index.tolist()
+    return chart_figure(
+        [dict(type='scatter', x=cases, y=cities, mode='markers+lines',
+              marker=dict(size=10, color=colors[1]),
+              line=dict(color=colors[3], width=2), name=''),
+         # Add dots at the end
+         dict(type='scatter', x=cases, y=cities, mode='markers',
+              marker=dict(size=12, color=colors[0]), name='', showlegend=False)],
+        "Top 5 Cities - Depression",
+        showlegend=False,
+        xaxis_title="Cases",
+        yaxis_title=""
+    )
+
+
+def diet_figure(diet_data):
+    """Dietary Habits grouped bar chart"""
+    return chart_figure(
+        status_traces(diet_data, 'Dietary Habits', 'Count'),
+        "Dietary Habits by Depression",
+        barmode='group',
+        showlegend=True,
+        legend=dict(LEGEND_BELOW, y=-0.45),
+        margin=dict(t=35, b=95, l=0, r=0),
+        xaxis_title="",
+        yaxis_title="Count",
+        xaxis_tickangle=-45
+    )
+
+
+# Builder for each chart, from that chart's aggregate
+CHART_BUILDERS = {
+    'gender': gender_figure,
+    'stress': stress_figure,
+    'age': age_figure,
+    'degree': degree_figure,
+    'family': family_figure,
+    'sleep': sleep_figure,
+    'cities': cities_figure,
+    'diet': diet_figure
+}
+
+
+def build_figures(filtered, kpis=None):
+    """All eight figures for a slice, keyed by chart name in page order."""
+    data = chart_data(filtered, kpis=kpis)
+    return {name: CHART_BUILDERS[name](data[name]) for name in CHART_NAMES}
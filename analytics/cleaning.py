@@ -0,0 +1,332 @@
+"""Cleaning rules from ``IP_SD_Model.ipynb`` for raw survey exports.
+
+Usage (from the repository root):
+
+    python -m analytics.cleaning student_depression_dataset.csv IP_Student_Depression.csv
+
+``clean`` turns a raw export (the schema the notebook reads) into the
+cleaned schema of ``IP_Student_Depression.csv``, applying the notebook's
+steps in order:
+
+- City fixes: '3' -> 'Unknown', 'Less Delhi' -> 'Delhi',
+  'Less than 5 Kalyan' -> 'Kalyan', plus the dashboard's
+  'Khaziabad' -> 'Ghaziabad'
+- keep students only, and only rows with Work Pressure 0
+- drop Work Pressure and Job Satisfaction
+- CGPA 0 -> 5
+- Sleep_Hours from Sleep Duration, with the unmapped 'Others' filled with
+  the mode, as in the published extract
+- Degree_Level: 'Class 12' -> Highschool, 'Others' -> Others, anything
+  else -> University
+- drop rows whose Financial Stress is '?', and rename the suicidal thoughts
+  question to 'Suicidal thoughts'
+
+Text columns are read as categoricals, and every rule is evaluated once per
+category and then gathered by code, so no Python runs per row. ``clean_csv``
+streams an export of any size through ``clean`` in blocks and reports the
+throughput.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+SUICIDAL_QUESTION = 'Have you ever had suicidal thoughts ?'
+
+# Columns every raw batch must carry
+RAW_COLUMNS = [
+    'id',
+    'Gender',
+    'Age',
+    'City',
+    'Profession',
+    'Academic Pressure',
+    'Work Pressure',
+    'CGPA',
+    'Study Satisfaction',
+    'Job Satisfaction',
+    'Sleep Duration',
+    'Dietary Habits',
+    'Degree',
+    SUICIDAL_QUESTION,
+    'Work/Study Hours',
+    'Financial Stress',
+    'Family History of Mental Illness',
+    'Depression'
+]
+
+# Column order of the cleaned extract
+CLEAN_COLUMNS = [
+    'id',
+    'Gender',
+    'Age',
+    'City',
+    'Profession',
+    'Academic Pressure',
+    'CGPA',
+    'Study Satisfaction',
+    'Sleep Duration',
+    'Dietary Habits',
+    'Degree',
+    'Suicidal thoughts',
+    'Work/Study Hours',
+    'Financial Stress',
+    'Family History of Mental Illness',
+    'Depression',
+    'Sleep_Hours',
+    'Degree_Level'
+]
+
+CITY_FIXES = {
+    '3': 'Unknown',
+    'Less Delhi': 'Delhi',
+    'Less than 5 Kalyan': 'Kalyan',
+    'Khaziabad': 'Ghaziabad'
+}
+
+SLEEP_HOURS = {
+    "'Less than 5 hours'": 4.5,
+    "'5-6 hours'": 5.5,
+    "'7-8 hours'": 7.5,
+    "'More than 8 hours'": 9.0
+}
+
+# Mode of Sleep_Hours, used for 'Others' in the published extract
+SLEEP_HOURS_FILL = 4.5
+
+# Text columns of the raw export, parsed straight into categoricals
+RAW_CATEGORY_COLUMNS = [
+    'Gender',
+    'City',
+    'Profession',
+    'Sleep Duration',
+    'Dietary Habits',
+    'Degree',
+    SUICIDAL_QUESTION,
+    'Financial Stress',
+    'Family History of Mental Illness'
+]
+
+# Inclusive ranges of the raw columns cast to the extract's numeric dtypes.
+# Every kept row needs a value in range in each; all but CGPA are whole.
+VALUE_RANGES = {
+    'id': (0, 2 ** 31 - 1),
+    'Age': (10, 100),
+    'Academic Pressure': (0, 5),
+    'CGPA': (0, 10),
+    'Study Satisfaction': (0, 5),
+    'Work/Study Hours': (0, 24),
+    'Financial Stress': (1, 5),
+    'Depression': (0, 1)
+}
+
+FRACTIONAL_COLUMNS = ['CGPA']
+
+# Text columns every kept row needs a label in (the cube and charts break
+# the students down by them)
+REQUIRED_TEXT_COLUMNS = [
+    'Gender',
+    'City',
+    'Sleep Duration',
+    'Dietary Habits',
+    'Degree',
+    SUICIDAL_QUESTION,
+    'Family History of Mental Illness'
+]
+
+# Offending rows listed per column in a validation error
+REPORTED_ROWS = 5
+
+# Bytes of CSV per streamed block, roughly 500k raw rows
+DEFAULT_BLOCK_SIZE = 64 * 1024 * 1024
+
+
+def _categorical(series):
+    """Codes and categories of a column, categorizing it if needed."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    return series.cat.codes.to_numpy(), series.cat.categories
+
+
+def _lookup(series, rule, missing):
+    """Evaluate ``rule`` once per category and gather the results by code."""
+    codes, categories = _categorical(series)
+    table = np.array([rule(category) for category in categories] + [missing])
+    # Missing values have code -1, which picks the trailing ``missing``
+    return table[codes]
+
+
+def _recode(series, rule):
+    """Categorical with ``rule`` applied to each category, merging collisions."""
+    codes, categories = _categorical(series)
+    labels, inverse = np.unique(
+        np.array([rule(category) for category in categories], dtype=object),
+        return_inverse=True)
+    return pd.Categorical.from_codes(np.append(inverse, -1)[codes], labels)
+
+
+def _number(label):
+    try:
+        return float(label)
+    except ValueError:
+        return np.nan
+
+
+def _kept(raw):
+    """Mask of the rows the notebook keeps: students, Work Pressure 0, no '?' stress."""
+    return (_lookup(raw['Profession'], lambda p: str(p).strip().lower() == 'student', False)
+            & (pd.to_numeric(raw['Work Pressure'], errors='coerce').to_numpy() == 0)
+            & _lookup(raw['Financial Stress'], lambda f: str(f).strip() != '?', False))
+
+
+def _blank(label):
+    return str(label).strip() == ''
+
+
+def _rows(index):
+    shown = ', '.join(str(row) for row in index[:REPORTED_ROWS])
+    more = f' and {len(index) - REPORTED_ROWS} more' if len(index) > REPORTED_ROWS else ''
+    return f'rows {shown}{more}'
+
+
+def validate(raw):
+    """Raise ``ValueError`` unless ``raw`` can be cleaned into the extract schema.
+
+    Every raw export column must be present. Each row the rules keep needs
+    a label in every column of ``REQUIRED_TEXT_COLUMNS`` and a number within
+    ``VALUE_RANGES`` (whole, except for ``FRACTIONAL_COLUMNS``), so a batch
+    that would not fit the cube is refused before anything is written. The
+    message names the offending rows by their index in ``raw`` (0 is the
+    first data line of a CSV batch).
+    """
+    missing = [column for column in RAW_COLUMNS if column not in raw.columns]
+    if missing:
+        raise ValueError(f"batch is missing columns: {', '.join(missing)}")
+
+    kept = raw[_kept(raw)]
+    problems = []
+    for column in REQUIRED_TEXT_COLUMNS:
+        bad = _lookup(kept[column], _blank, True)
+        if bad.any():
+            problems.append(f"{column} ({_rows(kept.index[bad])}) is blank")
+    for column, (low, high) in VALUE_RANGES.items():
+        if isinstance(kept[column].dtype, pd.CategoricalDtype):
+            values = _lookup(kept[column], _number, np.nan).astype(float)
+        else:
+            values = pd.to_numeric(kept[column], errors='coerce').to_numpy(dtype=float,
+                                                                          na_value=np.nan)
+        whole = column not in FRACTIONAL_COLUMNS
+        with np.errstate(invalid='ignore'):
+            bad = ~((values >= low) & (values <= high))
+            if whole:
+                bad |= values != np.round(values)
+        if bad.any():
+            kind = 'a whole number' if whole else 'a number'
+            problems.append(f"{column} ({_rows(kept.index[bad])}) needs {kind} "
+                            f"from {low} to {high}")
+    if problems:
+        raise ValueError(f"batch has invalid values: {'; '.join(problems)}")
+
+
+def _degree_level(degree):
+    # The export quotes some degrees, e.g. "'Class 12'"
+    degree = str(degree).strip("'")
+    if degree == 'Class 12':
+        return 'Highschool'
+    return 'Others' if degree == 'Others' else 'University'
+
+
+def clean(raw, sleep_fill=SLEEP_HOURS_FILL):
+    """Apply the notebook's cleaning rules to a raw export frame."""
+    validate(raw)
+    df = raw[_kept(raw)].drop(columns=['Work Pressure', 'Job Satisfaction'])
+
+    df['City'] = _recode(df['City'], lambda city: CITY_FIXES.get(city, city))
+    df['CGPA'] = np.where(df['CGPA'].to_numpy(dtype=float) == 0, 5.0, df['CGPA'])
+    df['Sleep_Hours'] = _lookup(df['Sleep Duration'],
+                                lambda sleep: SLEEP_HOURS.get(sleep, sleep_fill), sleep_fill)
+    df['Degree_Level'] = _recode(df['Degree'], _degree_level)
+    df['Financial Stress'] = _lookup(df['Financial Stress'], _number, np.nan)
+    df = df.rename(columns={SUICIDAL_QUESTION: 'Suicidal thoughts'})
+    return df[CLEAN_COLUMNS].reset_index(drop=True)
+
+
+def read_raw(csv_path, chunksize=None):
+    """Read a raw export with its text columns as categoricals."""
+    return pd.read_csv(csv_path, dtype={column: 'category' for column in RAW_CATEGORY_COLUMNS},
+                       chunksize=chunksize)
+
+
+def _arrow_column_types():
+    # Fixed types, so every block of a large export parses the same way
+    return {
+        'id': pa.int64(),
+        **{column: pa.float64() for column in RAW_COLUMNS
+           if column != 'id' and column not in RAW_CATEGORY_COLUMNS},
+        **{column: pa.dictionary(pa.int32(), pa.string()) for column in RAW_CATEGORY_COLUMNS}
+    }
+
+
+def clean_csv(raw_csv, out_csv, block_size=DEFAULT_BLOCK_SIZE, sleep_fill=SLEEP_HOURS_FILL):
+    """Clean ``raw_csv`` into ``out_csv`` block by block; return throughput stats.
+
+    The export is streamed through Arrow's CSV reader and writer, so memory
+    stays at one block regardless of file size. The output is written to a
+    temporary file and renamed into place when complete.
+    """
+    start = time.perf_counter()
+    rows_in = rows_out = 0
+    tmp_path = f'{out_csv}.{os.getpid()}.tmp'
+    reader = pa_csv.open_csv(
+        raw_csv,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(column_types=_arrow_column_types()))
+    writer = schema = None
+    try:
+        for batch in reader:
+            chunk = batch.to_pandas()
+            cleaned = clean(chunk, sleep_fill)
+            table = pa.Table.from_pandas(cleaned, preserve_index=False)
+            if writer is None:
+                # Categoricals are written as plain text
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_dictionary(field.type) else field
+                    for field in table.schema])
+                writer = pa_csv.CSVWriter(tmp_path, schema)
+            writer.write_table(table.cast(schema))
+            rows_in += len(chunk)
+            rows_out += len(cleaned)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pd.DataFrame(columns=CLEAN_COLUMNS).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, out_csv)
+    seconds = time.perf_counter() - start
+    return {
+        'rows_in': rows_in,
+        'rows_out': rows_out,
+        'seconds': seconds,
+        'rows_per_sec': rows_in / seconds if seconds > 0 else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('raw_csv', help='raw survey export')
+    parser.add_argument('out_csv', help='cleaned extract to write')
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE,
+                        help='bytes of CSV parsed per block')
+    args = parser.parse_args()
+
+    stats = clean_csv(args.raw_csv, args.out_csv, args.block_size)
+    print(f"{stats['rows_in']:,} rows in, {stats['rows_out']:,} rows out, "
+          f"{stats['seconds']:.2f} s ({stats['rows_per_sec']:,.0f} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+"""Pre-aggregated filter cube for the dashboard.
+
+The sidebar only ever filters on Gender, Age, Depression and City, so every
+KPI and chart can be answered from counts keyed by those four coordinates.
+The cube is built once per dataset and is immutable, so one instance can
+be shared by every session; each rerun slices and sums a few thousand cells
+instead of re-filtering every row.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from analytics.dataset import (BREAKDOWN_COLUMNS, LEVEL_COLUMNS, MEAN_COLUMNS, Dataset,
+                               display_labels)
+from analytics.kpis import TOP_CITIES, city_ranking, summarize
+from analytics.scoring import PREDICTED_HIGH_RISK, RISK_SCORE, risk_measures
+
+# Age groups used by the age distribution chart
+AGE_BINS = [18, 25, 35, 45, 55, 60]
+AGE_LABELS = ['18-24', '25-34', '35-44', '45-54', '55-59']
+
+DEPRESSION_VALUES = [0, 1]
+
+
+class FilterCube:
+    """Counts and sums keyed by (Gender, Age, Depression, City)."""
+
+    def __init__(self, genders, ages, cities, counts, breakdowns, sums, nonnull):
+        self.genders = genders
+        self.ages = ages
+        self.cities = cities
+        self.counts = counts
+        self.breakdowns = breakdowns
+        self.sums = sums
+        self.nonnull = nonnull
+        # One cube is shared by every session, so its arrays are read-only
+        tables = [table for _, table in breakdowns.values()]
+        for array in [counts, *tables, *sums.values(), *nonnull.values()]:
+            array.flags.writeable = False
+        # Short content hash so caches built on this cube can be keyed by it.
+        # Every table feeds some cached chart, so all of them are hashed
+        names = sorted(breakdowns), sorted(sums), sorted(nonnull)
+        labels = [breakdowns[name][0] for name in names[0]]
+        digest = hashlib.sha1(repr((genders, ages, cities, names, labels)).encode())
+        arrays = [counts, *(breakdowns[name][1] for name in names[0]),
+                  *(sums[name] for name in names[1]), *(nonnull[name] for name in names[2])]
+        for array in arrays:
+            digest.update(repr((array.dtype.str, array.shape)).encode())
+            digest.update(np.ascontiguousarray(array).tobytes())
+        self.version = digest.hexdigest()[:12]
+
+    @classmethod
+    def from_frame(cls, df, model=None):
+        """Build the cube for every row of a frame.
+
+        With a ``RiskModel`` the rows are scored and the cube also carries
+        the risk measures (see ``CubeSlice.predicted_risk``).
+        """
+        measures = None
+        if model is not None:
+            measures = risk_measures(model.predict_proba(df), model.threshold)
+        return cls.from_dataset(Dataset.from_frame(df), measures=measures)
+
+    @classmethod
+    def from_dataset(cls, dataset, rows=None, measures=None):
+        """Build the cube with one bincount per measure.
+
+        ``rows`` restricts it to a selection vector of row ids. ``measures``
+        maps extra measure names to per-row values (aligned with the
+        dataset), summed per cell like the stress columns.
+        """
+        # Genders keep their order of appearance, like ``unique()``
+        genders, gender_lookup = dataset.gender_axis()
+        gender_codes = gender_lookup[dataset.category('Gender', rows)]
+
+        # City spelling fixes are already applied to the dictionary
+        cities = dataset.labels['City']
+        city_codes = dataset.category('City', rows).astype(np.int64)
+
+        age = dataset.numeric('Age', rows).astype(np.int64)
+        depression = dataset.numeric('Depression', rows).astype(np.int64)
+        if len(age):
+            ages = list(range(int(age.min()), int(age.max()) + 1))
+        else:
+            ages = list(range(int(dataset.values['Age'].min()),
+                              int(dataset.values['Age'].max()) + 1))
+        age_min = ages[0]
+
+        shape = (len(genders), len(ages), len(DEPRESSION_VALUES), len(cities))
+        n_cells = int(np.prod(shape))
+        cell = np.ravel_multi_index(
+            (gender_codes, age - age_min, depression, city_codes), shape)
+
+        counts = np.bincount(cell, minlength=n_cells).reshape(shape)
+
+        breakdowns = {}
+        for column in BREAKDOWN_COLUMNS:
+            labels = dataset.labels[column]
+            codes = dataset.category(column, rows).astype(np.int64)
+            valid = codes >= 0
+            k = len(labels)
+            table = np.bincount(cell[valid] * k + codes[valid],
+                                minlength=n_cells * k)
+            breakdowns[column] = (labels, table.reshape(shape + (k,)))
+
+        # Scores are broken down by level, labelled with the integer score
+        for column in LEVEL_COLUMNS:
+            values = np.asarray(dataset.numeric(column, rows), dtype=np.float64)
+            valid = ~np.isnan(values)
+            levels = values[valid].astype(np.int64)
+            lo = int(levels.min()) if len(levels) else 0
+            k = int(levels.max()) - lo + 1 if len(levels) else 0
+            table = np.bincount(cell[valid] * k + levels - lo, minlength=n_cells * k)
+            breakdowns[column] = (list(range(lo, lo + k)), table.reshape(shape + (k,)))
+
+        columns = {column: dataset.numeric(column, rows) for column in MEAN_COLUMNS}
+        for name, values in (measures or {}).items():
+            columns[name] = values if rows is None else values[rows]
+
+        sums = {}
+        nonnull = {}
+        for column, values in columns.items():
+            values = np.asarray(values, dtype=np.float64)
+            valid = ~np.isnan(values)
+            sums[column] = np.bincount(
+                cell[valid], weights=values[valid], minlength=n_cells).reshape(shape)
+            nonnull[column] = np.bincount(
+                cell[valid], minlength=n_cells).reshape(shape)
+
+        return cls(genders, ages, cities, counts, breakdowns, sums, nonnull)
+
+    def merge(self, other):
+        """Return a cube holding the rows of both cubes.
+
+        Cubes are plain sums, so partial cubes built from chunks or
+        partitions merge exactly; axes are aligned on the union of labels.
+        """
+        genders = self.genders + [g for g in other.genders if g not in self.genders]
+        cities = sorted(set(self.cities) | set(other.cities))
+        ages = list(range(min(self.ages[0], other.ages[0]),
+                          max(self.ages[-1], other.ages[-1]) + 1))
+        gender_pos = {g: i for i, g in enumerate(genders)}
+        city_pos = {c: i for i, c in enumerate(cities)}
+
+        def align(cube, array, labels=None, label_pos=None):
+            index = [
+                [gender_pos[g] for g in cube.genders],
+                [a - ages[0] for a in cube.ages],
+                list(range(len(DEPRESSION_VALUES))),
+                [city_pos[c] for c in cube.cities]
+            ]
+            shape = (len(genders), len(ages), len(DEPRESSION_VALUES), len(cities))
+            if labels is not None:
+                index.append([label_pos[label] for label in labels])
+                shape += (len(label_pos),)
+            out = np.zeros(shape, dtype=array.dtype)
+            out[np.ix_(*index)] = array
+            return out
+
+        counts = align(self, self.counts) + align(other, other.counts)
+
+        breakdowns = {}
+        for column in BREAKDOWN_COLUMNS + LEVEL_COLUMNS:
+            labels_a, table_a = self.breakdowns[column]
+            labels_b, table_b = other.breakdowns[column]
+            labels = sorted(set(labels_a) | set(labels_b))
+            label_pos = {label: i for i, label in enumerate(labels)}
+            breakdowns[column] = (labels,
+                                  align(self, table_a, labels_a, label_pos)
+                                  + align(other, table_b, labels_b, label_pos))
+
+        # Measures only one side carries (e.g. risk scores) are dropped
+        measures = [column for column in self.sums if column in other.sums]
+        sums = {column: align(self, self.sums[column]) + align(other, other.sums[column])
+                for column in measures}
+        nonnull = {column: align(self, self.nonnull[column])
+                   + align(other, other.nonnull[column])
+                   for column in measures}
+
+        return FilterCube(genders, ages, cities, counts, breakdowns, sums, nonnull)
+
+    def reorder_genders(self, genders):
+        """Return the cube with its gender axis in the order of ``genders``.
+
+        Merged partials list genders in the order the partials met them;
+        this restores the order of the whole dataset. Raises ``ValueError``
+        unless ``genders`` holds exactly the cube's genders.
+        """
+        if sorted(genders) != sorted(self.genders):
+            raise ValueError(f"expected the genders {self.genders}, got {list(genders)}")
+        order = np.array([self.genders.index(g) for g in genders], dtype=np.intp)
+
+        def take(array):
+            return np.take(array, order, axis=0)
+
+        return FilterCube(
+            list(genders), self.ages, self.cities, take(self.counts),
+            {name: (labels, take(table)) for name, (labels, table) in self.breakdowns.items()},
+            {name: take(table) for name, table in self.sums.items()},
+            {name: take(table) for name, table in self.nonnull.items()}
+        )
+
+    def slice(self, genders=None, age_range=None, depression=None, city=None):
+        """Select the cells matching the sidebar filters.
+
+        ``genders`` is a list of labels (empty or None keeps every gender),
+        ``age_range`` an inclusive (min, max) tuple, ``depression`` 0, 1 or
+        None, and ``city`` a label or None/"All".
+        """
+        if genders:
+            wanted = set(genders)
+            gender_idx = [i for i, g in enumerate(self.genders) if g in wanted]
+        else:
+            gender_idx = list(range(len(self.genders)))
+
+        age_min = self.ages[0]
+        if age_range is None:
+            age_idx = list(range(len(self.ages)))
+        else:
+            lo = max(int(age_range[0]) - age_min, 0)
+            hi = min(int(age_range[1]) - age_min, len(self.ages) - 1)
+            age_idx = list(range(lo, hi + 1))
+
+        if depression is None:
+            depression_idx = list(range(len(DEPRESSION_VALUES)))
+        else:
+            depression_idx = [DEPRESSION_VALUES.index(depression)]
+
+        if city is None or city == 'All':
+            city_idx = list(range(len(self.cities)))
+        else:
+            city_idx = [i for i, c in enumerate(self.cities) if c == city]
+
+        depression_mask = np.isin(range(len(DEPRESSION_VALUES)), depression_idx)
+
+        def contiguous(idx):
+            return bool(idx) and idx == list(range(idx[0], idx[-1] + 1))
+
+        def take(array):
+            # Contiguous selections are views of the (read-only) cube, so an
+            # unfiltered axis costs nothing; only scattered picks are copied
+            out = array
+            for axis, idx in ((0, gender_idx), (1, age_idx), (3, city_idx)):
+                if contiguous(idx):
+                    out = out[(slice(None),) * axis + (slice(idx[0], idx[-1] + 1),)]
+                else:
+                    out = np.take(out, np.asarray(idx, dtype=np.intp), axis=axis)
+            # Keep the depression axis full-length so labels stay aligned
+            if not depression_mask.all():
+                out = out * depression_mask.reshape((1, 1, -1, 1) + (1,) * (out.ndim - 4))
+            return out
+
+        return CubeSlice(
+            genders=[self.genders[i] for i in gender_idx],
+            ages=[self.ages[i] for i in age_idx],
+            cities=[self.cities[i] for i in city_idx],
+            counts=take(self.counts),
+            breakdowns={name: (labels, take(table))
+                        for name, (labels, table) in self.breakdowns.items()},
+            sums={name: take(table) for name, table in self.sums.items()},
+            nonnull={name: take(table) for name, table in self.nonnull.items()}
+        )
+
+
+class CubeSlice:
+    """A filtered block of the cube, reduced on demand for each chart."""
+
+    def __init__(self, genders, ages, cities, counts, breakdowns, sums, nonnull):
+        self.genders = genders
+        self.ages = ages
+        self.cities = cities
+        self.counts = counts
+        self.breakdowns = breakdowns
+        self.sums = sums
+        self.nonnull = nonnull
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def by_depression(self):
+        """Row counts per depression value (0, 1)."""
+        return self.counts.sum(axis=(0, 1, 3))
+
+    def by_gender(self):
+        """Gender counts, largest first, like ``value_counts``."""
+        counts = pd.Series(self.counts.sum(axis=(1, 2, 3)), index=self.genders)
+        counts = counts[counts > 0]
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def by_age_group(self):
+        """Counts per age group, in age order, including empty groups."""
+        per_age = self.counts.sum(axis=(0, 2, 3))
+        groups = pd.cut(pd.Series(self.ages, dtype='int64'), bins=AGE_BINS,
+                        labels=AGE_LABELS, include_lowest=True)
+        totals = pd.Series(per_age, index=groups).groupby(level=0, observed=False).sum()
+        return totals.reindex(AGE_LABELS, fill_value=0)
+
+    def kpis(self, top_n=TOP_CITIES):
+        """KPI tiles and city ranking, in the same form as ``compute_kpis``."""
+        return summarize(
+            total_students=float(self.counts.sum()),
+            depression_cases=self.by_depression()[1],
+            high_risk=self.count_where('Suicidal thoughts', 'Yes', depression=1),
+            depressed_with_history=self.count_where(
+                'Family History of Mental Illness', 'Yes', depression=1),
+            ranking=city_ranking(
+                self.cities, self.counts[:, :, 1, :].sum(axis=(0, 1)), top_n)
+        )
+
+    def predicted_risk(self):
+        """Students the model flags and their mean risk; None without a model."""
+        if PREDICTED_HIGH_RISK not in self.sums:
+            return None
+        scored = int(self.nonnull[RISK_SCORE].sum())
+        return {
+            'predicted_high_risk': int(round(float(self.sums[PREDICTED_HIGH_RISK].sum()))),
+            'mean_risk': float(self.sums[RISK_SCORE].sum()) / scored if scored else np.nan
+        }
+
+    def count_where(self, column, label, depression=None):
+        """Rows with ``column == label``, optionally for one depression value."""
+        labels, table = self.breakdowns[column]
+        if label not in labels:
+            return 0
+        table = table[..., labels.index(label)]
+        if depression is not None:
+            table = table[:, :, DEPRESSION_VALUES.index(depression)]
+        return int(round(float(table.sum())))
+
+    def breakdown(self, column, display=False):
+        """Long frame of (column, Depression, Count) with non-empty groups only.
+
+        Matches ``groupby([column, 'Depression']).size()`` on the filtered rows.
+        ``display`` swaps in the chart labels from ``DISPLAY_LABELS``.
+        """
+        labels, table = self.breakdowns[column]
+        if display:
+            labels = display_labels(column, labels)
+        counts = table.sum(axis=(0, 1, 3))  # (depression, category)
+        frame = pd.DataFrame({
+            column: np.repeat(labels, len(DEPRESSION_VALUES)),
+            'Depression': np.tile(DEPRESSION_VALUES, len(labels)),
+            'Count': counts.T.ravel()
+        })
+        return frame[frame['Count'] > 0].reset_index(drop=True)
+
+    def means(self):
+        """Per-depression means of the stress columns, present groups only.
+
+        Matches ``groupby('Depression')[MEAN_COLUMNS].mean()``.
+        """
+        present = self.by_depression() > 0
+        frame = pd.DataFrame({'Depression': DEPRESSION_VALUES})
+        for column in MEAN_COLUMNS:
+            total = self.sums[column].sum(axis=(0, 1, 3))
+            n = self.nonnull[column].sum(axis=(0, 1, 3))
+            with np.errstate(invalid='ignore', divide='ignore'):
+                frame[column] = np.where(n > 0, total / np.maximum(n, 1), np.nan)
+        return frame[present].reset_index(drop=True)
@@ -0,0 +1,177 @@
+"""Immutable, code-based view of the survey data.
+
+Categorical columns are held as read-only integer codes plus a small
+dictionary of labels; numeric columns as read-only arrays. Spelling fixes
+(the city fixes from the cleaning rules, the quoted sleep labels) are
+applied once to the dictionaries, so no per-row string work happens after
+load. Filters produce a single selection vector of row ids through the
+bitmap index, and consumers gather only the columns they need for those
+rows.
+"""
+import numpy as np
+import pandas as pd
+
+from analytics.bitmap import BitmapIndex
+from analytics.cleaning import CITY_FIXES
+
+# Columns broken down by category in the charts and KPIs
+BREAKDOWN_COLUMNS = [
+    'Degree_Level',
+    'Family History of Mental Illness',
+    'Sleep Duration',
+    'Dietary Habits',
+    'Suicidal thoughts'
+]
+
+# Columns averaged per depression status in the stress chart
+MEAN_COLUMNS = [
+    'Academic Pressure',
+    'Financial Stress'
+]
+
+# Integer scores, also broken down by level for the association statistics
+LEVEL_COLUMNS = MEAN_COLUMNS
+
+CATEGORY_COLUMNS = ['Gender', 'City'] + BREAKDOWN_COLUMNS
+NUMERIC_COLUMNS = ['Age', 'Depression'] + MEAN_COLUMNS
+
+# Spelling fixes applied to the category dictionaries at load time, so
+# extracts cleaned before a fix was added still display correctly
+LABEL_FIXES = {
+    'City': CITY_FIXES
+}
+
+# Chart labels, looked up per dictionary entry when a breakdown is drawn
+DISPLAY_LABELS = {
+    'Sleep Duration': {
+        '5-6 hours': '5-6 hrs',
+        '7-8 hours': '7-8 hrs',
+        'Less than 5 hours': '< 5 hrs',
+        'More than 8 hours': '> 8 hrs',
+        'Others': 'Others'
+    },
+    'Family History of Mental Illness': {
+        'Yes': 'With F. History',
+        'No': 'No F. History'
+    }
+}
+
+
+def _fix_label(column, label):
+    # The export quotes some labels, e.g. "'5-6 hours'"
+    label = str(label).strip("'")
+    return LABEL_FIXES.get(column, {}).get(label, label)
+
+
+def _read_only(array):
+    # A view, so the frame the data came from stays untouched
+    array = np.asarray(array).view()
+    array.flags.writeable = False
+    return array
+
+
+def _encode(column, series):
+    """Codes and sorted, de-duplicated labels with the fixes applied."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, labels = series.cat.codes.to_numpy(), list(series.cat.categories)
+    else:
+        codes, labels = pd.factorize(series, sort=True)
+        labels = list(labels)
+
+    fixed = [_fix_label(column, label) for label in labels]
+    unique = sorted(set(fixed))
+    remap = np.array([unique.index(label) for label in fixed] + [-1])
+    if not np.array_equal(remap[:-1], np.arange(len(labels))):
+        # One vectorized gather at load time; -1 (missing) stays -1
+        codes = remap[codes]
+    dtype = np.int8 if len(unique) < 127 else np.int32
+    return codes.astype(dtype, copy=False), unique
+
+
+def first_appearance(codes, labels):
+    """Labels in order of first appearance in ``codes``, like ``unique()``.
+
+    Labels no row uses follow, in dictionary order.
+    """
+    first = {}
+    for code in range(len(labels)):
+        matches = codes == code
+        if matches.any():
+            first[code] = int(matches.argmax())
+    order = [labels[code] for code in sorted(first, key=first.get)]
+    return order + [label for label in labels if label not in order]
+
+
+def frame_gender_order(df):
+    """``Dataset.gender_order`` of a frame, encoding only its Gender column."""
+    return first_appearance(*_encode('Gender', df['Gender']))
+
+
+class Dataset:
+    """Read-only codes, dictionaries and numeric arrays for the dashboard."""
+
+    def __init__(self, n_rows, codes, labels, values):
+        self.n_rows = n_rows
+        self.codes = codes
+        self.labels = labels
+        self.values = values
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, df):
+        codes = {}
+        labels = {}
+        for column in CATEGORY_COLUMNS:
+            column_codes, labels[column] = _encode(column, df[column])
+            codes[column] = _read_only(column_codes)
+        values = {column: _read_only(pd.to_numeric(df[column], errors='coerce').to_numpy())
+                  for column in NUMERIC_COLUMNS}
+        return cls(len(df), codes, labels, values)
+
+    def gender_order(self):
+        """Gender labels in order of first appearance, then any unused ones."""
+        return first_appearance(self.codes['Gender'], self.labels['Gender'])
+
+    def gender_axis(self):
+        """Gender labels in ``gender_order`` and a code -> position lookup.
+
+        The lookup has a trailing -1, so it also maps the missing code -1.
+        Cubes and sample strata share this axis.
+        """
+        genders = self.gender_order()
+        lookup = np.array([genders.index(g) for g in self.labels['Gender']] + [-1])
+        return genders, lookup
+
+    @property
+    def index(self):
+        """Bitmap index over the filter columns, built on first use."""
+        if self._index is None:
+            self._index = BitmapIndex.from_arrays(
+                gender=(self.codes['Gender'], self.labels['Gender']),
+                city=(self.codes['City'], self.labels['City']),
+                depression=self.values['Depression'],
+                age=self.values['Age']
+            )
+        return self._index
+
+    def select(self, genders=None, age_range=None, depression=None, city=None):
+        """Selection vector (row ids) for the sidebar filters.
+
+        Arguments follow ``FilterCube.slice`` / ``FilterState``.
+        """
+        return self.index.select(genders, age_range, depression, city).row_ids()
+
+    def category(self, column, rows=None):
+        """Codes for ``column``, gathered for ``rows`` when given."""
+        codes = self.codes[column]
+        return codes if rows is None else codes[rows]
+
+    def numeric(self, column, rows=None):
+        values = self.values[column]
+        return values if rows is None else values[rows]
+
+
+def display_labels(column, labels):
+    """Chart labels for a dictionary (a handful of entries, not rows)."""
+    mapping = DISPLAY_LABELS.get(column, {})
+    return [mapping.get(label, label) for label in labels]
@@ -0,0 +1,175 @@
+"""Threshold analytics for the risk model, precomputed once per model version.
+
+The notebook recomputes ``roc_curve``, precision and recall from the raw
+scores for every evaluation. Everything they need is in one table: the
+scores sorted within each group, next to a running count of positives. The
+students flagged at threshold ``t`` are then the tail of each group from
+the first score >= ``t``. One ``searchsorted`` finds that position, and two
+lookups in the running count give the true and false positives, so any
+threshold's confusion matrix costs O(log n).
+
+A ``ThresholdTable`` keeps one such table per slice label (a gender, a
+city, or a (gender, age, city) cell). Groups are laid out end to end in one
+array, with each score offset by its group so that the groups do not
+overlap. One vectorized ``searchsorted`` then answers every group at
+once, and a slice made of many cells is the sum over its groups.
+"""
+import numpy as np
+import pandas as pd
+
+# Columns with a per-label table by default
+SLICE_COLUMNS = ['Gender', 'City', 'Degree_Level']
+
+# The sidebar's filter columns; metrics for any filter state sum its cells
+FILTER_SLICE = ('Gender', 'Age', 'City')
+
+
+def _group_codes(frame, columns):
+    """Group codes and a labels frame (one row per group) for ``columns``."""
+    columns = list(columns)
+    keys = pd.MultiIndex.from_frame(frame[columns].astype(object))
+    codes, uniques = pd.factorize(keys, sort=True)
+    return codes, uniques.to_frame(index=False, name=columns)
+
+
+def confusion_metrics(tp, fp, fn, tn):
+    """Metrics from confusion counts; undefined ratios are NaN."""
+    tp, fp, fn, tn = (np.asarray(count, dtype=np.int64) for count in (tp, fp, fn, tn))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+            'flagged': tp + fp,
+            'precision': tp / (tp + fp),
+            'recall': tp / (tp + fn),
+            'fpr': fp / (fp + tn),
+            'accuracy': (tp + tn) / (tp + fp + fn + tn)
+        }
+
+
+class ThresholdTable:
+    """Sorted scores and running positive counts, grouped by slice label."""
+
+    def __init__(self, keys, cum_pos, bounds, offset, span, labels):
+        # Scores sorted within groups, shifted by group * span so they stay apart
+        self.keys = keys
+        # Positives among the first i sorted rows (length n + 1)
+        self.cum_pos = cum_pos
+        # Group g occupies keys[bounds[g]:bounds[g + 1]]
+        self.bounds = bounds
+        self.offset = offset
+        self.span = span
+        # One row per group, one column per slice column
+        self.labels = labels
+        for array in (keys, cum_pos, bounds):
+            array.flags.writeable = False
+
+    @classmethod
+    def build(cls, scores, y_true, frame=None, columns=()):
+        """Table over ``scores`` and 0/1 ``y_true``, grouped by ``columns``.
+
+        Without columns, everything is one group.
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        y_true = np.asarray(y_true) == 1
+        if columns:
+            codes, labels = _group_codes(frame, columns)
+        else:
+            codes, labels = np.zeros(len(scores), dtype=np.int64), pd.DataFrame(index=[0])
+        offset = float(scores.min()) if len(scores) else 0.0
+        span = (float(scores.max()) - offset if len(scores) else 0.0) + 1.0
+
+        order = np.lexsort((scores, codes))
+        sorted_codes = codes[order]
+        keys = sorted_codes * span + (scores[order] - offset)
+        cum_pos = np.concatenate([[0], np.cumsum(y_true[order], dtype=np.int64)])
+        bounds = np.searchsorted(sorted_codes, np.arange(len(labels) + 1))
+        return cls(keys, cum_pos, bounds, offset, span, labels)
+
+    def counts(self, threshold, groups=None):
+        """(tp, fp, fn, tn) arrays per group for ``score >= threshold``.
+
+        ``groups`` is a boolean mask or index array over ``labels``.
+        """
+        lo, hi = self.bounds[:-1], self.bounds[1:]
+        if groups is not None:
+            lo, hi = lo[groups], hi[groups]
+            group_ids = np.arange(len(self.labels))[groups]
+        else:
+            group_ids = np.arange(len(self.labels))
+        start = np.searchsorted(self.keys, group_ids * self.span + (threshold - self.offset))
+        start = np.clip(start, lo, hi)
+        positives = self.cum_pos[hi] - self.cum_pos[lo]
+        tp = self.cum_pos[hi] - self.cum_pos[start]
+        fp = (hi - start) - tp
+        return tp, fp, positives - tp, (hi - lo) - positives - fp
+
+    def total(self, threshold, groups=None):
+        """Confusion counts summed over the selected groups."""
+        return tuple(int(count.sum()) for count in self.counts(threshold, groups))
+
+
+class Evaluation:
+    """Threshold tables for one model version, overall and per slice."""
+
+    def __init__(self, overall, slices, version=None):
+        self.overall = overall
+        self.slices = slices
+        self.version = version
+
+    @classmethod
+    def build(cls, scores, y_true, frame, slices=(*SLICE_COLUMNS, FILTER_SLICE), version=None):
+        """Tables for ``scores`` against ``y_true``; ``frame`` holds the slice columns.
+
+        Each entry of ``slices`` is a column, or a tuple of columns for cells.
+        """
+        tables = {}
+        for spec in slices:
+            columns = spec if isinstance(spec, tuple) else (spec,)
+            tables[spec] = ThresholdTable.build(scores, y_true, frame, columns)
+        return cls(ThresholdTable.build(scores, y_true), tables, version)
+
+    def metrics(self, threshold, slice_by=None, groups=None):
+        """Confusion counts and metrics at ``threshold``, overall or for some groups."""
+        table = self.overall if slice_by is None else self.slices[slice_by]
+        metrics = confusion_metrics(*table.total(threshold, groups))
+        return {name: value.item() for name, value in metrics.items()}
+
+    def by_slice(self, threshold, slice_by):
+        """One row of metrics per label of a slice."""
+        table = self.slices[slice_by]
+        metrics = pd.DataFrame(confusion_metrics(*table.counts(threshold)))
+        return pd.concat([table.labels, metrics], axis=1)
+
+    def filter_groups(self, genders=None, age_range=None, city=None):
+        """Mask over the ``FILTER_SLICE`` cells selected by the sidebar filters.
+
+        Arguments follow ``FilterCube.slice``; depression is the label being
+        predicted, so it is not a filter here.
+        """
+        labels = self.slices[FILTER_SLICE].labels
+        mask = np.ones(len(labels), dtype=bool)
+        if genders:
+            mask &= labels['Gender'].isin(list(genders)).to_numpy()
+        if age_range is not None:
+            mask &= labels['Age'].between(*age_range).to_numpy()
+        if city is not None and city != 'All':
+            mask &= (labels['City'] == city).to_numpy()
+        return mask
+
+    def roc(self):
+        """(fpr, tpr, thresholds) at every distinct score, highest threshold first."""
+        table = self.overall
+        scores = table.keys + table.offset
+        # Each distinct score's first position flags it and everything above
+        distinct = np.flatnonzero(np.r_[True, scores[1:] != scores[:-1]])[::-1]
+        n = len(scores)
+        positives = int(table.cum_pos[-1])
+        tp = positives - table.cum_pos[distinct]
+        fp = (n - distinct) - tp
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (np.r_[0.0, fp / (n - positives)], np.r_[0.0, tp / positives],
+                    np.r_[np.inf, scores[distinct]])
+
+    def auc(self):
+        fpr, tpr, _ = self.roc()
+        return float(np.trapezoid(tpr, fpr))
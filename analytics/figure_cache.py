@@ -0,0 +1,92 @@
+"""Process-wide LRU cache of serialized dashboard figures.
+
+Entries are the plotly JSON of a single chart, keyed by the chart name and
+a fingerprint of the aggregate it draws, so a filter change only rebuilds
+the charts whose data actually moved. The cache is bounded by both entry
+count and total JSON size, is safe to share between Streamlit sessions
+(script threads), and keeps hit, miss and eviction counters.
+"""
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    """Bounded LRU of figure JSON strings."""
+
+    def __init__(self, max_entries=512, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def __contains__(self, key):
+        # Membership only: no LRU touch and no hit or miss counted
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, spec):
+        size = len(spec)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = spec
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def get_or_build(self, key, build):
+        """Return cached figure JSON for ``key``, calling ``build()`` on a miss.
+
+        ``build`` returns a plotly Figure, which is serialized once and
+        stored as a JSON string.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        spec = build().to_json()
+        self.put(key, spec)
+        return spec
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
+
+
+def load_figure(spec):
+    """Turn cached figure JSON back into a figure for ``st.plotly_chart``."""
+    # Imported here so the cache itself can be used without plotly
+    import plotly.io as pio
+    return pio.from_json(spec, skip_invalid=True)
@@ -0,0 +1,56 @@
+"""Normalized sidebar filter state.
+
+Different widget states can select the same rows (no gender ticked and every
+gender ticked, the full age range and no range). ``normalize`` folds them
+into one hashable ``FilterState`` so caches see a single key.
+"""
+from collections import namedtuple
+
+FilterState = namedtuple('FilterState', ['genders', 'age_range', 'depression', 'city'])
+
+# The cities the sidebar offers, in menu order ("All" comes first)
+CITIES = [
+    "Agra", "Ahmedabad", "Bangalore", "Bhopal", "Chennai", "Delhi", "Faridabad",
+    "Ghaziabad", "Hyderabad", "Indore", "Jaipur", "Kalyan", "Kanpur", "Kolkata",
+    "Lucknow", "Ludhiana", "Meerut", "Mumbai", "Nagpur", "Nashik", "Patna", "Pune",
+    "Rajkot", "Srinagar", "Surat", "Thane", "Vadodara", "Varanasi", "Vasai-Virar",
+    "Visakhapatnam"
+]
+
+DEPRESSION_OPTIONS = {
+    "All": None,
+    "With Depression": 1,
+    "Without Depression": 0
+}
+
+
+def normalize(genders, age_range, depression, city, all_genders=(), age_bounds=None):
+    """Build a canonical ``FilterState`` from raw widget values.
+
+    ``depression`` may be a radio label or 0/1/None; ``city`` "All" or None
+    means every city. ``all_genders`` and ``age_bounds`` describe the data so
+    "everything selected" collapses to "no filter".
+    """
+    genders = tuple(sorted(str(g) for g in genders or ()))
+    everyone = {str(g) for g in all_genders or ()}
+    if everyone and set(genders) >= everyone:
+        genders = ()
+
+    if age_range is not None:
+        lo, hi = int(age_range[0]), int(age_range[1])
+        if age_bounds is not None:
+            lo, hi = max(lo, age_bounds[0]), min(hi, age_bounds[1])
+            if (lo, hi) == tuple(age_bounds):
+                age_range = None
+            else:
+                age_range = (lo, hi)
+        else:
+            age_range = (lo, hi)
+
+    if isinstance(depression, str):
+        depression = DEPRESSION_OPTIONS[depression]
+
+    if city == 'All':
+        city = None
+
+    return FilterState(genders, age_range, depression, city)
@@ -0,0 +1,113 @@
+"""Append-only ingestion of new survey batches.
+
+Usage (from the repository root):
+
+    python -m analytics.ingest batch_2025_06_01.csv [more.csv ...] [--store ingested]
+
+``ingest_batch`` validates a raw export and cleans it with the notebook rules
+(``analytics.cleaning``). It applies the dashboard schema and writes the
+result as a new Feather partition in the store directory. Partitions are
+never rewritten, and a batch whose contents were already ingested is
+skipped.
+
+``LiveCube`` keeps the dashboard cube current without reloading anything.
+``refresh`` builds a cube for each partition it has not seen yet and merges
+it into the running total, so a new batch costs a cube build over just its
+own rows. Given the dashboard's ``RiskModel``, new partitions are scored as
+they are merged, so the risk measures cover every batch. ``partitions``
+lists what has been merged, and ``with_partitions`` appends those rows to
+the extract for the row-level structures (dataset, risk scores, threshold
+tables) that the cube does not replace.
+"""
+import argparse
+import glob
+import os
+import threading
+
+import pandas as pd
+
+from analytics.cleaning import clean, read_raw
+from analytics.cube import FilterCube
+from analytics.storage import apply_schema, file_hash, read_feather, write_feather
+
+INGEST_DIR = 'ingested'
+
+
+def partition_paths(store_dir=INGEST_DIR):
+    """Partition files in ingestion order."""
+    return sorted(glob.glob(os.path.join(store_dir, 'part-*.feather')))
+
+
+def ingest_batch(csv_path, store_dir=INGEST_DIR):
+    """Clean ``csv_path`` into a new partition; return its path.
+
+    Returns None when a batch with the same contents was already ingested.
+    Raises ``ValueError`` if the batch does not have the raw export schema,
+    or if a row the cleaning rules keep has a blank label or a value out of
+    range (see ``analytics.cleaning.validate``); nothing is written then.
+    """
+    digest = file_hash(csv_path)
+    existing = partition_paths(store_dir)
+    if any(os.path.basename(path).endswith(f'-{digest[:16]}.feather') for path in existing):
+        return None
+
+    df = apply_schema(clean(read_raw(csv_path)))
+    path = os.path.join(store_dir, f'part-{len(existing):06d}-{digest[:16]}.feather')
+    write_feather(df, path, {'source': os.path.basename(csv_path),
+                             'sha256': digest, 'rows': len(df)})
+    return path
+
+
+def with_partitions(df, paths):
+    """``df`` with the rows of the partitions at ``paths`` appended, in order."""
+    if not paths:
+        return df
+    frames = [df] + [read_feather(path)[0] for path in paths]
+    # Categories differ between partitions; the schema re-categorizes them
+    return apply_schema(pd.concat(frames, ignore_index=True))
+
+
+class LiveCube:
+    """The base cube plus every ingested partition, updated by deltas."""
+
+    def __init__(self, base, store_dir=INGEST_DIR, model=None):
+        self.cube = base
+        self.store_dir = store_dir
+        self.model = model
+        self.applied = set()
+        # Paths of the merged partitions, in the order they were merged
+        self.partitions = ()
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Merge partitions that appeared since the last call; return the cube."""
+        with self._lock:
+            for path in partition_paths(self.store_dir):
+                name = os.path.basename(path)
+                if name in self.applied:
+                    continue
+                df, _ = read_feather(path)
+                if len(df):
+                    self.cube = self.cube.merge(FilterCube.from_frame(df, self.model))
+                self.applied.add(name)
+                self.partitions += (path,)
+            return self.cube
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('batches', nargs='+', help='raw survey export CSVs')
+    parser.add_argument('--store', default=INGEST_DIR, help='partition directory')
+    args = parser.parse_args()
+
+    for csv_path in args.batches:
+        path = ingest_batch(csv_path, args.store)
+        if path is None:
+            print(f"{csv_path}: already ingested, skipped")
+        else:
+            rows = read_feather(path)[1]['rows']
+            print(f"{csv_path}: {rows:,} rows -> {path}")
+
+
+if __name__ == '__main__':
+    main()
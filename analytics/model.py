@@ -0,0 +1,141 @@
+"""The depression classifier from ``IP_SD_Model.ipynb``: training and export.
+
+Usage (from the repository root):
+
+    python -m analytics.model IP_Student_Depression.csv models/risk_model.json
+
+Fits the notebook's preprocessing and logistic regression on the notebook's
+70/15/15 stratified split and reports validation and test metrics. The
+fitted pipeline is then written as a ``RiskModel`` (``analytics.scoring``).
+Training needs scikit-learn; scoring with the exported file does not, and
+neither does importing the feature lists below, so scikit-learn is only
+imported by the functions that use it.
+"""
+import argparse
+
+from analytics.scoring import RiskModel
+from analytics.storage import read_survey
+
+TARGET = 'Depression'
+RANDOM_STATE = 42
+
+ONE_HOT_FEATURES = [
+    'Gender',
+    'Dietary Habits',
+    'Suicidal thoughts',
+    'Degree_Level',
+    'Family History of Mental Illness'
+]
+
+MINMAX_FEATURES = [
+    'Age',
+    'CGPA'
+]
+
+# Ordinal features, used as they are
+PASSTHROUGH_FEATURES = [
+    'Academic Pressure',
+    'Study Satisfaction',
+    'Financial Stress'
+]
+
+SLEEP_FEATURES = ['Sleep_Hours']
+
+FEATURES = ONE_HOT_FEATURES + MINMAX_FEATURES + PASSTHROUGH_FEATURES + SLEEP_FEATURES
+
+
+def build_preprocessor():
+    """The notebook's ColumnTransformer, unfitted."""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+    # Sleep hours: impute with the training mode, then scale
+    sleep_pipeline = Pipeline([
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('scaler', MinMaxScaler())
+    ])
+    return ColumnTransformer(
+        transformers=[
+            ('onehot', OneHotEncoder(handle_unknown='ignore'), ONE_HOT_FEATURES),
+            ('minmax', MinMaxScaler(), MINMAX_FEATURES),
+            ('passthrough', 'passthrough', PASSTHROUGH_FEATURES),
+            ('sleep', sleep_pipeline, SLEEP_FEATURES)
+        ]
+    )
+
+
+def build_pipeline():
+    """Preprocessing plus the notebook's logistic regression, unfitted."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    return Pipeline([
+        ('preprocessing', build_preprocessor()),
+        ('logreg', LogisticRegression(max_iter=1000, solver='liblinear'))
+    ])
+
+
+def split(df, random_state=RANDOM_STATE):
+    """Train, validation and test frames (70/15/15, stratified on the target)."""
+    from sklearn.model_selection import train_test_split
+
+    train_df, temp_df = train_test_split(
+        df, test_size=0.30, random_state=random_state, stratify=df[TARGET])
+    valid_df, test_df = train_test_split(
+        temp_df, test_size=0.50, random_state=random_state, stratify=temp_df[TARGET])
+    return train_df, valid_df, test_df
+
+
+def evaluate(model, df):
+    """AUC, precision and recall of a fitted pipeline or ``RiskModel``."""
+    from sklearn.metrics import precision_score, recall_score, roc_auc_score
+
+    y_true = df[TARGET].to_numpy()
+    y_prob = model.predict_proba(df[FEATURES])
+    if y_prob.ndim == 2:
+        y_prob = y_prob[:, 1]
+    y_pred = (y_prob >= 0.5).astype(int)
+    return {
+        'auc': roc_auc_score(y_true, y_prob),
+        'precision': precision_score(y_true, y_pred),
+        'recall': recall_score(y_true, y_pred)
+    }
+
+
+def train(df, random_state=RANDOM_STATE):
+    """Fit the notebook pipeline; return it with its (train, valid, test) split."""
+    splits = split(df, random_state)
+    train_df = splits[0]
+    pipeline = build_pipeline()
+    pipeline.fit(train_df[FEATURES], train_df[TARGET])
+    return pipeline, splits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv_path', help='cleaned survey extract')
+    parser.add_argument('model_path', help='exported model to write (JSON)')
+    args = parser.parse_args()
+
+    df = read_survey(args.csv_path)
+    pipeline, (train_df, valid_df, test_df) = train(df)
+    metrics = {name: evaluate(pipeline, part)
+               for name, part in (('valid', valid_df), ('test', test_df))}
+    model = RiskModel.from_pipeline(pipeline, metadata={
+        'source': args.csv_path,
+        'train_rows': len(train_df),
+        **{f'{name}_{key}': round(float(value), 4)
+           for name, values in metrics.items() for key, value in values.items()}
+    })
+    model.save(args.model_path)
+
+    for name, values in metrics.items():
+        print(f"{name:<5} AUC {values['auc']:.4f}  precision {values['precision']:.4f}  "
+              f"recall {values['recall']:.4f}")
+    print(f"wrote {args.model_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Partitioned, multi-core construction of the dashboard cube.
+
+The frame is split into partitions (by City by default, balanced on row
+count), each partition is aggregated into a partial ``FilterCube`` on an
+executor, and the partials are merged. Every KPI and chart groupby is served
+from the merged cube, so this parallelizes all of them at once.
+
+Executors are pluggable: ``'serial'``, ``'threads'`` or ``'processes'``, or
+any ``concurrent.futures.Executor`` instance.
+"""
+import functools
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analytics.cube import FilterCube
+from analytics.dataset import frame_gender_order
+
+EXECUTORS = ['serial', 'threads', 'processes']
+
+
+class SerialExecutor(Executor):
+    """Runs each task inline; the baseline and the safe default."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+def make_executor(kind='serial', workers=None):
+    """Create an executor by name; ``workers`` defaults to the CPU count."""
+    workers = workers or os.cpu_count() or 1
+    if kind == 'serial':
+        return SerialExecutor()
+    if kind == 'threads':
+        return ThreadPoolExecutor(max_workers=workers)
+    if kind == 'processes':
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"Unknown executor {kind!r}; expected one of {EXECUTORS}")
+
+
+def partition(df, n_parts, by='City'):
+    """Split ``df`` into at most ``n_parts`` frames.
+
+    With ``by`` set, whole groups are kept together and assigned greedily to
+    the lightest partition (largest groups first). With ``by=None`` the rows
+    are cut into contiguous, equal-sized ranges.
+    """
+    n_parts = max(1, min(n_parts, len(df)))
+    if by is None:
+        bounds = np.linspace(0, len(df), n_parts + 1).astype(int)
+        return [df.iloc[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+    codes, labels = pd.factorize(df[by], use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(labels))
+    loads = np.zeros(n_parts, dtype=np.int64)
+    assignment = np.empty(len(labels), dtype=np.int64)
+    for group in np.argsort(-sizes, kind='stable'):
+        target = int(np.argmin(loads))
+        assignment[group] = target
+        loads[target] += sizes[group]
+
+    part_of_row = assignment[codes]
+    order = np.argsort(part_of_row, kind='stable')
+    bounds = np.searchsorted(part_of_row[order], np.arange(n_parts + 1))
+    return [df.take(order[lo:hi]) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+
+def parallel_cube(df, executor='serial', workers=None, by='City', n_parts=None, model=None):
+    """Build the dashboard cube from partitions aggregated on ``executor``.
+
+    ``executor`` is a name from ``EXECUTORS`` or an existing executor, which
+    is left running for the caller to reuse. A ``RiskModel`` is shipped to
+    the workers, which score their own partitions. The gender axis follows
+    the whole frame, as in ``FilterCube.from_frame``, however it was split.
+    """
+    owned = isinstance(executor, str)
+    pool = make_executor(executor, workers) if owned else executor
+    n_parts = n_parts or workers or os.cpu_count() or 1
+    try:
+        partials = pool.map(functools.partial(FilterCube.from_frame, model=model),
+                            partition(df, n_parts, by=by))
+        cube = None
+        for partial in partials:
+            cube = partial if cube is None else cube.merge(partial)
+        if cube is None:
+            return None
+        # Partitions reorder the rows, so merging alone would list genders
+        # in whatever order the partials met them
+        return cube.reorder_genders(frame_gender_order(df))
+    finally:
+        if owned:
+            pool.shutdown()
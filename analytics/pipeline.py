@@ -0,0 +1,43 @@
+"""Headless version of the dashboard's compute path.
+
+``chart_data`` returns the aggregate behind each of the eight charts for a
+filtered slice, without building any figures. It is what the benchmark
+harness times and what non-Streamlit consumers reuse. ``fingerprint``
+hashes an aggregate so a chart can be cached on exactly the data it draws.
+"""
+import hashlib
+
+import pandas as pd
+
+# Chart names in page order: two charts per column, four columns
+CHART_NAMES = ['gender', 'stress', 'age', 'degree',
+               'family', 'sleep', 'cities', 'diet']
+
+# Column of 95% half-widths on approximate aggregates (see analytics.approximate)
+ERROR = 'Error'
+
+# Aggregate behind each chart, from a ``CubeSlice`` and (optionally) its KPIs
+CHART_AGGREGATES = {
+    'gender': lambda filtered, kpis: filtered.by_gender(),
+    'stress': lambda filtered, kpis: filtered.means(),
+    'age': lambda filtered, kpis: filtered.by_age_group(),
+    'degree': lambda filtered, kpis: filtered.breakdown('Degree_Level'),
+    'family': lambda filtered, kpis: filtered.breakdown(
+        'Family History of Mental Illness', display=True),
+    'sleep': lambda filtered, kpis: filtered.breakdown('Sleep Duration', display=True),
+    'cities': lambda filtered, kpis: (kpis or filtered.kpis())['city_ranking'],
+    'diet': lambda filtered, kpis: filtered.breakdown('Dietary Habits')
+}
+
+
+def chart_data(filtered, names=None, kpis=None):
+    """Aggregates for the named charts (all eight by default)."""
+    return {name: CHART_AGGREGATES[name](filtered, kpis) for name in names or CHART_NAMES}
+
+
+def fingerprint(data):
+    """Short content hash of a chart aggregate (Series or DataFrame)."""
+    labels = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+    digest = hashlib.sha1(repr(labels).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
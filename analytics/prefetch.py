@@ -0,0 +1,226 @@
+"""Speculative precomputation of the filter states a user is likely to pick next.
+
+Sidebar interaction is predictable: step to the next city in the list, flip
+the depression radio, nudge an age bound. After each render the dashboard
+hands its current state to ``Prefetcher.schedule``. The neighboring states
+are then computed on a small thread pool: slice, KPIs, chart aggregates
+with their fingerprints, risk factor associations, and the figure JSON in
+the shared ``FigureCache``. The next click then usually finds its view ready.
+
+A ``View`` computes each of its parts on first access, so a view built for
+a click that missed the cache costs only what the page reads, in the order
+it reads it: the top row of charts can paint before the rest is computed.
+
+Each scheduled ``Batch`` has a CPU budget, measured in worker-thread CPU
+seconds. Once that is spent, its remaining states are skipped. A session
+cancels its previous batch as soon as it reruns, so speculative work never
+competes with the click the user actually made. Views are kept in an LRU
+keyed by cube version and ``FilterState``, so ingested data invalidates them.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from analytics.associations import associations
+from analytics.charts import CHART_BUILDERS
+from analytics.filters import DEPRESSION_OPTIONS, normalize
+from analytics.pipeline import CHART_NAMES, chart_data, fingerprint
+
+DEFAULT_BUDGET = 0.5
+
+
+class View:
+    """Everything a rerun draws for one filter state, computed on first access.
+
+    Views are shared by sessions and the prefetch thread. Each part is a
+    pure function of the slice, so two threads computing the same part at
+    once just store equal values.
+    """
+
+    def __init__(self, filtered):
+        self.filtered = filtered
+        self._parts = {}
+
+    def _part(self, key, compute):
+        if key not in self._parts:
+            self._parts[key] = compute()
+        return self._parts[key]
+
+    def kpis(self):
+        return self._part('kpis', self.filtered.kpis)
+
+    def predicted_risk(self):
+        return self._part('predicted_risk', self.filtered.predicted_risk)
+
+    def chart(self, name):
+        """(aggregate, figure cache key) of one chart."""
+        def compute():
+            data = chart_data(self.filtered, [name], kpis=self.kpis())[name]
+            return data, (name, fingerprint(data))
+        return self._part(('chart', name), compute)
+
+    def associations(self):
+        return self._part('associations', lambda: associations(self.filtered))
+
+    def fill(self):
+        """Compute every part now; returns the view."""
+        self.kpis()
+        self.predicted_risk()
+        for name in CHART_NAMES:
+            self.chart(name)
+        self.associations()
+        return self
+
+
+def compute_view(cube, state):
+    """The fully computed ``View`` of ``cube`` for a ``FilterState``."""
+    return View(cube.slice(**state._asdict())).fill()
+
+
+def neighbors(cube, state, cities=None):
+    """Likely next states, most likely first.
+
+    The adjacent entries of ``cities`` (the sidebar's list, "All" first;
+    defaults to the cube's cities), the other depression options, then each
+    age bound moved by one year.
+    """
+    cities = list(cities or ['All', *cube.cities])
+    age_bounds = (cube.ages[0], cube.ages[-1])
+    lo, hi = state.age_range or age_bounds
+    current = cities.index(state.city or 'All') if (state.city or 'All') in cities else None
+
+    candidates = []
+    if current is not None:
+        candidates += [(state.genders, state.age_range, state.depression, cities[i])
+                       for i in (current + 1, current - 1) if 0 <= i < len(cities)]
+    candidates += [(state.genders, state.age_range, depression, state.city)
+                   for depression in DEPRESSION_OPTIONS.values() if depression != state.depression]
+    candidates += [(state.genders, (new_lo, new_hi), state.depression, state.city)
+                   for new_lo, new_hi in ((lo, hi + 1), (lo, hi - 1), (lo - 1, hi), (lo + 1, hi))
+                   if age_bounds[0] <= new_lo <= new_hi <= age_bounds[1]]
+
+    states = []
+    for genders, age_range, depression, city in candidates:
+        candidate = normalize(genders, age_range, depression, city,
+                              all_genders=cube.genders, age_bounds=age_bounds)
+        if candidate != state and candidate not in states:
+            states.append(candidate)
+    return states
+
+
+class Batch:
+    """Prefetch work scheduled after one render; cancel it when the user moves on."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.cpu_seconds = 0.0
+        self.futures = []
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def exhausted(self):
+        with self._lock:
+            return self.cpu_seconds >= self.budget
+
+    def charge(self, seconds):
+        with self._lock:
+            self.cpu_seconds += seconds
+
+    def cancel(self):
+        self._cancelled.set()
+        for future in self.futures:
+            future.cancel()
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+
+class Prefetcher:
+    """Shared view cache plus the pool that fills it ahead of the user."""
+
+    def __init__(self, figure_cache=None, max_views=256, workers=1, budget=DEFAULT_BUDGET):
+        self.figure_cache = figure_cache
+        self.max_views = max_views
+        self.budget = budget
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prefetch')
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.skipped = 0
+
+    def _get(self, key):
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+            return view
+
+    def _put(self, key, view):
+        with self._lock:
+            self._views[key] = view
+            self._views.move_to_end(key)
+            while len(self._views) > self.max_views:
+                self._views.popitem(last=False)
+
+    def view(self, cube, state):
+        """The view for ``state``: prefetched, or a new lazy one over its slice."""
+        key = (cube.version, state)
+        view = self._get(key)
+        with self._lock:
+            if view is not None:
+                self.hits += 1
+                return view
+            self.misses += 1
+        view = View(cube.slice(**state._asdict()))
+        self._put(key, view)
+        return view
+
+    def _prefetch(self, batch, cube, state):
+        key = (cube.version, state)
+        if batch.cancelled or batch.exhausted():
+            with self._lock:
+                self.skipped += 1
+            return
+        if self._get(key) is not None:
+            return
+        start = time.thread_time()
+        view = compute_view(cube, state)
+        self._put(key, view)
+        if self.figure_cache is not None:
+            for name in CHART_NAMES:
+                if batch.cancelled:
+                    break
+                data, figure_key = view.chart(name)
+                if figure_key not in self.figure_cache:
+                    self.figure_cache.put(figure_key, CHART_BUILDERS[name](data).to_json())
+        batch.charge(time.thread_time() - start)
+        with self._lock:
+            self.prefetched += 1
+
+    def schedule(self, cube, state, cities=None, budget=None):
+        """Start computing the neighbors of ``state``; returns the ``Batch``."""
+        batch = Batch(self.budget if budget is None else budget)
+        if batch.budget > 0:
+            batch.futures = [self._pool.submit(self._prefetch, batch, cube, candidate)
+                             for candidate in neighbors(cube, state, cities)]
+        return batch
+
+    def stats(self):
+        with self._lock:
+            return {
+                'views': len(self._views),
+                'hits': self.hits,
+                'misses': self.misses,
+                'prefetched': self.prefetched,
+                'skipped': self.skipped
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,101 @@
+"""Opt-in per-stage timing for dashboard reruns.
+
+A ``Profiler`` times named stages of one rerun and feeds them into a
+process-wide ``StageStats``, which keeps a rolling window of samples per
+stage (shared by every session) for p50/p95/p99, plus cumulative counts and
+sums. ``StageStats.to_prometheus`` renders the Prometheus text exposition
+format, suitable for a node_exporter textfile collector.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 1024
+
+
+class StageStats:
+    """Thread-safe rolling latency samples per stage."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._samples = {}
+        self._count = {}
+        self._sum = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window)
+                self._count[stage] = 0
+                self._sum[stage] = 0.0
+            self._samples[stage].append(seconds)
+            self._count[stage] += 1
+            self._sum[stage] += seconds
+
+    def summary(self):
+        """``{stage: {'count', 'p50', 'p95', 'p99'}}`` in seconds, stage order kept."""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            counts = dict(self._count)
+        summary = {}
+        for stage, values in samples.items():
+            p50, p95, p99 = np.quantile(values, QUANTILES)
+            summary[stage] = {'count': counts[stage], 'p50': p50, 'p95': p95, 'p99': p99}
+        return summary
+
+    def to_prometheus(self, counters=None, prefix='dashboard'):
+        """Render the stats (and optional extra counters) as Prometheus text."""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            counts = dict(self._count)
+            sums = dict(self._sum)
+
+        name = f'{prefix}_stage_seconds'
+        lines = [
+            f'# HELP {name} Dashboard rerun stage latency over the last {self.window} samples.',
+            f'# TYPE {name} summary'
+        ]
+        for stage, values in samples.items():
+            label = stage.replace('\\', '\\\\').replace('"', '\\"')
+            for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                lines.append(f'{name}{{stage="{label}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{name}_sum{{stage="{label}"}} {sums[stage]:.6f}')
+            lines.append(f'{name}_count{{stage="{label}"}} {counts[stage]}')
+
+        for counter, value in (counters or {}).items():
+            metric = f'{prefix}_{counter}'
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, counters=None):
+        """Atomically write the exposition text to ``path``."""
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus(counters))
+        os.replace(tmp_path, path)
+
+
+class Profiler:
+    """Times the stages of one rerun; a no-op when disabled."""
+
+    def __init__(self, stats, enabled=False):
+        self.stats = stats
+        self.enabled = enabled
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stats.record(name, time.perf_counter() - start)
@@ -0,0 +1,265 @@
+"""Static dashboard snapshots per segment, rendered in parallel.
+
+Usage (from the repository root):
+
+    python -m analytics.report
+    python -m analytics.report --out reports --executor processes --workers 4
+    python -m analytics.report --plotlyjs directory --png
+
+Renders one page per segment: every student, each city of the sidebar's
+list and each Degree_Level. A page has the dashboard's six KPI tiles and
+eight charts. The numbers come from the same code the dashboard runs: a
+``FilterCube`` over the segment's rows, ``kpis``, ``chart_data`` and the
+``CHART_BUILDERS`` figures. ``index.html`` links the pages with their
+headline numbers.
+
+Segments are rendered on an executor from ``analytics.parallel``. The
+survey is loaded once in this process, before the pool starts, so forked
+workers share it. Workers started another way load it once each, by
+memory-mapping the Feather cache. Pages embed plotly.js by default, so each
+file is self-contained and can be mailed on its own. ``--plotlyjs
+directory`` writes one shared ``plotly.min.js`` instead, and ``cdn`` links
+it. ``--png`` also writes each chart as a PNG, which needs the kaleido
+package. Per-segment and total wall times are printed at the end.
+"""
+import argparse
+import functools
+import html
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import as_completed
+
+import numpy as np
+
+from analytics.charts import CHART_BUILDERS
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.filters import CITIES
+from analytics.parallel import EXECUTORS, make_executor
+from analytics.pipeline import CHART_NAMES, chart_data
+from analytics.storage import read_survey
+
+DATA_FILE = 'IP_Student_Depression.csv'
+REPORT_DIR = 'reports'
+
+PLOTLYJS_MODES = ['inline', 'directory', 'cdn']
+
+# The dashboard's tiles: label, KPI and format
+KPI_TILES = [
+    ('Total Students', 'total_students', '{:,}'),
+    ('Depression Cases', 'depression_cases', '{:,}'),
+    ('Depression Rate', 'depression_rate', '{:.1f}%'),
+    ('High Risk Students', 'high_risk', '{:,}'),
+    ('Top City w/ Dep.', 'top_city', '{}'),
+    ('Depressed w/ F. Hist.', 'family_history_pct', '{:.1f}%')
+]
+
+# A column (None for every student) and its label
+Segment = namedtuple('Segment', ['title', 'slug', 'column', 'label'])
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{plotlyjs}
+<style>
+    body {{ font-family: sans-serif; margin: 1rem; color: #03045E; }}
+    h1 {{ font-size: 1.6em; text-align: center; margin: 0.2em 0 0.8em; }}
+    .tiles {{ display: grid; grid-template-columns: repeat(6, 1fr); gap: 12px; }}
+    .metric-box {{ background-color: #CAF0F8; border: 2px solid #00B4D8; padding: 15px;
+                   border-radius: 8px; text-align: center;
+                   box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+    .metric-label {{ font-size: 1.0em; color: #0077B6; margin-bottom: 3px; }}
+    .metric-value {{ font-size: 2.2em; font-weight: bold; color: #03045E; margin-top: 5px; }}
+    .charts {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px;
+               margin-top: 1.5rem; }}
+    .footer {{ color: #666; font-size: 0.9em; text-align: center; margin-top: 1.5rem; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<div class="tiles">
+{tiles}
+</div>
+<div class="charts">
+{charts}
+</div>
+<p class="footer">{footer}</p>
+</body>
+</html>
+"""
+
+TILE = """<div class="metric-box"><div class="metric-label">{label}</div>
+<div class="metric-value">{value}</div></div>"""
+
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def segments(dataset, cities=CITIES):
+    """Every student, then each city of ``cities``, then each Degree_Level."""
+    return [
+        Segment('All students', 'all', None, None),
+        *[Segment(f'City: {city}', f'city-{slugify(city)}', 'City', city)
+          for city in cities if city in dataset.labels['City']],
+        *[Segment(f'Degree level: {level}', f'degree-{slugify(level)}', 'Degree_Level', level)
+          for level in dataset.labels['Degree_Level']]
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def load_dataset(csv_path):
+    """The survey's ``Dataset``, once per process."""
+    return Dataset.from_frame(read_survey(csv_path))
+
+
+def segment_rows(dataset, segment):
+    """Row ids of a segment (None for every row)."""
+    if segment.column is None:
+        return None
+    code = dataset.labels[segment.column].index(segment.label)
+    return np.flatnonzero(dataset.category(segment.column) == code)
+
+
+@functools.lru_cache(maxsize=None)
+def plotlyjs_tag(mode):
+    """The pages' plotly.js ``<script>``, built once per process."""
+    import plotly.offline
+
+    if mode == 'cdn':
+        return (f'<script src="https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}'
+                '.min.js"></script>')
+    if mode == 'directory':
+        return '<script src="plotly.min.js"></script>'
+    return f'<script type="text/javascript">{plotly.offline.get_plotlyjs()}</script>'
+
+
+def render_page(segment, kpis, figures, plotlyjs, footer=''):
+    tiles = '\n'.join(
+        TILE.format(label=html.escape(label), value=html.escape(fmt.format(kpis[key])))
+        for label, key, fmt in KPI_TILES)
+    # Filled row by row: the top chart of each column, then the ones below
+    order = CHART_NAMES[0::2] + CHART_NAMES[1::2]
+    charts = '\n'.join(
+        '<div>{}</div>'.format(figures[name].to_html(
+            full_html=False, include_plotlyjs=False, config={'displayModeBar': False}))
+        for name in order)
+    return PAGE.format(title=html.escape(f'Student Depression: {segment.title}'),
+                       plotlyjs=plotlyjs_tag(plotlyjs), tiles=tiles, charts=charts,
+                       footer=html.escape(footer))
+
+
+def render_segment(csv_path, segment, out_dir, plotlyjs='inline', png=False):
+    """Write one segment's page (and PNGs); return its timing and headline KPIs."""
+    start = time.perf_counter()
+    dataset = load_dataset(csv_path)
+    rows = segment_rows(dataset, segment)
+    filtered = FilterCube.from_dataset(dataset, rows).slice()
+    kpis = filtered.kpis()
+    data = chart_data(filtered, kpis=kpis)
+    figures = {name: CHART_BUILDERS[name](data[name]).update_layout(template='plotly_white')
+               for name in CHART_NAMES}
+
+    files = [os.path.join(out_dir, f'{segment.slug}.html')]
+    page = render_page(segment, kpis, figures, plotlyjs,
+                       footer=f'Source: {os.path.basename(csv_path)}')
+    tmp_path = f'{files[0]}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    os.replace(tmp_path, files[0])
+
+    if png:
+        for name, figure in figures.items():
+            path = os.path.join(out_dir, segment.slug, f'{name}.png')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            figure.write_image(path, scale=2)
+            files.append(path)
+
+    return {
+        'segment': segment,
+        'students': kpis['total_students'],
+        'depression_rate': kpis['depression_rate'],
+        'files': files,
+        'seconds': time.perf_counter() - start
+    }
+
+
+def write_index(results, out_dir, elapsed):
+    rows = '\n'.join(
+        f'<tr><td><a href="{result["segment"].slug}.html">'
+        f'{html.escape(result["segment"].title)}</a></td>'
+        f'<td>{result["students"]:,}</td><td>{result["depression_rate"]:.1f}%</td></tr>'
+        for result in results)
+    page = (
+        '<!DOCTYPE html>\n<html lang="en">\n<head><meta charset="utf-8">'
+        '<title>Student Depression reports</title></head>\n<body style="font-family: sans-serif">\n'
+        '<h1>Student Depression reports</h1>\n'
+        '<table><tr><th>Segment</th><th>Students</th><th>Depression rate</th></tr>\n'
+        f'{rows}\n</table>\n'
+        f'<p>{len(results)} segments rendered in {elapsed:.1f} s on {time.strftime("%Y-%m-%d %H:%M")}.</p>\n'
+        '</body>\n</html>\n')
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(page)
+
+
+def generate(csv_path=DATA_FILE, out_dir=REPORT_DIR, executor='processes', workers=None,
+             plotlyjs='inline', png=False):
+    """Render every segment; return the results in segment order and the wall time."""
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    # Loaded before the pool starts, so forked workers inherit both
+    dataset = load_dataset(csv_path)
+    plotlyjs_tag(plotlyjs)
+    if plotlyjs == 'directory':
+        import plotly.offline
+        with open(os.path.join(out_dir, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+            f.write(plotly.offline.get_plotlyjs())
+
+    todo = segments(dataset)
+    pool = make_executor(executor, workers)
+    try:
+        futures = {pool.submit(render_segment, csv_path, segment, out_dir, plotlyjs, png): i
+                   for i, segment in enumerate(todo)}
+        results = [None] * len(todo)
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    finally:
+        pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    write_index(results, out_dir, elapsed)
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', default=DATA_FILE, help='cleaned survey extract')
+    parser.add_argument('--out', default=REPORT_DIR, help='output directory')
+    parser.add_argument('--executor', choices=EXECUTORS, default='processes')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--plotlyjs', choices=PLOTLYJS_MODES, default='inline',
+                        help='embed plotly.js in every page, share one file, or link the CDN')
+    parser.add_argument('--png', action='store_true', help='also write each chart as PNG')
+    args = parser.parse_args()
+    if args.png:
+        try:
+            import kaleido  # noqa: F401
+        except ImportError:
+            parser.error('--png needs the kaleido package (pip install kaleido)')
+
+    results, elapsed = generate(args.csv, args.out, args.executor, args.workers,
+                                args.plotlyjs, args.png)
+    print(f"{'segment':<28} {'students':>9} {'seconds':>8}")
+    for result in results:
+        print(f"{result['segment'].title:<28} {result['students']:>9,} {result['seconds']:>8.2f}")
+    busy = sum(result['seconds'] for result in results)
+    print(f"{len(results)} segments, {sum(len(r['files']) for r in results)} files -> {args.out}: "
+          f"{elapsed:.1f} s wall, {busy:.1f} s of segment time")
+
+
+if __name__ == '__main__':
+    main()
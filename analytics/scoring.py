@@ -0,0 +1,219 @@
+"""Dependency-light scoring with the exported depression classifier.
+
+The notebook's pipeline is one-hot encoding, min-max scaling and mode
+imputation feeding a logistic regression, so the whole thing is linear in
+the raw columns. ``RiskModel.from_pipeline`` folds it into:
+
+- one weight per label of each one-hot column (unseen labels weigh 0, as
+  with ``handle_unknown='ignore'``)
+- one slope per numeric column, with the scaler's offsets moved into the
+  intercept, and the imputed value for columns that had an imputer
+
+Scoring a batch is then a weight lookup per category plus a multiply-add
+per numeric column, in NumPy; a single record is a handful of dict lookups.
+The model is saved as a small JSON file and needs no scikit-learn to load.
+"""
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Probability at which a student is predicted to be at risk (``predict``)
+DEFAULT_THRESHOLD = 0.5
+
+# Cube measures derived from the scores
+RISK_SCORE = 'Risk Score'
+PREDICTED_HIGH_RISK = 'Predicted High Risk'
+
+
+def _floats(values):
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(values, dtype=np.float64)
+
+
+def _weights(values, weights):
+    """Per-row weights: looked up once per distinct label, gathered by code."""
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(np.asarray(values, dtype=object))
+    # Missing values have code -1, which picks the trailing 0
+    table = np.array([weights.get(str(label), 0.0) for label in labels] + [0.0])
+    return table[codes]
+
+
+def _sigmoid(logit):
+    with np.errstate(over='ignore'):
+        return 1.0 / (1.0 + np.exp(-logit))
+
+
+def risk_measures(risk, threshold=DEFAULT_THRESHOLD):
+    """Cube measures for per-row probabilities: the score and the at-risk flag."""
+    risk = np.asarray(risk, dtype=np.float64)
+    return {
+        RISK_SCORE: risk,
+        PREDICTED_HIGH_RISK: np.where(np.isnan(risk), np.nan, risk >= threshold)
+    }
+
+
+class RiskModel:
+    """A fitted logistic regression as weight tables and slopes."""
+
+    def __init__(self, intercept, categorical, numeric, threshold=DEFAULT_THRESHOLD,
+                 metadata=None):
+        self.intercept = float(intercept)
+        # column -> {label: weight}
+        self.categorical = categorical
+        # column -> (slope, fill value for missing entries or None)
+        self.numeric = numeric
+        self.threshold = threshold
+        self.metadata = metadata or {}
+
+    @property
+    def version(self):
+        """Short content hash, so caches built on this model can be keyed by it."""
+        return hashlib.sha1(json.dumps(self.to_dict(), sort_keys=True).encode()).hexdigest()[:12]
+
+    @property
+    def features(self):
+        """Columns the model reads."""
+        return list(self.categorical) + list(self.numeric)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, threshold=DEFAULT_THRESHOLD, metadata=None):
+        """Fold a fitted preprocessing + logistic regression pipeline.
+
+        Supports the notebook's building blocks: ``OneHotEncoder`` without
+        ``drop``, ``MinMaxScaler``, ``SimpleImputer`` and passthrough
+        columns, alone or chained in a ``Pipeline``. Raises ``ValueError``
+        for anything else.
+        """
+        preprocessor, logreg = pipeline.steps[0][1], pipeline.steps[-1][1]
+        coef = logreg.coef_.ravel()
+        intercept = float(logreg.intercept_.ravel()[0])
+        categorical = {}
+        numeric = {}
+        pos = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == 'drop':
+                continue
+            if transformer == 'passthrough':
+                steps = []
+            else:
+                steps = [step for _, step in getattr(transformer, 'steps', [(name, transformer)])]
+
+            if len(steps) == 1 and hasattr(steps[0], 'categories_'):
+                encoder = steps[0]
+                if getattr(encoder, 'drop_idx_', None) is not None:
+                    raise ValueError(f"{name}: one-hot encoding with drop is not supported")
+                for column, labels in zip(columns, encoder.categories_):
+                    weights = coef[pos:pos + len(labels)]
+                    categorical[column] = {str(label): float(weight)
+                                           for label, weight in zip(labels, weights)}
+                    pos += len(labels)
+                continue
+
+            for j, column in enumerate(columns):
+                slope = float(coef[pos])
+                fill = None
+                # Undo the steps last to first: w * (x * scale + min) folds
+                # into slope w * scale plus a constant w * min
+                for step in reversed(steps):
+                    if hasattr(step, 'scale_') and hasattr(step, 'min_'):
+                        intercept += slope * float(step.min_[j])
+                        slope *= float(step.scale_[j])
+                    elif hasattr(step, 'statistics_'):
+                        fill = float(step.statistics_[j])
+                    elif hasattr(step, 'func') and step.func is None:
+                        # Fitted 'passthrough' columns become an identity transformer
+                        continue
+                    else:
+                        raise ValueError(f"{name}: unsupported step {type(step).__name__}")
+                numeric[column] = (slope, fill)
+                pos += 1
+
+        if pos != len(coef):
+            raise ValueError(f"pipeline has {len(coef)} coefficients, folded {pos}")
+        return cls(intercept, categorical, numeric, threshold, metadata)
+
+    def decision_function(self, frame):
+        """Log-odds for every row of a frame (or a mapping of columns)."""
+        n_rows = len(frame[self.features[0]])
+        logit = np.full(n_rows, self.intercept)
+        for column, weights in self.categorical.items():
+            logit += _weights(frame[column], weights)
+        for column, (slope, fill) in self.numeric.items():
+            values = _floats(frame[column])
+            if fill is not None:
+                values = np.where(np.isnan(values), fill, values)
+            logit += slope * values
+        return logit
+
+    def predict_proba(self, frame):
+        """Probability of depression for every row (positive class only)."""
+        return _sigmoid(self.decision_function(frame))
+
+    def predict(self, frame):
+        """1 where the probability reaches ``threshold``, else 0."""
+        return (self.predict_proba(frame) >= self.threshold).astype(np.int8)
+
+    def score_record(self, record):
+        """Probability of depression for one student, given as a dict.
+
+        Missing categorical entries weigh 0; a missing numeric entry takes
+        its imputed value, or makes the score NaN if it has none.
+        """
+        logit = self.intercept
+        for column, weights in self.categorical.items():
+            logit += weights.get(str(record.get(column)), 0.0)
+        for column, (slope, fill) in self.numeric.items():
+            value = record.get(column)
+            if value is None or value != value:
+                value = math.nan if fill is None else fill
+            logit += slope * float(value)
+        if logit != logit:
+            return math.nan
+        if logit < -700:
+            return 0.0
+        return 1.0 / (1.0 + math.exp(-logit))
+
+    def to_dict(self):
+        return {
+            'intercept': self.intercept,
+            'threshold': self.threshold,
+            'categorical': self.categorical,
+            'numeric': {column: {'slope': slope, 'fill': fill}
+                        for column, (slope, fill) in self.numeric.items()},
+            'metadata': self.metadata
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['intercept'],
+            {column: dict(weights) for column, weights in data['categorical'].items()},
+            {column: (entry['slope'], entry['fill'])
+             for column, entry in data['numeric'].items()},
+            data.get('threshold', DEFAULT_THRESHOLD),
+            data.get('metadata')
+        )
+
+    def save(self, path):
+        """Write the model as JSON, atomically."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,309 @@
+"""Cross-validated model search around the notebook's preprocessing.
+
+Usage (from the repository root):
+
+    python -m analytics.search IP_Student_Depression.csv
+    python -m analytics.search IP_Student_Depression.csv --families logreg sgd \\
+        --executor processes --out models/leaderboard.csv --export models/risk_model.json
+
+The notebook's train and validation rows (its test rows are held out) are
+split into stratified folds. ``build_preprocessor`` is fitted once per fold
+and the transformed matrices are saved to a temporary directory. Workers
+memory-map them on first use, so the features cross to a worker process
+once, not once per candidate, and every candidate trains on the same cached
+features instead of re-encoding them.
+
+Candidates come from ``SEARCH_SPACE``. Each (candidate, fold) pair is one
+task, submitted fold by fold to keep the executor busy across folds. Once
+every remaining candidate has finished a fold, those whose mean AUC so far
+trails the leader by more than ``tolerance`` are stopped. Their queued
+tasks are cancelled, so poor configurations cost one or two folds rather
+than all of them. The leaderboard is the same as when each fold waits for
+the previous one. It reports mean AUC, precision and recall at 0.5, fit
+time and predict latency per row.
+
+``--export`` refits the best linear configuration (only linear models fold
+into a ``RiskModel``) on all searched rows, reports its test metrics and
+writes it for the dashboard. Requires scikit-learn.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import wait
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+from analytics.model import FEATURES, RANDOM_STATE, TARGET, build_preprocessor, evaluate, split
+from analytics.parallel import SerialExecutor, make_executor
+from analytics.scoring import RiskModel
+from analytics.storage import read_survey
+
+# family -> (estimator class, parameter grid)
+SEARCH_SPACE = {
+    'logreg': (LogisticRegression, {
+        'C': [0.01, 0.1, 1.0, 10.0],
+        # L2 or L1; l1_ratio alone picks the penalty from scikit-learn 1.8 on
+        'l1_ratio': [0.0, 1.0],
+        'solver': ['liblinear'],
+        'max_iter': [1000],
+        'random_state': [RANDOM_STATE]
+    }),
+    'sgd': (SGDClassifier, {
+        'loss': ['log_loss'],
+        'alpha': [1e-5, 1e-4, 1e-3],
+        'random_state': [RANDOM_STATE]
+    }),
+    'random_forest': (RandomForestClassifier, {
+        'n_estimators': [200],
+        'max_depth': [8, 16],
+        'min_samples_leaf': [1, 5],
+        'n_jobs': [1],
+        'random_state': [RANDOM_STATE]
+    }),
+    'gradient_boosting': (HistGradientBoostingClassifier, {
+        'learning_rate': [0.05, 0.1],
+        'max_leaf_nodes': [15, 31],
+        'random_state': [RANDOM_STATE]
+    })
+}
+
+# Families whose fitted models fold into a ``RiskModel``
+LINEAR_FAMILIES = ['logreg', 'sgd']
+
+DEFAULT_FOLDS = 5
+DEFAULT_TOLERANCE = 0.01
+
+# Arrays of a fold, as returned by ``fold_matrices``
+FOLD_PARTS = ['X_train', 'y_train', 'X_valid', 'y_valid']
+
+LEADERBOARD_COLUMNS = [
+    'family', 'params', 'folds', 'auc', 'auc_std', 'precision', 'recall',
+    'fit_seconds', 'predict_us'
+]
+
+
+def candidates(families=None):
+    """Every (family, params) pair of the search space, in grid order."""
+    return [(family, params)
+            for family in (families or list(SEARCH_SPACE))
+            for params in ParameterGrid(SEARCH_SPACE[family][1])]
+
+
+def fold_matrices(df, n_folds=DEFAULT_FOLDS, random_state=RANDOM_STATE):
+    """Preprocessed (X_train, y_train, X_valid, y_valid) for each fold.
+
+    The preprocessor is fitted on each fold's training rows only, so the
+    validation rows are encoded and scaled as unseen data would be.
+    """
+    y = df[TARGET].to_numpy()
+    folds = StratifiedKFold(n_folds, shuffle=True, random_state=random_state)
+    matrices = []
+    for train_idx, valid_idx in folds.split(np.zeros(len(y)), y):
+        preprocessor = build_preprocessor().fit(df[FEATURES].iloc[train_idx])
+        matrices.append((preprocessor.transform(df[FEATURES].iloc[train_idx]), y[train_idx],
+                         preprocessor.transform(df[FEATURES].iloc[valid_idx]), y[valid_idx]))
+    return matrices
+
+
+def save_folds(folds, directory):
+    """Write fold matrices under ``directory`` as .npy files for ``load_fold``."""
+    for k, fold in enumerate(folds):
+        for name, matrix in zip(FOLD_PARTS, fold):
+            # The encoder may return a sparse matrix; the features are few
+            matrix = matrix.toarray() if hasattr(matrix, 'toarray') else matrix
+            np.save(os.path.join(directory, f'fold{k}-{name}.npy'), matrix)
+
+
+# Folds memory-mapped by this process: (directory, fold) -> arrays
+_loaded_folds = {}
+
+
+def load_fold(directory, k):
+    """Fold ``k`` saved by ``save_folds``, memory-mapped once per process."""
+    if (directory, k) not in _loaded_folds:
+        # A new search: drop the maps of the previous one
+        if any(key[0] != directory for key in _loaded_folds):
+            _loaded_folds.clear()
+        _loaded_folds[directory, k] = tuple(
+            np.load(os.path.join(directory, f'fold{k}-{name}.npy'), mmap_mode='r')
+            for name in FOLD_PARTS)
+    return _loaded_folds[directory, k]
+
+
+def unload_folds(directory):
+    """Drop this process's maps of ``directory``, so it can be removed."""
+    for key in [key for key in _loaded_folds if key[0] == directory]:
+        del _loaded_folds[key]
+
+
+def _positive_scores(model, X):
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1]
+    return model.decision_function(X)
+
+
+def evaluate_fold(family, params, fold):
+    """Fit one candidate on one cached fold; return its metrics."""
+    X_train, y_train, X_valid, y_valid = fold
+    model = SEARCH_SPACE[family][0](**params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = _positive_scores(model, X_valid)
+    predict_seconds = time.perf_counter() - start
+    y_pred = model.predict(X_valid)
+    return {
+        'auc': roc_auc_score(y_valid, scores),
+        'precision': precision_score(y_valid, y_pred, zero_division=0),
+        'recall': recall_score(y_valid, y_pred, zero_division=0),
+        'fit_seconds': fit_seconds,
+        'predict_us': predict_seconds / len(y_valid) * 1e6
+    }
+
+
+def evaluate_saved_fold(family, params, directory, k):
+    """``evaluate_fold`` on fold ``k`` of a ``save_folds`` directory."""
+    return evaluate_fold(family, params, load_fold(directory, k))
+
+
+def leaderboard(configs, results):
+    """One row per candidate, completed folds first, then by mean AUC."""
+    rows = []
+    for (family, params), folds in zip(configs, results):
+        frame = pd.DataFrame(folds)
+        rows.append({
+            'family': family,
+            'params': json.dumps(params, sort_keys=True),
+            'folds': len(frame),
+            'auc': frame['auc'].mean(),
+            'auc_std': frame['auc'].std(ddof=0),
+            **frame[['precision', 'recall', 'fit_seconds', 'predict_us']].mean().to_dict()
+        })
+    board = pd.DataFrame(rows, columns=LEADERBOARD_COLUMNS)
+    return board.sort_values(['folds', 'auc'], ascending=False, kind='stable').reset_index(drop=True)
+
+
+def search(df, families=None, n_folds=DEFAULT_FOLDS, executor='processes', workers=None,
+           tolerance=DEFAULT_TOLERANCE, random_state=RANDOM_STATE):
+    """Run the cross-validated search over ``df``; return the leaderboard.
+
+    ``executor`` is a name from ``analytics.parallel.EXECUTORS`` or an
+    existing executor, which is left running for the caller to reuse.
+    ``workers`` also sizes the window of tasks queued ahead.
+    """
+    configs = candidates(families)
+    results = [[] for _ in configs]
+    alive = list(range(len(configs)))
+    stopped = set()
+    tasks = deque((i, k) for k in range(n_folds) for i in range(len(configs)))
+    pending = {}
+
+    with tempfile.TemporaryDirectory(prefix='search-folds-') as directory:
+        save_folds(fold_matrices(df, n_folds, random_state), directory)
+        owned = isinstance(executor, str)
+        pool = make_executor(executor, workers) if owned else executor
+        # The serial executor runs a task when it is submitted, so nothing is
+        # queued ahead of the early-stopping decisions there
+        window = 1 if isinstance(pool, SerialExecutor) else 2 * (workers or os.cpu_count() or 1)
+
+        def fill():
+            while tasks and len(pending) < window:
+                i, k = tasks.popleft()
+                if i not in stopped:
+                    pending[i, k] = pool.submit(evaluate_saved_fold, *configs[i], directory, k)
+
+        try:
+            # Results are taken in submission order, so the task waited on is
+            # always submitted while the ones after it keep the workers busy
+            for k in range(n_folds):
+                for i in alive:
+                    fill()
+                    results[i].append(pending.pop((i, k)).result())
+                # Early stopping: drop candidates that trail the leader
+                mean_auc = {i: np.mean([r['auc'] for r in results[i]]) for i in alive}
+                best = max(mean_auc.values())
+                stopped.update(i for i in alive if mean_auc[i] < best - tolerance)
+                alive = [i for i in alive if i not in stopped]
+                for key in [key for key in pending if key[0] in stopped]:
+                    pending.pop(key).cancel()
+        finally:
+            # Tasks already running finish before their files are removed
+            for future in pending.values():
+                future.cancel()
+            wait(list(pending.values()))
+            if owned:
+                pool.shutdown()
+            unload_folds(directory)
+    return leaderboard(configs, results)
+
+
+def fit_config(df, family, params):
+    """Preprocessing plus one search candidate, fitted on ``df``."""
+    pipeline = Pipeline([
+        ('preprocessing', build_preprocessor()),
+        (family, SEARCH_SPACE[family][0](**params))
+    ])
+    return pipeline.fit(df[FEATURES], df[TARGET])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('csv_path', help='cleaned survey extract')
+    parser.add_argument('--families', nargs='+', choices=list(SEARCH_SPACE))
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='AUC gap to the leader at which a candidate is stopped')
+    parser.add_argument('--executor', default='processes')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--out', default='models/leaderboard.csv', help='leaderboard CSV')
+    parser.add_argument('--export', help='write the best linear model here (JSON)')
+    args = parser.parse_args()
+
+    train_df, valid_df, test_df = split(read_survey(args.csv_path))
+    searched = pd.concat([train_df, valid_df])
+    start = time.perf_counter()
+    board = search(searched, args.families, args.folds, args.executor, args.workers,
+                   args.tolerance)
+    elapsed = time.perf_counter() - start
+
+    directory = os.path.dirname(args.out)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    board.to_csv(args.out, index=False)
+    with pd.option_context('display.width', 160, 'display.max_colwidth', 70):
+        print(board.round(4).to_string(index=False))
+    print(f"{len(board)} candidates, {args.folds} folds, {elapsed:.1f} s -> {args.out}")
+
+    if args.export:
+        linear = board[(board['family'].isin(LINEAR_FAMILIES))
+                       & (board['folds'] == board['folds'].max())]
+        if linear.empty:
+            parser.error('no linear candidate completed every fold; nothing to export')
+        best = linear.iloc[0]
+        pipeline = fit_config(searched, best['family'], json.loads(best['params']))
+        metrics = evaluate(pipeline, test_df)
+        model = RiskModel.from_pipeline(pipeline, metadata={
+            'source': args.csv_path,
+            'family': best['family'],
+            'params': json.loads(best['params']),
+            'train_rows': len(searched),
+            **{f'test_{key}': round(float(value), 4) for key, value in metrics.items()}
+        })
+        model.save(args.export)
+        print(f"exported {best['family']} {best['params']} (test AUC {metrics['auc']:.4f}) "
+              f"-> {args.export}")
+
+
+if __name__ == '__main__':
+    main()
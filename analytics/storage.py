@@ -0,0 +1,168 @@
+"""Typed columnar cache for the survey CSV.
+
+The first start parses ``IP_Student_Depression.csv`` once and writes it as an
+uncompressed Feather (Arrow IPC) file with categorical and narrow numeric
+dtypes. Later starts memory-map that file, so replicas on the same host share
+the page cache instead of each holding a parsed copy. The cache is rebuilt
+when the CSV changes: a size/mtime mismatch triggers a content hash check.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+CACHE_DIR = '.cache'
+
+CATEGORY_COLUMNS = [
+    'Gender',
+    'City',
+    'Profession',
+    'Sleep Duration',
+    'Dietary Habits',
+    'Degree',
+    'Suicidal thoughts',
+    'Family History of Mental Illness',
+    'Degree_Level'
+]
+
+# 1-5 scales, small counts and the target all fit in int8
+INT8_COLUMNS = [
+    'Age',
+    'Academic Pressure',
+    'Study Satisfaction',
+    'Work/Study Hours',
+    'Financial Stress',
+    'Depression'
+]
+
+FLOAT32_COLUMNS = [
+    'CGPA',
+    'Sleep_Hours'
+]
+
+SCHEMA_DTYPES = {
+    'id': 'int32',
+    **{column: 'category' for column in CATEGORY_COLUMNS},
+    **{column: 'int8' for column in INT8_COLUMNS},
+    **{column: 'float32' for column in FLOAT32_COLUMNS}
+}
+
+# Distinct bad values quoted in a schema error
+REPORTED_VALUES = 5
+
+_METADATA_KEY = b'source'
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_info(path, with_hash=False):
+    stat = os.stat(path)
+    info = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        info['sha256'] = file_hash(path)
+    return info
+
+
+def cache_path_for(csv_path, cache_dir=None):
+    """Location of the Feather cache for ``csv_path``."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_DIR)
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, name + '.feather')
+
+
+def check_integers(df, dtypes):
+    """Raise ``ValueError`` unless the integer columns of ``dtypes`` cast losslessly.
+
+    ``astype`` wraps out-of-range values and truncates fractions without a
+    word (Age 300 becomes 44 in int8, 25.5 becomes 25), so every value must
+    be a whole number within the target dtype's range.
+    """
+    for column, dtype in dtypes.items():
+        if dtype == 'category' or not np.issubdtype(np.dtype(dtype), np.integer):
+            continue
+        values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        limits = np.iinfo(dtype)
+        with np.errstate(invalid='ignore'):
+            bad = ~((values == np.round(values)) & (values >= limits.min) & (values <= limits.max))
+        if bad.any():
+            shown = ', '.join(map(str, pd.unique(df[column].to_numpy()[bad])[:REPORTED_VALUES]))
+            raise ValueError(f"{column} needs whole numbers from {limits.min} to {limits.max} "
+                             f"for {dtype}, got {shown}")
+
+
+def apply_schema(df):
+    """Cast known columns to the compact dashboard dtypes.
+
+    Raises ``ValueError`` if an integer column has missing, fractional or
+    out-of-range values.
+    """
+    dtypes = {column: dtype for column, dtype in SCHEMA_DTYPES.items()
+              if column in df.columns}
+    check_integers(df, dtypes)
+    df = df.astype(dtypes)
+    # Sorted categories keep codes stable across rebuilds
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].cat.reorder_categories(
+                sorted(df[column].cat.categories))
+    return df
+
+
+def read_feather(path):
+    """Memory-map a Feather file; return (frame, source metadata)."""
+    source = pa.memory_map(path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    metadata = json.loads((table.schema.metadata or {}).get(_METADATA_KEY, b'{}'))
+    # split_blocks lets numeric columns stay views over the mapped buffers
+    return table.to_pandas(split_blocks=True), metadata
+
+
+def write_feather(df, path, source):
+    """Write ``df`` with ``source`` metadata, atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_METADATA_KEY] = json.dumps(source).encode()
+    table = table.replace_schema_metadata(metadata)
+    # Write then rename so concurrent replicas never map a partial file
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+
+def read_survey(csv_path, cache_dir=None):
+    """Load the survey CSV through the typed Feather cache."""
+    path = cache_path_for(csv_path, cache_dir)
+    current = _source_info(csv_path)
+
+    if os.path.exists(path):
+        try:
+            df, cached = read_feather(path)
+        except (OSError, pa.ArrowInvalid, ValueError):
+            df, cached = None, {}
+        if df is not None:
+            if (cached.get('size'), cached.get('mtime_ns')) == (current['size'], current['mtime_ns']):
+                return df
+            # Touched but possibly unchanged: compare contents before rebuilding
+            current = _source_info(csv_path, with_hash=True)
+            if cached.get('sha256') == current['sha256']:
+                write_feather(df, path, current)
+                return df
+
+    if 'sha256' not in current:
+        current = _source_info(csv_path, with_hash=True)
+    df = apply_schema(pd.read_csv(csv_path))
+    write_feather(df, path, current)
+    return read_feather(path)[0]
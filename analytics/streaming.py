@@ -0,0 +1,49 @@
+"""Out-of-core aggregation for survey extracts larger than memory.
+
+The source is read in chunks of ``chunksize`` rows. Each chunk becomes a
+partial ``FilterCube`` and is merged into the running total, so peak memory
+is one chunk plus the cube regardless of file size. Every dashboard
+aggregate (KPI tiles, chart breakdowns, stress means) is then answered from
+the merged cube exactly as in the in-memory path.
+"""
+import pandas as pd
+
+from analytics.cube import FilterCube
+from analytics.dataset import BREAKDOWN_COLUMNS, MEAN_COLUMNS
+from analytics.storage import SCHEMA_DTYPES, apply_schema
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Only the columns the cube reads are parsed
+CUBE_COLUMNS = ['Gender', 'Age', 'City', 'Depression'] + BREAKDOWN_COLUMNS + MEAN_COLUMNS
+
+
+def iter_chunks(csv_path, chunksize=DEFAULT_CHUNKSIZE, columns=CUBE_COLUMNS):
+    """Yield typed frames of at most ``chunksize`` rows."""
+    # Integers are parsed wide and narrowed by apply_schema, which checks
+    # they fit; read_csv would wrap them silently
+    dtypes = {column: dtype for column, dtype in SCHEMA_DTYPES.items()
+              if column in columns and dtype == 'category'}
+    for chunk in pd.read_csv(csv_path, usecols=columns, dtype=dtypes, chunksize=chunksize):
+        yield apply_schema(chunk)
+
+
+def merge_cubes(cubes):
+    """Fold an iterable of partial cubes into one; None if it is empty."""
+    total = None
+    for cube in cubes:
+        total = cube if total is None else total.merge(cube)
+    return total
+
+
+def stream_cube(csv_path, chunksize=DEFAULT_CHUNKSIZE, model=None):
+    """Build the dashboard cube from ``csv_path`` with bounded memory.
+
+    With a ``RiskModel`` each chunk is also scored for the risk measures.
+    """
+    columns = CUBE_COLUMNS
+    if model is not None:
+        columns = columns + [column for column in model.features if column not in columns]
+    return merge_cubes(FilterCube.from_frame(chunk, model)
+                       for chunk in iter_chunks(csv_path, chunksize, columns)
+                       if len(chunk))
@@ -0,0 +1,79 @@
+"""Synthetic survey data with the same schema as ``IP_Student_Depression.csv``.
+
+Rows are bootstrapped from the real extract, so category skew (the long tail
+of cities, the gender split, the joint pattern of stress scores and
+depression) matches production. Ids are renumbered, and Age and CGPA are
+lightly jittered so larger datasets are not exact copies. Generation is
+chunked, so 10^8-row files can be written without holding them in memory.
+
+With ``raw=True`` the rows are turned back into the raw export schema the
+cleaning rules expect, and a small share of rows the notebook drops
+(non-students, non-zero Work Pressure, Financial Stress '?') is mixed in.
+"""
+import numpy as np
+
+from analytics.cleaning import SUICIDAL_QUESTION
+from analytics.storage import read_survey
+
+SOURCE_CSV = 'IP_Student_Depression.csv'
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+# Share of raw rows the cleaning rules should drop
+RAW_DROP_RATE = 0.02
+
+
+def to_raw_export(chunk, rng):
+    """Turn cleaned rows back into the raw export schema, with some noise."""
+    raw = chunk.drop(columns=['Sleep_Hours', 'Degree_Level']).rename(
+        columns={'Suicidal thoughts': SUICIDAL_QUESTION})
+    raw.insert(raw.columns.get_loc('CGPA'), 'Work Pressure', 0.0)
+    raw.insert(raw.columns.get_loc('Sleep Duration'), 'Job Satisfaction', 0.0)
+    profession = raw['Profession'].to_numpy(dtype=object, copy=True)
+    work_pressure = raw['Work Pressure'].to_numpy(copy=True)
+    stress = raw['Financial Stress'].astype(float).astype(str).to_numpy(dtype=object, copy=True)
+
+    # Each dropped row fails exactly one of the three row filters
+    dropped = np.flatnonzero(rng.random(len(raw)) < RAW_DROP_RATE)
+    reason = rng.integers(0, 3, len(dropped))
+    profession[dropped[reason == 0]] = 'Teacher'
+    work_pressure[dropped[reason == 1]] = 3.0
+    stress[dropped[reason == 2]] = '?'
+    raw['Profession'] = profession
+    raw['Work Pressure'] = work_pressure
+    raw['Financial Stress'] = stress
+    return raw
+
+
+def iter_synthetic(n_rows, chunksize=DEFAULT_CHUNKSIZE, seed=0, base=None, raw=False):
+    """Yield synthetic frames totalling ``n_rows`` rows."""
+    if base is None:
+        base = read_survey(SOURCE_CSV)
+    rng = np.random.default_rng(seed)
+    age_min, age_max = int(base['Age'].min()), int(base['Age'].max())
+
+    for start in range(0, n_rows, chunksize):
+        size = min(chunksize, n_rows - start)
+        chunk = base.take(rng.integers(0, len(base), size)).reset_index(drop=True)
+        chunk['id'] = np.arange(start, start + size, dtype=chunk['id'].dtype)
+
+        # Jitter about a tenth of the ages by one year, within the data range
+        shift = rng.choice([-1, 0, 1], size=size, p=[0.05, 0.9, 0.05])
+        chunk['Age'] = np.clip(chunk['Age'].to_numpy() + shift,
+                               age_min, age_max).astype(chunk['Age'].dtype)
+        cgpa = chunk['CGPA'].to_numpy() + rng.normal(0, 0.05, size)
+        chunk['CGPA'] = np.clip(cgpa, 5, 10).round(2).astype(chunk['CGPA'].dtype)
+        yield to_raw_export(chunk, rng) if raw else chunk
+
+
+def synthesize(n_rows, seed=0, base=None):
+    """A single in-memory synthetic frame."""
+    return next(iter_synthetic(n_rows, chunksize=max(n_rows, 1), seed=seed, base=base))
+
+
+def write_synthetic_csv(path, n_rows, chunksize=DEFAULT_CHUNKSIZE, seed=0, base=None,
+                        raw=False):
+    """Write ``n_rows`` synthetic rows to ``path`` in chunks."""
+    for i, chunk in enumerate(iter_synthetic(n_rows, chunksize, seed, base, raw)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+    return path
@@ -0,0 +1,134 @@
+"""Load test for the headless JSON API: requests/sec on one machine.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --connections 64 --seconds 10
+    python -m benchmarks.bench_api --url http://127.0.0.1:8502
+
+Without ``--url`` the API is started in this process on a free port, so
+client and server share the CPU and the figures are a lower bound. Each
+connection keeps its socket open and cycles through the benchmark filter
+states across /kpis and /breakdowns. It is run three ways: cold (the
+response cache cleared before every request; in-process only), warm (served
+from the cache) and revalidated (``If-None-Match`` with the last ETag, so
+answers are 304s with empty bodies).
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from analytics.api import DashboardAPI, load_api, make_handler
+from benchmarks.bench_pipeline import FILTER_STATES
+
+MODES = ['cold', 'warm', 'revalidated']
+DEPRESSION_PARAMS = {None: 'all', 0: 'without', 1: 'with'}
+
+
+def request_paths():
+    paths = []
+    for state in FILTER_STATES:
+        params = [('gender', g) for g in state.get('genders') or []]
+        if state.get('age_range'):
+            params += [('age_min', state['age_range'][0]), ('age_max', state['age_range'][1])]
+        params.append(('depression', DEPRESSION_PARAMS[state.get('depression')]))
+        if state.get('city'):
+            params.append(('city', state['city']))
+        for endpoint in ('/kpis', '/breakdowns'):
+            paths.append(f'{endpoint}?{urlencode(params)}')
+    return paths
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    etag = None
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+        elif name.lower() == 'etag':
+            etag = value.strip()
+    await reader.readexactly(length)
+    return status, etag
+
+
+async def client(host, port, paths, offset, deadline, mode, api, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    i = offset
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        headers = f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+        if mode == 'revalidated' and path in etags:
+            headers += f'If-None-Match: {etags[path]}\r\n'
+        if mode == 'cold' and api is not None:
+            api.cache.clear()
+        start = time.perf_counter()
+        writer.write((headers + '\r\n').encode('latin-1'))
+        status, etag = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+        etags[path] = etag or etags.get(path)
+    writer.close()
+
+
+async def run_mode(host, port, mode, connections, seconds, api):
+    paths = request_paths()
+    latencies = []
+    statuses = {}
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, paths, k, deadline, mode, api, latencies, statuses)
+                           for k in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1e3
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50': np.percentile(latencies, 50),
+        'p99': np.percentile(latencies, 99),
+        'statuses': statuses
+    }
+
+
+async def main_async(args):
+    api = server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        api = load_api()
+        server = await asyncio.start_server(make_handler(api), '127.0.0.1', 0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    print(f"{'mode':<12} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+    for mode in MODES:
+        if mode == 'cold' and not isinstance(api, DashboardAPI):
+            continue
+        row = await run_mode(host, port, mode, args.connections, args.seconds, api)
+        print(f"{mode:<12} {row['requests']:>9,} {row['rps']:>9,.0f} {row['p50']:>8.2f} "
+              f"{row['p99']:>8.2f}  {row['statuses']}")
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='existing server (default: start one in-process)')
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+    main()
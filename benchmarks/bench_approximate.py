@@ -0,0 +1,99 @@
+"""Approximate cube from a stratified sample against the exact cube.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_approximate
+    python -m benchmarks.bench_approximate --sizes 1000000 10000000 --rates 0.01 0.001 --seeds 5
+
+For each size a synthetic dataset is built in memory. The exact
+``FilterCube`` is then timed against ``ApproximateCube.build`` at each
+sampling rate. Over the benchmark's filter states it reports:
+
+- ``build``: cube build time, the wait before the first page can render
+- ``sample``: rows in the sample
+- ``query``: slice plus KPIs plus every chart aggregate, per filter state
+- ``error``: mean absolute error of the family-history tile, in points
+- ``margin``: mean 95% half-width of that tile, in points
+- ``coverage``: share of tile intervals that contain the exact value
+
+The family-history share is the tile the sample never gets exactly; counts
+and rates over whole strata (no age range) come out exact.
+
+Error and coverage are pooled over ``--seeds`` independent samples.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics.approximate import MIN_PER_STRATUM, ApproximateCube, coverage
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.pipeline import chart_data
+from analytics.synthetic import synthesize
+from benchmarks.bench_pipeline import FILTER_STATES
+
+DEFAULT_SIZES = [1_000_000, 5_000_000]
+DEFAULT_RATES = [0.01, 0.001]
+
+# The tile whose error and margin are reported
+TILE = 'family_history_pct'
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def query_time(cube):
+    start = time.perf_counter()
+    for state in FILTER_STATES:
+        filtered = cube.slice(**state)
+        chart_data(filtered, kpis=filtered.kpis())
+    return (time.perf_counter() - start) / len(FILTER_STATES)
+
+
+def bench_size(n_rows, rates, seeds, min_per_stratum):
+    dataset = Dataset.from_frame(synthesize(n_rows))
+    exact, exact_seconds = timed(FilterCube.from_dataset, dataset)
+    rows = [('exact', exact_seconds, n_rows, query_time(exact), 0.0, 0.0, np.nan)]
+    truth = [exact.slice(**state).kpis()[TILE] for state in FILTER_STATES]
+
+    for rate in rates:
+        errors, margins, hits, seconds = [], [], [], []
+        for seed in range(seeds):
+            approximate, elapsed = timed(ApproximateCube.build, dataset, rate,
+                                         min_per_stratum, seed)
+            seconds.append(elapsed)
+            for state, actual in zip(FILTER_STATES, truth):
+                kpis = approximate.slice(**state).kpis()
+                errors.append(abs(kpis[TILE] - actual))
+                margins.append(kpis['intervals'][TILE])
+            hits.append(coverage(approximate, exact, FILTER_STATES))
+        rows.append((f'sample {rate:g}', np.median(seconds), approximate.sample_size,
+                     query_time(approximate), np.mean(errors), np.nanmean(margins),
+                     np.mean(hits)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--rates', type=float, nargs='+', default=DEFAULT_RATES)
+    parser.add_argument('--seeds', type=int, default=3, help='samples drawn per rate')
+    parser.add_argument('--min-per-stratum', type=int, default=MIN_PER_STRATUM)
+    args = parser.parse_args()
+
+    for n_rows in args.sizes:
+        print(f"\n{n_rows:,} rows, {len(FILTER_STATES)} filter states")
+        print(f"{'cube':<14} {'build ms':>9} {'sample':>10} {'query ms':>9} "
+              f"{'error':>9} {'margin':>7} {'coverage':>9}")
+        for name, build, sample, query, error, margin, hits in bench_size(
+                n_rows, args.rates, args.seeds, args.min_per_stratum):
+            print(f"{name:<14} {build * 1e3:>9.1f} {sample:>10,} {query * 1e3:>9.2f} "
+                  f"{error:>9.2f} {margin:>7.2f} {hits:>9.0%}")
+
+
+if __name__ == '__main__':
+    main()
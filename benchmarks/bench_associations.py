@@ -0,0 +1,100 @@
+"""Association statistics from the cube against per-row crosstabs.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_associations
+    python -m benchmarks.bench_associations --sizes 1000000 10000000 --repeat 20
+
+For each size a synthetic dataset is built in memory. Per filter state of
+the pipeline benchmark, it then times two ways to get every factor's
+chi-square test and level effects:
+
+- ``crosstab``: the notebook way, a boolean mask over the frame and one
+  ``pd.crosstab`` per factor, followed by the same statistics
+- ``cube``: ``analytics.associations`` on a slice of the dashboard cube,
+  which reads a few thousand cells whatever the row count
+
+The cube build, which also breaks the score columns down by level, is timed
+once per size. The largest chi-square difference between the two paths is
+printed as a check that they agree.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics.associations import FACTORS, associations
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.synthetic import synthesize
+from benchmarks.bench_pipeline import FILTER_STATES
+
+DEFAULT_SIZES = [1_000_000, 10_000_000]
+
+
+class Crosstabs:
+    """Stand-in slice whose breakdowns come from crosstabs of the filtered rows."""
+
+    def __init__(self, df, state):
+        mask = np.ones(len(df), dtype=bool)
+        if state.get('genders'):
+            mask &= df['Gender'].isin(state['genders']).to_numpy()
+        if state.get('age_range'):
+            lo, hi = state['age_range']
+            mask &= df['Age'].between(lo, hi).to_numpy()
+        if state.get('depression') is not None:
+            mask &= (df['Depression'] == state['depression']).to_numpy()
+        if state.get('city'):
+            mask &= (df['City'] == state['city']).to_numpy()
+        rows = df[mask]
+        self.breakdowns = {}
+        for factor in FACTORS:
+            table = pd.crosstab(rows[factor], rows['Depression']).reindex(columns=[0, 1],
+                                                                          fill_value=0)
+            # Shaped like a cube slice: (gender, age, depression, city, level)
+            self.breakdowns[factor] = (list(table.index),
+                                       table.to_numpy().T[None, None, :, None, :])
+
+
+def describe(state):
+    return ', '.join(f'{key}={value}' for key, value in state.items()) or 'all students'
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def bench_size(n_rows, repeat):
+    df = synthesize(n_rows)
+    cube, build = timed(lambda: FilterCube.from_dataset(Dataset.from_frame(df)), 1)
+    rows = []
+    for state in FILTER_STATES:
+        slow, crosstab = timed(lambda: associations(Crosstabs(df, state)), 1)
+        fast, sliced = timed(lambda: associations(cube.slice(**state)), repeat)
+        # Both are NaN when one depression status is selected
+        difference = (fast.tests['Chi-square'] - slow.tests['Chi-square']).abs().fillna(0).max()
+        rows.append((state, crosstab, sliced, difference))
+    return build, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=50, help='timed runs of the cube path')
+    args = parser.parse_args()
+
+    for n_rows in args.sizes:
+        build, rows = bench_size(n_rows, args.repeat)
+        print(f"\n{n_rows:,} rows, cube build {build:.2f} s")
+        print(f"{'crosstab ms':>11} {'cube ms':>8} {'chi2 diff':>10}  filter state")
+        for state, crosstab, sliced, difference in rows:
+            print(f"{crosstab * 1e3:>11.1f} {sliced * 1e3:>8.2f} {difference:>10.2g}  "
+                  f"{describe(state)}")
+
+
+if __name__ == '__main__':
+    main()
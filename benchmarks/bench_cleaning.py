@@ -0,0 +1,87 @@
+"""Benchmark the vectorized cleaning rules against the notebook cells.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_cleaning
+    python -m benchmarks.bench_cleaning --sizes 100000 1000000 10000000
+
+For each size a synthetic raw export is written. Both in-memory paths are
+timed on the parsed frame: the notebook's cells as written, and ``clean`` on
+a categorical read. The streamed file-to-file ``clean_csv`` is timed end to
+end, parse and write included, and its throughput is reported in rows/sec.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics.cleaning import clean, clean_csv, read_raw
+from analytics.synthetic import write_synthetic_csv
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+
+
+def notebook_clean(df):
+    """The cleaning cells of IP_SD_Model.ipynb, in order."""
+    df['City'] = df['City'].replace({
+        '3': 'Unknown',
+        'Less Delhi': 'Delhi',
+        'Less than 5 Kalyan': 'Kalyan'
+    })
+    df = df[df['Profession'].str.strip().str.lower() == 'student']
+    df = df[df['Work Pressure'] == 0]
+    df = df.drop(columns=['Work Pressure'])
+    df['CGPA'] = df['CGPA'].replace(0, 5).astype(float)
+    df = df.drop(columns=['Job Satisfaction'])
+    sleep_mapping = {
+        "'Less than 5 hours'": 4.5,
+        "'5-6 hours'": 5.5,
+        "'7-8 hours'": 7.5,
+        "'More than 8 hours'": 9.0,
+        "'Others'": np.nan
+    }
+    df['Sleep_Hours'] = df['Sleep Duration'].map(sleep_mapping)
+    df['Degree_Level'] = df['Degree'].apply(lambda x: 'Highschool' if x == 'Class 12'
+                                            else ('University' if x != 'Others' else 'Others'))
+    df = df[df['Financial Stress'] != '?']
+    df = df.rename(columns={
+        'Have you ever had suicidal thoughts ?': 'Suicidal thoughts'
+    })
+    df['Financial Stress'] = df['Financial Stress'].astype(float)
+    return df
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'notebook s':>11} {'vectorized s':>13} {'speedup':>8} "
+          f"{'file-to-file s':>15} {'rows/sec':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            raw_csv = os.path.join(tmp, f'raw_{n_rows}.csv')
+            write_synthetic_csv(raw_csv, n_rows, seed=args.seed, raw=True)
+
+            expected, legacy = timed(notebook_clean, pd.read_csv(raw_csv))
+            cleaned, fast = timed(clean, read_raw(raw_csv))
+            assert len(cleaned) == len(expected)
+
+            stats = clean_csv(raw_csv, os.path.join(tmp, f'clean_{n_rows}.csv'))
+            print(f"{n_rows:>12,} {legacy:>11.2f} {fast:>13.2f} {legacy / fast:>7.1f}x "
+                  f"{stats['seconds']:>15.2f} {stats['rows_per_sec']:>12,.0f}")
+            os.remove(raw_csv)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Peak memory and throughput of chunked training against the in-memory fit.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_incremental
+    python -m benchmarks.bench_incremental --sizes 1000000 10000000 --chunksize 250000
+
+For each size a synthetic extract is written to disk. The notebook pipeline
+is fitted on the whole file loaded at once, and ``train_stream`` is fitted
+chunk by chunk. Both are scored on the same held-out ids (``id % 100 < 15``).
+Synthetic rows are resampled from the real extract, so its rows are split
+by the same rule first: held-out ids are drawn only from held-out source
+rows, and no student is in both the training set and the holdout.
+
+Peak memory is measured with tracemalloc in a separate run, so the times
+are taken without it. It covers numpy and pandas buffers. The in-memory
+fit is skipped above ``--max-in-memory`` rows.
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from analytics.incremental import DEFAULT_HOLDOUT_PCT, roc_auc, train_stream
+from analytics.model import FEATURES, TARGET, build_pipeline
+from analytics.storage import SCHEMA_DTYPES, read_survey
+from analytics.synthetic import SOURCE_CSV, iter_synthetic
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+
+
+def write_split_csv(path, n_rows, holdout_pct=DEFAULT_HOLDOUT_PCT, chunksize=1_000_000, seed=0):
+    """Synthetic extract whose held-out ids are resampled from held-out source rows only."""
+    base = read_survey(SOURCE_CSV)
+    held_source = base['id'].to_numpy() % 100 < holdout_pct
+    ids = np.arange(n_rows)
+    held = ids % 100 < holdout_pct
+    parts = [(base[~held_source], ids[~held], seed), (base[held_source], ids[held], seed + 1)]
+    first = True
+    for source, part_ids, part_seed in parts:
+        offset = 0
+        for chunk in iter_synthetic(len(part_ids), chunksize, part_seed, source):
+            chunk['id'] = part_ids[offset:offset + len(chunk)].astype(chunk['id'].dtype)
+            offset += len(chunk)
+            chunk.to_csv(path, mode='w' if first else 'a', header=first, index=False)
+            first = False
+    return path
+
+
+def traced(func, *args, **kwargs):
+    """(result, seconds, peak MB): timed first, then run again under tracemalloc."""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def in_memory_fit(csv_path):
+    df = pd.read_csv(csv_path, dtype=SCHEMA_DTYPES)
+    held = df['id'].to_numpy() % 100 < DEFAULT_HOLDOUT_PCT
+    pipeline = build_pipeline().fit(df.loc[~held, FEATURES], df.loc[~held, TARGET])
+    scores = pipeline.predict_proba(df.loc[held, FEATURES])[:, 1]
+    return roc_auc(df.loc[held, TARGET].to_numpy(), scores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--max-in-memory', type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'mode':<10} {'seconds':>8} {'peak MB':>8} {'AUC':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            csv_path = os.path.join(tmp, f'synthetic_{n_rows}.csv')
+            write_split_csv(csv_path, n_rows, chunksize=args.chunksize)
+
+            if n_rows <= args.max_in_memory:
+                auc, seconds, peak = traced(in_memory_fit, csv_path)
+                print(f"{n_rows:>12,} {'in-memory':<10} {seconds:>8.1f} {peak:>8.1f} {auc:>7.4f}")
+
+            (_, stats), seconds, peak = traced(
+                train_stream, csv_path, args.chunksize, args.epochs)
+            print(f"{n_rows:>12,} {'chunked':<10} {seconds:>8.1f} {peak:>8.1f} "
+                  f"{stats['holdout_auc']:>7.4f}")
+            os.remove(csv_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark the fused KPI engine against the original per-tile code.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_kpis
+    python -m benchmarks.bench_kpis --sizes 30000 1000000 --repeat 5
+
+Rows are resampled from ``IP_Student_Depression.csv`` so category skew
+matches the real data.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics.kpis import compute_kpis
+from analytics.storage import read_survey
+
+DEFAULT_SIZES = [30_000, 1_000_000, 10_000_000]
+
+
+def legacy_kpis(filtered_df):
+    """The KPI block and lollipop groupby as the dashboard used to run them."""
+    total_students = len(filtered_df)
+    depression_cases = len(filtered_df[filtered_df['Depression'] == 1])
+    depression_rate = (depression_cases / total_students *
+                       100) if total_students > 0 else 0
+    high_risk = len(filtered_df[(filtered_df['Depression'] == 1) & (
+        filtered_df['Suicidal thoughts'] == 'Yes')])
+
+    city_depression = filtered_df[filtered_df['Depression'] == 1].groupby(
+        'City').size().reset_index(name='count')
+    top_city = city_depression.nlargest(
+        1, 'count')['City'].values[0] if not city_depression.empty else "N/A"
+
+    depressed_with_history = len(filtered_df[(filtered_df['Depression'] == 1) & (
+        filtered_df['Family History of Mental Illness'] == 'Yes')])
+    family_history_pct = (depressed_with_history /
+                          depression_cases * 100) if depression_cases > 0 else 0
+
+    # The lollipop chart repeated the same groupby
+    city_depression_counts = filtered_df[filtered_df['Depression'] == 1].groupby(
+        'City').size().reset_index(name='count')
+    top_5_cities = city_depression_counts.nlargest(5, 'count')
+
+    return (total_students, depression_cases, depression_rate, high_risk,
+            top_city, family_history_pct, top_5_cities)
+
+
+def best_time(func, frame, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(frame)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--csv', default='IP_Student_Depression.csv')
+    args = parser.parse_args()
+
+    base = read_survey(args.csv)
+    rng = np.random.default_rng(42)
+
+    print(f"{'rows':>12} {'legacy (ms)':>12} {'fused (ms)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        frame = base.take(rng.integers(0, len(base), size)).reset_index(drop=True)
+        legacy = best_time(legacy_kpis, frame, args.repeat)
+        fused = best_time(compute_kpis, frame, args.repeat)
+        print(f"{size:>12,} {legacy * 1e3:>12.2f} {fused * 1e3:>12.2f} "
+              f"{legacy / fused:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Scaling benchmark for partitioned cube construction.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_parallel
+    python -m benchmarks.bench_parallel --rows 5000000 --workers 1 2 4 8 16
+
+Builds the dashboard cube from a resampled frame with each executor and
+worker count, and reports wall time and speedup over the single-pass build.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics.cube import FilterCube
+from analytics.parallel import EXECUTORS, make_executor, parallel_cube
+from analytics.storage import read_survey
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--executors', nargs='+', default=EXECUTORS, choices=EXECUTORS)
+    parser.add_argument('--by', default='City', help="partition column, or 'none' for row ranges")
+    parser.add_argument('--csv', default='IP_Student_Depression.csv')
+    args = parser.parse_args()
+    by = None if args.by.lower() == 'none' else args.by
+
+    base = read_survey(args.csv)
+    rng = np.random.default_rng(42)
+    frame = base.take(rng.integers(0, len(base), args.rows)).reset_index(drop=True)
+
+    start = time.perf_counter()
+    reference = FilterCube.from_frame(frame)
+    single = time.perf_counter() - start
+    print(f"{args.rows:,} rows, single-pass build: {single * 1e3:.1f} ms")
+    print(f"{'executor':>10} {'workers':>8} {'time (ms)':>10} {'speedup':>8}")
+
+    for kind in args.executors:
+        for workers in args.workers:
+            # Pools are started before timing so worker spawn is not counted
+            with make_executor(kind, workers) as pool:
+                pool.map(int, range(workers))
+                start = time.perf_counter()
+                cube = parallel_cube(frame, executor=pool, n_parts=workers, by=by)
+                elapsed = time.perf_counter() - start
+            assert cube.slice().kpis()['high_risk'] == reference.slice().kpis()['high_risk']
+            print(f"{kind:>10} {workers:>8} {elapsed * 1e3:>10.1f} {single / elapsed:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Headless benchmark of the dashboard pipeline on synthetic data.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --sizes 10000 1000000 100000000 --json results.json
+
+For each size a synthetic CSV with the production schema is generated, then
+the stages the dashboard runs are timed: load (cold parse + cache write,
+then warm memory-mapped start), dataset/cube/index build, and per filter
+state the filter, KPI and per-chart aggregation steps. Peak Python-heap
+memory per stage (numpy and pandas buffers included) comes from tracemalloc,
+in a second run of the same stages: tracing every allocation slows them
+down, so wall times are measured with it off.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.pipeline import CHART_AGGREGATES
+from analytics.storage import cache_path_for, read_survey
+from analytics.synthetic import write_synthetic_csv
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Representative sidebar states: the default view and a few common drill-downs
+FILTER_STATES = [
+    dict(),
+    dict(genders=['Female']),
+    dict(age_range=(18, 24)),
+    dict(depression=1),
+    dict(city='Kalyan'),
+    dict(genders=['Male'], age_range=(20, 30), depression=1, city='Hyderabad')
+]
+
+
+class StageTimer:
+    """Collects wall time, or with ``trace`` peak traced memory, per named stage."""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.samples = {}
+
+    def run(self, name, func, *args, **kwargs):
+        if self.trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = func(*args, **kwargs)
+            sample = tracemalloc.get_traced_memory()[1] - before
+        else:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            sample = time.perf_counter() - start
+        self.samples.setdefault(name, []).append(sample)
+        return result
+
+    def summary(self):
+        if self.trace:
+            return {name: {'peak_mb': max(samples) / 2**20}
+                    for name, samples in self.samples.items()}
+        return {
+            name: {
+                'runs': len(samples),
+                'median_ms': statistics.median(samples) * 1e3,
+                'max_ms': max(samples) * 1e3
+            }
+            for name, samples in self.samples.items()
+        }
+
+
+def run_stages(timer, csv_path, cache_dir):
+    """Run every pipeline stage through ``timer``, starting from a cold cache."""
+    cache_file = cache_path_for(csv_path, cache_dir)
+    if os.path.exists(cache_file):
+        os.remove(cache_file)
+
+    timer.run('load (cold)', read_survey, csv_path, cache_dir)
+    df = timer.run('load (warm)', read_survey, csv_path, cache_dir)
+    dataset = timer.run('build dataset', Dataset.from_frame, df)
+    cube = timer.run('build cube', FilterCube.from_dataset, dataset)
+    timer.run('build index', lambda: dataset.index)
+
+    for state in FILTER_STATES:
+        filtered = timer.run('filter (cube)', cube.slice, **state)
+        timer.run('filter (rows)', dataset.select, **state)
+        timer.run('kpis', filtered.kpis)
+        for name, aggregate in CHART_AGGREGATES.items():
+            timer.run(f'chart: {name}', aggregate, filtered, None)
+    return timer.summary()
+
+
+def bench_size(n_rows, workdir, seed):
+    csv_path = os.path.join(workdir, f'synthetic_{n_rows}.csv')
+    cache_dir = os.path.join(workdir, 'cache')
+    write_synthetic_csv(csv_path, n_rows, seed=seed)
+
+    times = run_stages(StageTimer(), csv_path, cache_dir)
+    tracemalloc.start()
+    try:
+        memory = run_stages(StageTimer(trace=True), csv_path, cache_dir)
+    finally:
+        tracemalloc.stop()
+
+    os.remove(csv_path)
+    return {name: {**row, **memory[name]} for name, row in times.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="write results to this file ('-' for stdout)")
+    parser.add_argument('--workdir', help='directory for generated files (default: temp dir)')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        for n_rows in args.sizes:
+            results[n_rows] = bench_size(n_rows, workdir, args.seed)
+
+    for n_rows, stages in results.items():
+        print(f"\n{n_rows:,} rows")
+        print(f"{'stage':<18} {'median ms':>10} {'max ms':>10} {'peak MB':>9}")
+        for name, row in stages.items():
+            print(f"{name:<18} {row['median_ms']:>10.2f} {row['max_ms']:>10.2f} "
+                  f"{row['peak_mb']:>9.1f}")
+
+    if args.json:
+        payload = json.dumps({str(k): v for k, v in results.items()}, indent=2)
+        if args.json == '-':
+            print(payload)
+        else:
+            with open(args.json, 'w') as f:
+                f.write(payload)
+
+
+if __name__ == '__main__':
+    main()
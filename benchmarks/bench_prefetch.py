@@ -0,0 +1,104 @@
+"""Click latency with and without speculative prefetching of filter states.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_prefetch
+    python -m benchmarks.bench_prefetch --clicks 200 --think 0.2 --budgets 0 0.1 0.5
+
+Replays a simulated user over the sidebar: mostly stepping to the next
+city in the dashboard's list, sometimes back, flipping the depression
+radio or nudging an age bound, with ``--think`` seconds between clicks.
+Each click cancels the previous prefetch batch, as a rerun does. It then
+times what the rerun computes: the view (slice, KPIs, aggregates and their
+fingerprints) and the figure JSON for all eight charts. The walk runs once
+per budget, each with a fresh view and figure cache; budget 0 disables
+prefetching.
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from analytics.charts import CHART_BUILDERS
+from analytics.cube import FilterCube
+from analytics.figure_cache import FigureCache
+from analytics.filters import DEPRESSION_OPTIONS, normalize
+from analytics.pipeline import CHART_NAMES
+from analytics.prefetch import Prefetcher
+from analytics.storage import read_survey
+
+DATA_FILE = 'IP_Student_Depression.csv'
+
+# Share of clicks per kind of move
+MOVES = {'next city': 0.5, 'previous city': 0.1, 'depression': 0.2, 'age': 0.2}
+
+
+def walk(cube, n_clicks, seed=0):
+    """A reproducible sequence of filter states."""
+    rng = random.Random(seed)
+    cities = ['All', *cube.cities]
+    bounds = (cube.ages[0], cube.ages[-1])
+    city, depression, (lo, hi) = 0, None, bounds
+    states = []
+    for _ in range(n_clicks):
+        move = rng.choices(list(MOVES), weights=list(MOVES.values()))[0]
+        if move == 'next city':
+            city = (city + 1) % len(cities)
+        elif move == 'previous city':
+            city = max(city - 1, 0)
+        elif move == 'depression':
+            depression = rng.choice([d for d in DEPRESSION_OPTIONS.values() if d != depression])
+        elif rng.random() < 0.5:
+            lo = min(max(lo + rng.choice([-1, 1]), bounds[0]), hi)
+        else:
+            hi = max(min(hi + rng.choice([-1, 1]), bounds[1]), lo)
+        states.append(normalize((), (lo, hi), depression, cities[city],
+                                all_genders=cube.genders, age_bounds=bounds))
+    return states
+
+
+def run(cube, states, budget, think):
+    figures = FigureCache()
+    prefetcher = Prefetcher(figures, budget=budget)
+    batch = None
+    latencies = []
+    for state in states:
+        if batch is not None:
+            batch.cancel()
+        start = time.perf_counter()
+        view = prefetcher.view(cube, state)
+        view.kpis()
+        for name in CHART_NAMES:
+            data, key = view.chart(name)
+            figures.get_or_build(key, lambda: CHART_BUILDERS[name](data))
+        latencies.append(time.perf_counter() - start)
+        batch = prefetcher.schedule(cube, state)
+        time.sleep(think)
+    prefetcher.shutdown()
+    return np.array(latencies) * 1e3, prefetcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', default=DATA_FILE)
+    parser.add_argument('--clicks', type=int, default=100)
+    parser.add_argument('--think', type=float, default=0.3, help='seconds between clicks')
+    parser.add_argument('--budgets', type=float, nargs='+', default=[0.0, 0.5],
+                        help='prefetch CPU seconds per click (0 disables prefetching)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    cube = FilterCube.from_frame(read_survey(args.csv))
+    states = walk(cube, args.clicks, args.seed)
+    print(f"{args.clicks} clicks, {args.think:g} s think time")
+    print(f"{'budget s':>8} {'mean ms':>8} {'p50 ms':>7} {'p95 ms':>7} {'hit rate':>9}  prefetched")
+    for budget in args.budgets:
+        latencies, stats = run(cube, states, budget, args.think)
+        hit_rate = stats['hits'] / (stats['hits'] + stats['misses'])
+        print(f"{budget:>8g} {latencies.mean():>8.2f} {np.percentile(latencies, 50):>7.2f} "
+              f"{np.percentile(latencies, 95):>7.2f} {hit_rate:>9.0%}  {stats['prefetched']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark the exported risk model against the scikit-learn pipeline.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_scoring
+    python -m benchmarks.bench_scoring --sizes 100000 1000000 10000000
+
+The notebook pipeline is fitted on the real extract and folded into a
+``RiskModel``. For each size a synthetic frame is scored by both, and batch
+throughput is reported in rows/sec along with the largest probability
+difference. Single-record latency compares ``score_record`` on a dict with
+``predict_proba`` on a one-row frame, the way a per-student lookup would
+call each.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analytics.model import FEATURES, train
+from analytics.scoring import RiskModel
+from analytics.storage import read_survey
+from analytics.synthetic import SOURCE_CSV, synthesize
+
+DEFAULT_SIZES = [100_000, 1_000_000]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def per_call(func, args, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(args[i % len(args)])
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--records', type=int, default=2000,
+                        help='single-record calls to time')
+    args = parser.parse_args()
+
+    pipeline, _ = train(read_survey(SOURCE_CSV))
+    model = RiskModel.from_pipeline(pipeline)
+
+    print(f"{'rows':>12} {'sklearn rows/s':>15} {'numpy rows/s':>13} {'speedup':>8} "
+          f"{'max |diff|':>11}")
+    for n_rows in args.sizes:
+        df = synthesize(n_rows)
+        expected, slow = timed(lambda frame: pipeline.predict_proba(frame[FEATURES])[:, 1], df)
+        scores, fast = timed(model.predict_proba, df)
+        print(f"{n_rows:>12,} {n_rows / slow:>15,.0f} {n_rows / fast:>13,.0f} "
+              f"{slow / fast:>7.1f}x {np.abs(scores - expected).max():>11.1e}")
+
+    sample = synthesize(200)[FEATURES]
+    frames = [sample.iloc[[i]] for i in range(len(sample))]
+    records = sample.to_dict('records')
+    sklearn_us = per_call(pipeline.predict_proba, frames, min(args.records, 500)) * 1e6
+    numpy_us = per_call(model.score_record, records, args.records) * 1e6
+    print(f"single record: sklearn {sklearn_us:,.0f} us, score_record {numpy_us:,.1f} us "
+          f"({sklearn_us / numpy_us:,.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Memory held per concurrent dashboard session, shared store vs private copies.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_sessions
+    python -m benchmarks.bench_sessions --sessions 200 --rows 1000000
+
+Simulates N sessions rerunning at once on a thread pool, each with one of
+the benchmark filter states, and keeps what a rerun leaves alive: the base
+dataset and cube, the filtered slice, the KPIs and the chart aggregates.
+In ``shared`` mode every session references the process-wide store, as with
+``st.cache_resource``. In ``private`` mode each session gets its own
+unpickled copy, as ``st.cache_data`` hands out. Memory is measured with
+tracemalloc, so it covers numpy and pandas buffers.
+"""
+import argparse
+import gc
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.pipeline import chart_data
+from analytics.storage import read_survey
+from analytics.synthetic import SOURCE_CSV, synthesize
+from benchmarks.bench_pipeline import FILTER_STATES
+
+MODES = ['shared', 'private']
+
+
+def private_copy(obj):
+    # What st.cache_data does for every caller
+    return pickle.loads(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def open_session(store, state, mode):
+    dataset, cube = store if mode == 'shared' else private_copy(store)
+    filtered = cube.slice(**state)
+    kpis = filtered.kpis()
+    return {
+        'store': (dataset, cube),
+        'filtered': filtered,
+        'kpis': kpis,
+        'charts': chart_data(filtered, kpis=kpis)
+    }
+
+
+def bench_mode(store, mode, n_sessions, workers):
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        sessions = list(pool.map(
+            lambda i: open_session(store, FILTER_STATES[i % len(FILTER_STATES)], mode),
+            range(n_sessions)))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    del sessions
+    return {
+        'sessions': n_sessions,
+        'seconds': elapsed,
+        'held_mb': (held - before) / 2**20,
+        'peak_mb': (peak - before) / 2**20,
+        'per_session_kb': (held - before) / n_sessions / 2**10
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=120)
+    parser.add_argument('--workers', type=int, default=32,
+                        help='sessions rerunning at the same time')
+    parser.add_argument('--rows', type=int,
+                        help='synthetic rows (default: the real extract)')
+    args = parser.parse_args()
+
+    df = synthesize(args.rows) if args.rows else read_survey(SOURCE_CSV)
+    tracemalloc.start()
+    dataset = Dataset.from_frame(df)
+    store = (dataset, FilterCube.from_dataset(dataset))
+    del df
+    gc.collect()
+    store_mb = tracemalloc.get_traced_memory()[0] / 2**20
+
+    print(f"store: {len(dataset.values['Age']):,} rows, {store_mb:.1f} MB traced")
+    print(f"{'mode':<8} {'sessions':>8} {'seconds':>8} {'held MB':>8} "
+          f"{'peak MB':>8} {'KB/session':>11}")
+    for mode in MODES:
+        row = bench_mode(store, mode, args.sessions, args.workers)
+        print(f"{mode:<8} {row['sessions']:>8} {row['seconds']:>8.2f} {row['held_mb']:>8.1f} "
+              f"{row['peak_mb']:>8.1f} {row['per_session_kb']:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
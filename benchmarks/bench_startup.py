@@ -0,0 +1,92 @@
+"""Cold start of the dashboard: time to first paint and restarts per minute.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --think 0
+    python -m benchmarks.bench_startup --app path/to/other_dashboard.py
+
+Every run is a fresh Python process, as a restarted replica is. It imports
+Streamlit, renders the login page with ``AppTest`` (first paint), waits
+``--think`` seconds as a user typing the password would, then signs in and
+renders the full dashboard. With ``--think 0`` the dashboard is rendered
+cold. Reported per run, in milliseconds:
+
+- ``streamlit``: process start to Streamlit imported (the same for any app)
+- ``login``: the login page's script run
+- ``first paint``: process start to the login page rendered
+- ``dashboard``: sign-in to every chart rendered
+
+Restarts per minute is 60 s over the mean time to first paint, for one core.
+The Feather and asset caches are left as they are, as on a host that has
+served the app before. ``AppTest`` does not load images, so the removed
+GitHub fetch of the logo is not part of these figures.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+APP = 'student_depression_dashboard.py'
+
+CHILD = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+imported = time.time()
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+at.run()
+painted = time.time()
+time.sleep(float(sys.argv[2]))
+at.session_state['authenticated'] = True
+signed_in = time.time()
+at.run()
+done = time.time()
+errors = [str(e.value) for e in at.exception]
+print(json.dumps({'imported': imported, 'painted': painted, 'signed_in': signed_in,
+                  'done': done, 'charts': len(at.get('plotly_chart')), 'errors': errors}))
+'''
+
+COLUMNS = ['streamlit', 'login', 'first paint', 'dashboard']
+
+
+def run_once(app, think):
+    start = time.time()
+    result = subprocess.run([sys.executable, '-c', CHILD, app, str(think)],
+                            capture_output=True, text=True, check=True)
+    times = json.loads(result.stdout.strip().splitlines()[-1])
+    if times['errors']:
+        raise RuntimeError(f"{app} raised: {times['errors']}")
+    return {
+        'streamlit': times['imported'] - start,
+        'login': times['painted'] - times['imported'],
+        'first paint': times['painted'] - start,
+        'dashboard': times['done'] - times['signed_in']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=APP)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--think', type=float, default=2.0,
+                        help='seconds between the login page and signing in')
+    args = parser.parse_args()
+
+    # One untimed run builds the Feather and asset caches
+    run_once(args.app, 0)
+    runs = [run_once(args.app, args.think) for _ in range(args.runs)]
+
+    print(f"{args.app}, {args.runs} runs, {args.think:g} s before sign-in")
+    print(f"{'stage':<12} {'mean ms':>9} {'min ms':>9} {'max ms':>9}")
+    for column in COLUMNS:
+        values = np.array([run[column] for run in runs]) * 1e3
+        print(f"{column:<12} {values.mean():>9.0f} {values.min():>9.0f} {values.max():>9.0f}")
+    first_paint = np.mean([run['first paint'] for run in runs])
+    print(f"restarts per minute per core: {60 / first_paint:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Threshold metrics from precomputed tables against recomputing with sklearn.
+
+Usage (from the repository root):
+
+    python -m benchmarks.bench_thresholds
+    python -m benchmarks.bench_thresholds --rows 1000000 --queries 200
+
+The dashboard's model scores every student (the real extract, or a
+synthetic one of ``--rows``). Each query is a threshold plus a slice: the
+whole extract, one city, or one sidebar filter state. The notebook's way
+masks the rows and calls ``confusion_matrix``, ``precision_score`` and
+``recall_score``. The table way is ``Evaluation.metrics``. Counts are
+checked against each other, and per-query latency is reported along with
+the one-off table build.
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, precision_score, recall_score
+
+from analytics.dataset import Dataset
+from analytics.evaluation import FILTER_SLICE, Evaluation
+from analytics.scoring import RiskModel
+from analytics.storage import read_survey
+from analytics.synthetic import SOURCE_CSV, synthesize
+from benchmarks.bench_pipeline import FILTER_STATES
+
+MODEL_FILE = 'models/risk_model.json'
+
+
+def sklearn_metrics(y_true, scores, threshold):
+    y_pred = scores >= threshold
+    tn, fp, fn, tp = confusion_matrix(y_true, y_pred, labels=[0, 1]).ravel()
+    precision_score(y_true, y_pred, zero_division=0)
+    recall_score(y_true, y_pred, zero_division=0)
+    return int(tp), int(fp), int(fn), int(tn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, help='synthetic rows (default: the real extract)')
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    df = synthesize(args.rows) if args.rows else read_survey(SOURCE_CSV)
+    y_true = df['Depression'].to_numpy()
+    scores = RiskModel.load(MODEL_FILE).predict_proba(df)
+    dataset = Dataset.from_frame(df)
+
+    start = time.perf_counter()
+    tables = Evaluation.build(scores, y_true, df)
+    build = time.perf_counter() - start
+
+    rng = np.random.default_rng(args.seed)
+    thresholds = rng.uniform(0, 1, args.queries)
+    states = [state for state in FILTER_STATES if state.get('depression') is None]
+    slices = {
+        'overall': (None, None, np.arange(len(df))),
+        'city': ('City', (tables.slices['City'].labels['City'] == 'Delhi').to_numpy(),
+                 np.flatnonzero(df['City'].to_numpy() == 'Delhi')),
+        'filter state': (FILTER_SLICE, tables.filter_groups(**states[-1]),
+                         dataset.select(**states[-1]))
+    }
+
+    print(f"{len(df):,} rows, tables built in {build * 1e3:.1f} ms")
+    print(f"{'slice':<14} {'sklearn us':>11} {'table us':>9} {'speedup':>9}")
+    for name, (slice_by, groups, rows) in slices.items():
+        start = time.perf_counter()
+        expected = [sklearn_metrics(y_true[rows], scores[rows], t) for t in thresholds]
+        slow = (time.perf_counter() - start) / args.queries
+        start = time.perf_counter()
+        got = [tables.metrics(t, slice_by, groups) for t in thresholds]
+        fast = (time.perf_counter() - start) / args.queries
+        assert expected == [(m['tp'], m['fp'], m['fn'], m['tn']) for m in got]
+        print(f"{name:<14} {slow * 1e6:>11,.0f} {fast * 1e6:>9,.1f} {slow / fast:>8,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
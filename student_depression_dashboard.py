@@ -1,9 +1,85 @@
+import importlib
+import os
+import threading
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from PIL import Image
-import numpy as np
+
+from analytics.assets import data_uri, resized_image
+
+DATA_FILE = 'IP_Student_Depression.csv'
+MODEL_FILE = 'models/risk_model.json'
+LOGO_FILE = 'aub_logo.png'
+LOGO_WIDTH = 180
+RISK_TABLE_ROWS = 20
+
+# Seconds between checks for the exact cube in approximate mode
+EXACT_CUBE_POLL = 2.0
+
+# What the dashboard needs once a session is authenticated. The login page
+# renders without them and starts loading them in the background (warm_up).
+DASHBOARD_MODULES = [
+    'numpy',
+    'pandas',
+    'plotly.io',
+    'analytics.approximate',
+    'analytics.associations',
+    'analytics.charts',
+    'analytics.cleaning',
+    'analytics.cube',
+    'analytics.dataset',
+    'analytics.evaluation',
+    'analytics.figure_cache',
+    'analytics.filters',
+    'analytics.ingest',
+    'analytics.parallel',
+    'analytics.pipeline',
+    'analytics.prefetch',
+    'analytics.profiling',
+    'analytics.scoring',
+    'analytics.storage',
+    'analytics.streaming'
+]
+
+# Rows of the sample whose charts warm_up builds
+WARM_UP_ROWS = 1000
+
+
+# Imports the dashboard modules, maps the Feather cache and builds sample
+# charts on a background thread, once per process, while the login page
+# waits for the password. Streaming mode reads only the sample rows.
+@st.cache_resource
+def warm_up():
+    def load():
+        for name in DASHBOARD_MODULES:
+            importlib.import_module(name)
+        from analytics.charts import build_figures
+        from analytics.cube import FilterCube
+        from analytics.figure_cache import load_figure
+        from analytics.storage import read_survey
+        from analytics.streaming import iter_chunks
+
+        if os.environ.get('DASHBOARD_STREAMING'):
+            df = next(iter_chunks(DATA_FILE, WARM_UP_ROWS))
+        else:
+            df = read_survey(DATA_FILE)
+        # Plotly loads each trace and layout class on first use; the charts
+        # of a small sample load all of them
+        sample = FilterCube.from_frame(df.head(WARM_UP_ROWS)).slice()
+        for figure in build_figures(sample).values():
+            load_figure(figure.to_json())
+
+    thread = threading.Thread(target=load, name='dashboard-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+# The logo from the repository, resized once (at 2x for dense screens) and
+# inlined, so no page load depends on fetching it from GitHub
+@st.cache_resource
+def logo_html():
+    uri = data_uri(resized_image(LOGO_FILE, 2 * LOGO_WIDTH))
+    return f'<img src="{uri}" width="{LOGO_WIDTH}" alt="AUB logo">'
+
 
 # Initialize session state for password
 if 'authenticated' not in st.session_state:
@@ -79,6 +155,11 @@ st.markdown("""
         margin-bottom: 3px;
     }
     
+    .metric-margin {
+        font-size: 0.85em;
+        color: #0077B6;
+    }
+    
     /* Responsive adjustments for smaller screens */
     @media (max-width: 768px) {
         .metric-value {
@@ -162,9 +243,7 @@ if not st.session_state.authenticated:
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         try:
-            # Load logo directly from GitHub repository
-            logo_url = "https://raw.githubusercontent.com/FatimaShab/HealthAnalyticsProject/main/aub_logo.png"
-            st.image(logo_url, width=180)
+            st.markdown(logo_html(), unsafe_allow_html=True)
         except:
             st.markdown("🏥 **Healthcare Analytics Dashboard**")
 
@@ -213,21 +292,163 @@ if not st.session_state.authenticated:
         All rights reserved. Data protection protocols in effect.
     </p>
     """, unsafe_allow_html=True)
-else:
-    # Load data
-    @st.cache_data
-    def load_data():
-        df = pd.read_csv('IP_Student_Depression.csv')
-        return df
 
-    df = load_data()
+    # The page is painted; load the dashboard while the password is typed
+    warm_up()
+else:
+    # Waits for the imports warm_up started (instant once they are done),
+    # so two threads never import the same modules at once
+    warm_up().join()
+    from concurrent.futures import ThreadPoolExecutor
+
+    import numpy as np
+    import pandas as pd
+
+    from analytics.approximate import ApproximateCube
+    from analytics.charts import CHART_BUILDERS, PRIMARY_CHARTS
+    from analytics.cleaning import CITY_FIXES
+    from analytics.cube import FilterCube
+    from analytics.dataset import Dataset
+    from analytics.evaluation import FILTER_SLICE, SLICE_COLUMNS, Evaluation
+    from analytics.figure_cache import FigureCache, load_figure
+    from analytics.filters import CITIES, normalize
+    from analytics.ingest import INGEST_DIR, LiveCube, partition_paths, with_partitions
+    from analytics.parallel import parallel_cube
+    from analytics.pipeline import CHART_NAMES
+    from analytics.prefetch import DEFAULT_BUDGET, Prefetcher
+    from analytics.profiling import Profiler, StageStats
+    from analytics.scoring import RiskModel, risk_measures
+    from analytics.storage import read_survey
+    from analytics.streaming import stream_cube
+
+    # Batches appended with `python -m analytics.ingest`
+    ingest_dir = os.environ.get('DASHBOARD_INGEST_DIR', INGEST_DIR)
+
+    # Load data (typed Feather cache, rebuilt when the CSV changes). The
+    # dataset and cube are read-only and cached as resources, so every
+    # session shares one copy instead of receiving its own unpickled one.
+    # ``ingested`` (partition paths) appends those batches for the row-level
+    # panels; the base extract and the latest batches stay cached.
+    @st.cache_resource(max_entries=2)
+    def survey_rows(ingested=()):
+        return with_partitions(read_survey(DATA_FILE), ingested)
+
+    @st.cache_resource(max_entries=2)
+    def load_dataset(ingested=()):
+        return Dataset.from_frame(survey_rows(ingested))
+
+    # Exported classifier (`python -m analytics.model`), scored with NumPy
+    # only; DASHBOARD_MODEL overrides the path. Without it the risk tile
+    # and table are hidden.
+    @st.cache_resource
+    def load_risk_model():
+        path = os.environ.get('DASHBOARD_MODEL', MODEL_FILE)
+        return RiskModel.load(path) if os.path.exists(path) else None
+
+    # Per-student risk for the extract, with the columns the risk table shows
+    @st.cache_resource(max_entries=2)
+    def risk_scores(ingested=()):
+        model = load_risk_model()
+        if model is None:
+            return None
+        df = survey_rows(ingested)
+        scores = df[['id', 'Gender', 'Age', 'City', 'Degree_Level', 'Depression']].copy()
+        scores['City'] = scores['City'].astype(str).replace(CITY_FIXES)
+        scores['Risk Score'] = model.predict_proba(df)
+        return scores
+
+    # Threshold tables for the threshold slider, built once per model version
+    @st.cache_resource(max_entries=1)
+    def evaluation(version, ingested=()):
+        scores = risk_scores(ingested)
+        return Evaluation.build(scores['Risk Score'], scores['Depression'], scores,
+                                version=version)
+
+    # Pre-aggregate the filter space once so reruns only slice the cube.
+    # DASHBOARD_STREAMING=1 builds it chunk by chunk for extracts that do
+    # not fit in memory; DASHBOARD_EXECUTOR=threads|processes builds it from
+    # City partitions in parallel.
+    streaming = bool(os.environ.get('DASHBOARD_STREAMING'))
+
+    @st.cache_resource
+    def load_cube():
+        model = load_risk_model()
+        if streaming:
+            return stream_cube(DATA_FILE, model=model)
+        executor = os.environ.get('DASHBOARD_EXECUTOR', 'serial')
+        if executor != 'serial':
+            return parallel_cube(read_survey(DATA_FILE), executor=executor, model=model)
+        measures = None
+        if model is not None:
+            measures = risk_measures(risk_scores()['Risk Score'].to_numpy(), model.threshold)
+        return FilterCube.from_dataset(load_dataset(), measures=measures)
+
+    # The cube plus the ingested batches (DASHBOARD_INGEST_DIR, default
+    # "ingested"); new partitions are merged in as deltas on the next rerun
+    @st.cache_resource
+    def live_cube():
+        return LiveCube(load_cube(), ingest_dir, model=load_risk_model())
+
+    # DASHBOARD_APPROXIMATE=1, for extracts too large to aggregate on first
+    # load: the dashboard answers from a stratified sample, with 95% margins
+    # on the tiles and error bars on the charts, while the exact cube builds
+    # on a background thread; sessions switch to it once it is ready
+    approximate_mode = bool(os.environ.get('DASHBOARD_APPROXIMATE'))
+
+    # Sampled from the extract and the batches ingested before startup;
+    # returns the cube and those partitions
+    @st.cache_resource
+    def approximate_cube():
+        ingested = tuple(partition_paths(ingest_dir))
+        return ApproximateCube.build(load_dataset(ingested)), ingested
+
+    @st.cache_resource
+    def exact_cube_build():
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='exact-cube')
+        future = executor.submit(live_cube)
+        executor.shutdown(wait=False)
+        return future
+
+    # One figure cache per process, shared by every session
+    @st.cache_resource
+    def figure_cache():
+        return FigureCache()
+
+    # Views of the filter states next to the current one, computed on a
+    # background thread after each render; DASHBOARD_PREFETCH_BUDGET is the
+    # CPU seconds a render may spend on them (0 turns prefetching off)
+    @st.cache_resource
+    def prefetcher():
+        return Prefetcher(figure_cache(), budget=float(
+            os.environ.get('DASHBOARD_PREFETCH_BUDGET', DEFAULT_BUDGET)))
+
+    # Stage timings shared by every session in the process
+    @st.cache_resource
+    def stage_stats():
+        return StageStats()
+
+    # Opt-in timing of every rerun stage: DASHBOARD_PROFILE=1 or ?profile=1
+    profiler = Profiler(stage_stats(), enabled=bool(
+        os.environ.get('DASHBOARD_PROFILE') or st.query_params.get('profile') == '1'))
+
+    # A rerun means the user moved on: drop what was prefetched for them
+    if 'prefetch_batch' in st.session_state:
+        st.session_state.prefetch_batch.cancel()
+
+    with profiler.stage('load'):
+        estimating = approximate_mode and not exact_cube_build().done()
+        # ``ingested``: the partitions the cube covers, for the row-level panels
+        if estimating:
+            cube, ingested = approximate_cube()
+        else:
+            cube = live_cube().refresh()
+            ingested = live_cube().partitions
 
     # Sidebar with logo and filters
     with st.sidebar:
-        # Add university logo - Load from GitHub URL
+        # Add university logo
         try:
-            logo_url = "https://raw.githubusercontent.com/FatimaShab/HealthAnalyticsProject/main/aub_logo.png"
-            st.image(logo_url, width=180)
+            st.markdown(logo_html(), unsafe_allow_html=True)
         except:
             st.markdown("🏥 **Dashboard**")
 
@@ -241,7 +462,7 @@ else:
 
         # Gender filter with checkboxes
         st.markdown("**Gender**")
-        gender_options = df['Gender'].unique()
+        gender_options = cube.genders
         selected_genders = []
         for gender in gender_options:
             if st.checkbox(gender, value=True, key=f"gender_{gender}"):
@@ -249,8 +470,8 @@ else:
 
         # Age range filter
         st.markdown("**Age Range**")
-        age_min = int(df['Age'].min())
-        age_max = int(df['Age'].max())
+        age_min = cube.ages[0]
+        age_max = cube.ages[-1]
         age_range = st.slider(
             "Select age range",
             min_value=age_min,
@@ -269,59 +490,52 @@ else:
 
         # Cities filter
         st.markdown("**City**")
-        city_list = ["All", "Agra", "Ahmedabad", "Bangalore", "Bhopal", "Chennai", "Delhi",
-                     "Faridabad", "Ghaziabad", "Hyderabad", "Indore", "Jaipur", "Kalyan",
-                     "Kanpur", "Kolkata", "Lucknow", "Ludhiana", "Meerut", "Mumbai",
-                     "Nagpur", "Nashik", "Patna", "Pune", "Rajkot", "Srinagar", "Surat",
-                     "Thane", "Vadodara", "Varanasi", "Vasai-Virar", "Visakhapatnam"]
+        city_list = ["All", *CITIES]
         selected_city = st.selectbox(
             "Select a city", city_list, key="city_filter")
 
-    # Apply filters
-    filtered_df = df.copy()
-
-    # Fix Khaziabad typo to Ghaziabad
-    filtered_df['City'] = filtered_df['City'].replace('Khaziabad', 'Ghaziabad')
-
-    if selected_genders:
-        filtered_df = filtered_df[filtered_df['Gender'].isin(selected_genders)]
-
-    filtered_df = filtered_df[(filtered_df['Age'] >= age_range[0]) & (
-        filtered_df['Age'] <= age_range[1])]
-
-    if depression_filter == "With Depression":
-        filtered_df = filtered_df[filtered_df['Depression'] == 1]
-    elif depression_filter == "Without Depression":
-        filtered_df = filtered_df[filtered_df['Depression'] == 0]
-
-    if selected_city != "All":
-        filtered_df = filtered_df[filtered_df['City'] == selected_city]
+        # Filled in at the end of the rerun, once every stage is timed
+        if profiler.enabled:
+            performance_panel = st.expander("⏱️ Performance", expanded=False)
+
+    # Apply filters (the cube fixes the Khaziabad typo when it is built).
+    # The view computes the tiles, the city ranking and each chart aggregate
+    # when first read, and was usually prefetched after the previous render.
+    # The four filters are a single indexing of the cube, so they are timed
+    # as one stage.
+    with profiler.stage('filter'):
+        filter_state = normalize(
+            selected_genders, age_range, depression_filter, selected_city,
+            all_genders=cube.genders, age_bounds=(age_min, age_max))
+        view = prefetcher().view(cube, filter_state)
 
     # Main dashboard
     st.markdown("<h2 style='text-align: center; color: #03045E; margin-bottom: 10px; margin-top: 5px; font-size: 1.8em;'>Student Depression Analytics Dashboard</h2>", unsafe_allow_html=True)
 
-    # Top row metrics - optimized layout
-    col1, col2, col3, col4, col5, col6 = st.columns(6)
-
-    # Calculate metrics
-    total_students = len(filtered_df)
-    depression_cases = len(filtered_df[filtered_df['Depression'] == 1])
-    depression_rate = (depression_cases / total_students *
-                       100) if total_students > 0 else 0
-    high_risk = len(filtered_df[(filtered_df['Depression'] == 1) & (
-        filtered_df['Suicidal thoughts'] == 'Yes')])
-
-    # Top city with depression
-    city_depression = filtered_df[filtered_df['Depression'] == 1].groupby(
-        'City').size().reset_index(name='count')
-    top_city = city_depression.nlargest(
-        1, 'count')['City'].values[0] if not city_depression.empty else "N/A"
-
-    # Family history percentage
-    depressed_with_history = len(filtered_df[(filtered_df['Depression'] == 1) & (
-        filtered_df['Family History of Mental Illness'] == 'Yes')])
-    family_history_pct = (depressed_with_history /
-                          depression_cases * 100) if depression_cases > 0 else 0
+    # One fused pass over the slice computes all six tiles, so they share a stage
+    with profiler.stage('kpis'):
+        kpis = view.kpis()
+        predicted = view.predicted_risk()
+
+    # 95% margins of the estimates in approximate mode
+    intervals = kpis.get('intervals', {})
+
+    def margin(key, fmt):
+        # Exact figures (margins that display as zero) are shown without one
+        value = intervals.get(key, np.nan)
+        if np.isnan(value) or fmt.format(value) == fmt.format(0):
+            return ''
+        return f'<div class="metric-margin">± {fmt.format(value)}</div>'
+
+    # Top row metrics - optimized layout, plus the model's tile when loaded
+    tiles = st.columns(7 if predicted else 6)
+    col1, col2, col3, col4, col5, col6 = tiles[:6]
+    total_students = kpis['total_students']
+    depression_cases = kpis['depression_cases']
+    depression_rate = kpis['depression_rate']
+    high_risk = kpis['high_risk']
+    top_city = kpis['top_city']
+    family_history_pct = kpis['family_history_pct']
 
     # Display metrics
     with col1:
@@ -329,6 +543,7 @@ else:
         <div class="metric-box">
             <div class="metric-label">Total Students</div>
             <div class="metric-value">{total_students:,}</div>
+            {margin('total_students', '{:,.0f}')}
         </div>
         """, unsafe_allow_html=True)
 
@@ -337,6 +552,7 @@ else:
         <div class="metric-box">
             <div class="metric-label">Depression Cases</div>
             <div class="metric-value">{depression_cases:,}</div>
+            {margin('depression_cases', '{:,.0f}')}
         </div>
         """, unsafe_allow_html=True)
 
@@ -345,6 +561,7 @@ else:
         <div class="metric-box">
             <div class="metric-label">Depression Rate</div>
             <div class="metric-value">{depression_rate:.1f}%</div>
+            {margin('depression_rate', '{:.1f}%')}
         </div>
         """, unsafe_allow_html=True)
 
@@ -353,6 +570,7 @@ else:
         <div class="metric-box">
             <div class="metric-label">High Risk Students</div>
             <div class="metric-value">{high_risk:,}</div>
+            {margin('high_risk', '{:,.0f}')}
         </div>
         """, unsafe_allow_html=True)
 
@@ -369,303 +587,147 @@ else:
         <div class="metric-box">
             <div class="metric-label">Depressed w/ F. Hist.</div>
             <div class="metric-value">{family_history_pct:.1f}%</div>
+            {margin('family_history_pct', '{:.1f}%')}
         </div>
         """, unsafe_allow_html=True)
 
-    st.markdown("<br>", unsafe_allow_html=True)
+    if predicted:
+        with tiles[6]:
+            st.markdown(f"""
+            <div class="metric-box">
+                <div class="metric-label">Predicted High Risk</div>
+                <div class="metric-value">{predicted['predicted_high_risk']:,}</div>
+            </div>
+            """, unsafe_allow_html=True)
+
+    if estimating:
+        st.caption(f"Estimated from a stratified sample of {cube.sample_size:,} students, "
+                   "with 95% margins; the exact figures replace them once they are computed.")
+
+        # Reruns the page as soon as the exact cube is ready
+        @st.fragment(run_every=EXACT_CUBE_POLL)
+        def wait_for_exact_cube():
+            if exact_cube_build().done():
+                st.rerun(scope='app')
+
+        wait_for_exact_cube()
+    else:
+        st.markdown("<br>", unsafe_allow_html=True)
 
     # Second row visualizations - optimized for cloud
     col1, col2, col3, col4 = st.columns(4)
 
-    # Color palette for charts
-    colors = ['#03045E', '#0077B6', '#00B4D8', '#90E0EF', '#CAF0F8']
-
-    # 1. Gender pie chart
-    with col1:
-        gender_counts = filtered_df['Gender'].value_counts()
-        fig_gender = px.pie(
-            values=gender_counts.values,
-            names=gender_counts.index,
-            title="Gender Distribution",
-            color_discrete_sequence=colors[:len(gender_counts)]
-        )
-        fig_gender.update_layout(
-            height=280,  # Slightly reduced for better fit
-            showlegend=True,
-            font=dict(size=11),
-            margin=dict(t=35, b=0, l=0, r=0),
-            title=dict(font=dict(size=14))
-        )
-        st.plotly_chart(fig_gender, use_container_width=True)
-
-        # Academic Pressure and Financial Stress grouped bar chart
-        stress_data = filtered_df.groupby(
-            'Depression')[['Academic Pressure', 'Financial Stress']].mean().reset_index()
-        stress_data['Depression_Status'] = stress_data['Depression'].map(
-            {0: 'No Depression', 1: 'Depression'})
-
-        # Reshape data for grouped bar chart with stress types on x-axis
-        stress_melted = stress_data.melt(
-            id_vars=['Depression', 'Depression_Status'],
-            value_vars=['Academic Pressure', 'Financial Stress'],
-            var_name='Stress Type',
-            value_name='Average Score'
-        )
-
-        fig_stress = px.bar(
-            stress_melted,
-            x='Stress Type',
-            y='Average Score',
-            color='Depression_Status',
-            title="Academic & Financial Stress",
-            barmode='group',
-            color_discrete_sequence=[colors[0], colors[2]]
-        )
-        fig_stress.update_layout(
-            height=280,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.2,
-                xanchor="center",
-                x=0.5,
-                title=None,
-                font=dict(size=10)
-            ),
-            margin=dict(t=35, b=50, l=0, r=0),
-            xaxis_title="",
-            yaxis_title="Avg Score",
-            yaxis=dict(range=[0, 5.5]),
-            title=dict(font=dict(size=14)),
-            font=dict(size=11)
-        )
-        st.plotly_chart(fig_stress, use_container_width=True)
-
-    # 2. Age distribution
-    with col2:
-        # Create age bins
-        bins = [18, 25, 35, 45, 55, 60]
-        labels = ['18-24', '25-34', '35-44', '45-54', '55-59']
-        filtered_df['Age_Group'] = pd.cut(
-            filtered_df['Age'], bins=bins, labels=labels, include_lowest=True)
-        age_dist = filtered_df['Age_Group'].value_counts().sort_index()
-
-        fig_age = px.bar(
-            x=age_dist.index,
-            y=age_dist.values,
-            title="Age Distribution",
-            labels={'x': 'Age Group', 'y': 'Count'},
-            color_discrete_sequence=[colors[1]]
-        )
-        fig_age.update_layout(
-            height=280,
-            showlegend=False,
-            margin=dict(t=35, b=0, l=0, r=0),
-            title=dict(font=dict(size=14)),
-            font=dict(size=11)
-        )
-        st.plotly_chart(fig_age, use_container_width=True)
-
-        # Degree Level stacked chart
-        degree_data = filtered_df.groupby(
-            ['Degree_Level', 'Depression']).size().reset_index(name='Count')
-        degree_data['Depression_Status'] = degree_data['Depression'].map(
-            {0: 'No Depression', 1: 'Depression'})
-
-        fig_degree = px.bar(
-            degree_data,
-            x='Degree_Level',
-            y='Count',
-            color='Depression_Status',
-            title="Depression by Degree Level",
-            color_discrete_sequence=[colors[0], colors[2]],
-            barmode='stack'
-        )
-
-        fig_degree.update_layout(
-            height=280,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.4,
-                xanchor="center",
-                x=0.5,
-                title=None,
-                font=dict(size=10)
-            ),
-            margin=dict(t=35, b=85, l=0, r=0),
-            xaxis_title="",
-            yaxis_title="Students",
-            xaxis_tickangle=-45,
-            title=dict(font=dict(size=14)),
-            font=dict(size=11)
-        )
-
-        st.plotly_chart(fig_degree, use_container_width=True)
-
-    # 3. Family history and depression
-    with col3:
-        # Create grouped data
-        family_depression = filtered_df.groupby(
-            ['Family History of Mental Illness', 'Depression']).size().reset_index(name='count')
-        family_depression['Depression_Status'] = family_depression['Depression'].map(
-            {0: 'No Depression', 1: 'Depression'})
-
-        # Rename family history values for clarity
-        family_depression['Family History of Mental Illness'] = family_depression['Family History of Mental Illness'].map({
-            'Yes': 'With F. History',
-            'No': 'No F. History'
-        })
-
-        fig_family = px.bar(
-            family_depression,
-            x='Family History of Mental Illness',
-            y='count',
-            color='Depression_Status',
-            title="Family History & Depression",
-            barmode='group',
-            color_discrete_sequence=[colors[0], colors[2]]
-        )
-        fig_family.update_layout(
-            height=280,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.2,
-                xanchor="center",
-                x=0.5,
-                title=None,
-                font=dict(size=10)
-            ),
-            margin=dict(t=35, b=50, l=0, r=0),
-            xaxis_title="",
-            yaxis_title="Count",
-            title=dict(font=dict(size=14)),
-            font=dict(size=11)
-        )
-        st.plotly_chart(fig_family, use_container_width=True)
-
-        # Sleep Hours line chart
-        sleep_df = filtered_df.copy()
-        sleep_df['Sleep Duration'] = sleep_df['Sleep Duration'].replace({
-            '5-6 hours': '5-6 hrs',
-            '7-8 hours': '7-8 hrs',
-            'Less than 5 hours': '< 5 hrs',
-            'More than 8 hours': '> 8 hrs',
-            'Others': 'Others'
-        })
-
-        sleep_data = sleep_df.groupby(
-            ['Sleep Duration', 'Depression']).size().reset_index(name='Count')
-        sleep_data['Depression_Status'] = sleep_data['Depression'].map(
-            {0: 'No Depression', 1: 'Depression'})
-
-        fig_sleep = px.line(
-            sleep_data,
-            x='Sleep Duration',
-            y='Count',
-            color='Depression_Status',
-            title="Sleep Hours by Depression",
-            markers=True,
-            color_discrete_sequence=[colors[0], colors[2]]
-        )
-
-        fig_sleep.update_layout(
-            height=280,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.5,
-                xanchor="center",
-                x=0.5,
-                title=None,
-                font=dict(size=10)
-            ),
-            margin=dict(t=35, b=110, l=0, r=0),
-            xaxis_title="",
-            yaxis_title="Students",
-            title=dict(font=dict(size=14)),
-            font=dict(size=11)
-        )
-
-        st.plotly_chart(fig_sleep, use_container_width=True)
-
-    # 4. Top 5 cities lollipop chart
-    with col4:
-        city_depression_counts = filtered_df[filtered_df['Depression'] == 1].groupby(
-            'City').size().reset_index(name='count')
-        top_5_cities = city_depression_counts.nlargest(
-            5, 'count').sort_values('count', ascending=True)
-
-        fig_cities = go.Figure()
-        fig_cities.add_trace(go.Scatter(
-            x=top_5_cities['count'],
-            y=top_5_cities['City'],
-            mode='markers+lines',
-            marker=dict(size=10, color=colors[1]),
-            line=dict(color=colors[3], width=2),
-            name=''
-        ))
-
-        # Add dots at the end
-        fig_cities.add_trace(go.Scatter(
-            x=top_5_cities['count'],
-            y=top_5_cities['City'],
-            mode='markers',
-            marker=dict(size=12, color=colors[0]),
-            name='',
-            showlegend=False
-        ))
-
-        fig_cities.update_layout(
-            title=dict(text="Top 5 Cities - Depression", font=dict(size=14)),
-            xaxis_title="Cases",
-            yaxis_title="",
-            height=280,
-            showlegend=False,
-            margin=dict(t=35, b=0, l=0, r=0),
-            font=dict(size=11)
-        )
-        st.plotly_chart(fig_cities, use_container_width=True)
-
-        # Dietary Habits grouped bar chart
-        diet_data = filtered_df.groupby(
-            ['Dietary Habits', 'Depression']).size().reset_index(name='Count')
-        diet_data['Depression_Status'] = diet_data['Depression'].map(
-            {0: 'No Depression', 1: 'Depression'})
-
-        fig_diet = px.bar(
-            diet_data,
-            x='Dietary Habits',
-            y='Count',
-            color='Depression_Status',
-            title="Dietary Habits by Depression",
-            barmode='group',
-            color_discrete_sequence=[colors[0], colors[2]]
-        )
-
-        fig_diet.update_layout(
-            height=280,
-            showlegend=True,
-            legend=dict(
-                orientation="h",
-                yanchor="top",
-                y=-0.45,
-                xanchor="center",
-                x=0.5,
-                title=None,
-                font=dict(size=10)
-            ),
-            margin=dict(t=35, b=95, l=0, r=0),
-            xaxis_title="",
-            yaxis_title="Count",
-            xaxis_tickangle=-45,
-            title=dict(font=dict(size=14)),
-            font=dict(size=11)
-        )
-
-        st.plotly_chart(fig_diet, use_container_width=True)
+    # Each chart is its own render unit: its aggregate is computed by the view
+    # on first use, and the figure is only rebuilt when that aggregate changed
+    columns = dict(zip(CHART_NAMES, [col1, col1, col2, col2, col3, col3, col4, col4]))
+
+    def show_chart(name):
+        with profiler.stage(f'data: {name}'):
+            data, key = view.chart(name)
+        with profiler.stage(f'figure: {name}'):
+            spec = figure_cache().get_or_build(key, lambda: CHART_BUILDERS[name](data))
+        with profiler.stage(f'render: {name}'):
+            with columns[name]:
+                st.plotly_chart(load_figure(spec), use_container_width=True)
+
+    # Top row first, so it paints before the secondary aggregates are computed
+    # Columns: 1. gender / stress, 2. age / degree, 3. family / sleep,
+    # 4. top 5 cities / dietary habits
+    for name in PRIMARY_CHARTS:
+        show_chart(name)
+    for name in CHART_NAMES:
+        if name not in PRIMARY_CHARTS:
+            show_chart(name)
+
+    # Chi-square test and effect sizes of every risk factor. Opening the
+    # expander reruns the page, and the tables are only computed while open.
+    associations_panel = st.expander("📈 Risk factor associations", expanded=False,
+                                     key="associations_panel", on_change="rerun")
+    with associations_panel:
+        if associations_panel.open and estimating:
+            st.caption("Shown once the exact figures are computed.")
+        elif associations_panel.open:
+            with profiler.stage('associations'):
+                tests, levels = view.associations()
+            if tests["Cramér's V"].isna().all():
+                st.caption("Select all depression statuses to compare students "
+                           "with and without depression.")
+            else:
+                with profiler.stage('associations table'):
+                    tests = tests.sort_values("Cramér's V", ascending=False, kind='stable')
+                    st.dataframe(
+                        tests.round({'Chi-square': 1, "Cramér's V": 3})
+                        .assign(**{'p-value': tests['p-value'].map('{:.2g}'.format)}),
+                        hide_index=True, use_container_width=True)
+                    factor = st.selectbox("Levels of", tests['Factor'],
+                                          key="association_factor")
+                    st.dataframe(
+                        levels[levels['Factor'] == factor].drop(columns='Factor').round(3),
+                        hide_index=True, use_container_width=True)
+                    st.caption("Odds ratios and relative risks of depression compare each "
+                               "level with the rest of its factor, with 95% intervals.")
+
+    # Highest predicted risk among the filtered students, ingested ones
+    # included. The scores cover every row of the extract, so they are only
+    # computed while the expander is open, and never in streaming mode, which
+    # does not hold the extract in memory.
+    if load_risk_model() is not None and predicted and not streaming:
+        risk_panel = st.expander("🎯 Student risk scores", expanded=False,
+                                 key="risk_panel", on_change="rerun")
+        with risk_panel:
+            if risk_panel.open:
+                with profiler.stage('risk table'):
+                    scores = risk_scores(ingested)
+                    rows = load_dataset(ingested).select(**filter_state._asdict())
+                    risk = scores['Risk Score'].to_numpy()[rows]
+                    top = rows[np.argsort(-risk, kind='stable')[:RISK_TABLE_ROWS]]
+                    st.dataframe(scores.iloc[top].round({'Risk Score': 3}),
+                                 hide_index=True, use_container_width=True)
+                    st.caption(f"Mean predicted risk {predicted['mean_risk']:.1%} · "
+                               f"students flagged at {load_risk_model().threshold:.0%} or more")
+
+                # Any threshold's confusion counts for the filtered students are
+                # a few binary searches in the precomputed tables
+                threshold = st.slider("Risk threshold", 0.0, 1.0,
+                                      float(load_risk_model().threshold), 0.01,
+                                      key="risk_threshold")
+                slice_by = st.radio("Metrics by", SLICE_COLUMNS, horizontal=True, key="risk_slice")
+                with profiler.stage('thresholds'):
+                    tables = evaluation(load_risk_model().version, ingested)
+                    current = tables.metrics(threshold, FILTER_SLICE, tables.filter_groups(
+                        filter_state.genders, filter_state.age_range, filter_state.city))
+                    per_slice = tables.by_slice(threshold, slice_by)
+                st.caption(f"At {threshold:.0%} (all depression statuses): "
+                           f"{current['flagged']:,} flagged · "
+                           f"precision {current['precision']:.1%} · "
+                           f"recall {current['recall']:.1%} · "
+                           f"false positive rate {current['fpr']:.1%}")
+                st.dataframe(
+                    per_slice[[slice_by, 'flagged', 'tp', 'fp', 'fn', 'tn', 'precision', 'recall']]
+                    .round(3), hide_index=True, use_container_width=True)
+
+    # Rendered: compute the states the user is likely to pick next
+    st.session_state.prefetch_batch = prefetcher().schedule(cube, filter_state, city_list)
+
+    # Performance panel and optional Prometheus textfile export
+    if profiler.enabled:
+        counters = {f'figure_cache_{key}_total': value
+                    for key, value in figure_cache().stats().items()
+                    if key in ('hits', 'misses', 'evictions')}
+        counters.update({f'prefetch_{key}_total': value
+                         for key, value in prefetcher().stats().items() if key != 'views'})
+        with performance_panel:
+            # Rolling percentiles across every session, in milliseconds
+            summary = pd.DataFrame(stage_stats().summary()).T
+            summary[['p50', 'p95', 'p99']] *= 1e3
+            summary = summary.astype({'count': int}).rename(
+                columns={'p50': 'p50 ms', 'p95': 'p95 ms', 'p99': 'p99 ms'})
+            st.dataframe(summary.round(2), use_container_width=True)
+            st.caption(f"Figure cache: {figure_cache().stats()}")
+            st.caption(f"Prefetch: {prefetcher().stats()}")
+            st.download_button(
+                "Download metrics", stage_stats().to_prometheus(counters),
+                file_name="dashboard_metrics.prom", mime="text/plain")
+        metrics_file = os.environ.get('DASHBOARD_METRICS_FILE')
+        if metrics_file:
+            stage_stats().write_prometheus(metrics_file, counters)
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+import pytest
+
+from analytics.api import load_api, make_handler
+
+
+@pytest.fixture(scope='module')
+def api():
+    return load_api(store_dir='no-such-store')
+
+
+def run_server(api, exchange):
+    async def main():
+        server = await asyncio.start_server(make_handler(api), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await exchange(port)
+    return asyncio.run(main())
+
+
+async def get(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    statuses = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        statuses.append(int(line.split()[1]))
+        length = 0
+        while (line := await reader.readline()) != b'\r\n':
+            if line.lower().startswith(b'content-length:'):
+                length = int(line.split(b':')[1])
+        await reader.readexactly(length)
+    writer.close()
+    return statuses
+
+
+def test_request_body_is_skipped_on_keep_alive(api):
+    body = b'{"gender": "Male"}' * 100
+    request = (b'POST /kpis HTTP/1.1\r\nContent-Length: %d\r\n\r\n' % len(body) + body
+               + b'GET /filters HTTP/1.1\r\nConnection: close\r\n\r\n')
+    assert run_server(api, lambda port: get(port, request)) == [405, 200]
+
+
+def test_chunked_body_closes_the_connection(api):
+    request = (b'POST /kpis HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+               b'5\r\nhello\r\n0\r\n\r\n')
+    assert run_server(api, lambda port: get(port, request)) == [405]
+
+
+def test_slow_payload_does_not_stall_cached_requests(api, monkeypatch):
+    cached = b'GET /kpis?city=Pune HTTP/1.1\r\nConnection: close\r\n\r\n'
+    run_server(api, lambda port: get(port, cached))
+    payload = api.payload
+
+    def slow(cube, path, state):
+        time.sleep(0.5)
+        return payload(cube, path, state)
+    monkeypatch.setattr(api, 'payload', slow)
+
+    async def exchange(port):
+        started = time.perf_counter()
+        slow_request = asyncio.create_task(
+            get(port, b'GET /kpis?city=Delhi HTTP/1.1\r\nConnection: close\r\n\r\n'))
+        await asyncio.sleep(0.05)
+        assert await get(port, cached) == [200]
+        fast = time.perf_counter() - started
+        assert await slow_request == [200]
+        return fast
+    assert run_server(api, exchange) < 0.3
@@ -0,0 +1,26 @@
+import pytest
+
+from analytics.approximate import ApproximateCube
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.storage import read_survey
+
+DATA_FILE = 'IP_Student_Depression.csv'
+
+
+@pytest.fixture(scope='module')
+def survey():
+    return read_survey(DATA_FILE)
+
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_strata_share_the_cube_gender_axis(survey, reverse):
+    if reverse:
+        survey = survey.iloc[::-1].reset_index(drop=True)
+    dataset = Dataset.from_frame(survey)
+    exact = FilterCube.from_dataset(dataset)
+    approximate = ApproximateCube.build(dataset, rate=0.05)
+    assert approximate.genders == exact.genders
+    for gender in exact.genders:
+        kpis = approximate.slice(genders=[gender]).kpis()
+        assert kpis['total_students'] == exact.slice(genders=[gender]).kpis()['total_students']
@@ -0,0 +1,86 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from analytics.associations import associations
+
+
+def cube_slice(tables):
+    """A slice stand-in whose breakdowns hold one gender, age and city.
+
+    ``tables`` maps a factor to ``{level: (not depressed, depressed)}``.
+    """
+    breakdowns = {}
+    for factor, counts in tables.items():
+        labels = list(counts)
+        table = np.array([counts[label] for label in labels], dtype=float).T
+        breakdowns[factor] = (labels, table.reshape(1, 1, 2, 1, len(labels)))
+    return SimpleNamespace(breakdowns=breakdowns)
+
+
+def test_two_by_two_table():
+    # Yes: 30 of 40 depressed, No: 20 of 60; every expected count is 20 or 30
+    filtered = cube_slice({'History': {'No': (40, 20), 'Yes': (10, 30)}})
+    tests, levels = associations(filtered, factors=['History'])
+
+    test = tests.iloc[0]
+    assert test['Students'] == 100
+    assert test['dof'] == 1
+    assert test['Chi-square'] == pytest.approx(100 / 6)
+    assert test['p-value'] == pytest.approx(4.455709e-05, rel=1e-5)
+    assert test["Cramér's V"] == pytest.approx(math.sqrt(1 / 6))
+
+    yes = levels.set_index('Level').loc['Yes']
+    assert yes['Depressed'] == 30
+    assert yes['Depression %'] == pytest.approx(75)
+    assert yes['Odds Ratio'] == pytest.approx(6)
+    assert (yes['OR Low'], yes['OR High']) == pytest.approx((2.452634, 14.678099), rel=1e-5)
+    assert yes['Relative Risk'] == pytest.approx(2.25)
+    assert (yes['RR Low'], yes['RR High']) == pytest.approx((1.508106, 3.356861), rel=1e-5)
+
+    no = levels.set_index('Level').loc['No']
+    assert no['Odds Ratio'] == pytest.approx(1 / 6)
+    assert no['Relative Risk'] == pytest.approx((20 / 60) / (30 / 40))
+
+
+def test_k_by_two_table_with_a_padded_factor():
+    filtered = cube_slice({
+        'Pressure': {'1': (30, 10), '2': (20, 20), '3': (10, 30), '4': (0, 0)},
+        'History': {'No': (40, 20), 'Yes': (10, 30)}
+    })
+    tests, levels = associations(filtered, factors=['Pressure', 'History'])
+
+    pressure = tests.iloc[0]
+    assert pressure['Levels'] == 3
+    assert pressure['dof'] == 2
+    assert pressure['Chi-square'] == pytest.approx(20)
+    assert pressure['p-value'] == pytest.approx(math.exp(-10))
+    assert pressure["Cramér's V"] == pytest.approx(math.sqrt(20 / 120))
+    # The shorter factor is padded to four levels without changing its test
+    assert tests.iloc[1]['Chi-square'] == pytest.approx(100 / 6)
+
+    by_level = levels[levels['Factor'] == 'Pressure'].set_index('Level')
+    assert list(by_level.index) == ['1', '2', '3']
+    # Level 1 against levels 2 and 3: 10/40 depressed vs 50/80
+    assert by_level.loc['1', 'Odds Ratio'] == pytest.approx(10 * 30 / (30 * 50))
+    assert by_level.loc['1', 'Relative Risk'] == pytest.approx((10 / 40) / (50 / 80))
+    assert by_level.loc['2', 'Odds Ratio'] == pytest.approx(1)
+
+
+def test_empty_cell_gets_the_haldane_correction():
+    filtered = cube_slice({'History': {'No': (40, 20), 'Yes': (0, 30)}})
+    levels = associations(filtered, factors=['History']).levels.set_index('Level')
+    assert levels.loc['Yes', 'Odds Ratio'] == pytest.approx(30.5 * 40.5 / (0.5 * 20.5))
+
+
+def test_single_status_has_no_statistics():
+    filtered = cube_slice({'Pressure': {'1': (0, 10), '2': (0, 20), '3': (0, 30)}})
+    tests, levels = associations(filtered, factors=['Pressure'])
+
+    assert tests.iloc[0]['dof'] == 0
+    assert tests[['Chi-square', 'p-value', "Cramér's V"]].isna().all(axis=None)
+    assert levels['Depression %'].tolist() == [100, 100, 100]
+    effects = ['Odds Ratio', 'OR Low', 'OR High', 'Relative Risk', 'RR Low', 'RR High']
+    assert levels[effects].isna().all(axis=None)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.storage import read_survey
+
+DATA_FILE = 'IP_Student_Depression.csv'
+
+
+@pytest.fixture(scope='module')
+def cube():
+    return FilterCube.from_dataset(Dataset.from_frame(read_survey(DATA_FILE)))
+
+
+def rebuilt(cube, breakdowns=None, nonnull=None):
+    return FilterCube(cube.genders, cube.ages, cube.cities, cube.counts,
+                      breakdowns or cube.breakdowns, cube.sums, nonnull or cube.nonnull)
+
+
+def test_same_tables_keep_the_version(cube):
+    assert rebuilt(cube).version == cube.version
+
+
+def test_version_covers_the_breakdowns(cube):
+    # Move one student between two levels: counts and sums are unchanged
+    column = 'Sleep Duration'
+    labels, table = cube.breakdowns[column]
+    cell = np.argwhere(table[..., 0] > 0)[0]
+    moved = table.copy()
+    moved[(*cell, 0)] -= 1
+    moved[(*cell, 1)] += 1
+    breakdowns = {**cube.breakdowns, column: (labels, moved)}
+    assert rebuilt(cube, breakdowns=breakdowns).version != cube.version
+
+    relabelled = {**cube.breakdowns, column: (labels[::-1], table)}
+    assert rebuilt(cube, breakdowns=relabelled).version != cube.version
+
+
+def test_version_covers_the_nonnull_counts(cube):
+    column = next(iter(cube.nonnull))
+    changed = cube.nonnull[column].copy()
+    changed.flat[np.argmax(changed)] -= 1
+    assert rebuilt(cube, nonnull={**cube.nonnull, column: changed}).version != cube.version
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.evaluation import FILTER_SLICE, Evaluation
+
+THRESHOLDS = [-1.0, 0.0, 0.25, 0.5, 0.5001, 0.9, 1.0, 2.0]
+
+FILTERS = [
+    {},
+    {'genders': ['Female']},
+    {'age_range': (20, 25)},
+    {'genders': ['Male'], 'age_range': (18, 30), 'city': 'Pune'},
+    {'city': 'Nowhere'}
+]
+
+
+@pytest.fixture(scope='module')
+def scored():
+    rng = np.random.default_rng(0)
+    n = 2000
+    frame = pd.DataFrame({
+        'Gender': rng.choice(['Female', 'Male'], n),
+        'Age': rng.integers(18, 35, n),
+        'City': rng.choice(['Delhi', 'Pune', 'Surat'], n),
+        'Degree_Level': rng.choice(['Class 12', 'Graduate', 'Postgraduate'], n)
+    })
+    # Rounded scores, so many rows share a score and sit on the thresholds
+    scores = rng.random(n).round(2)
+    y_true = (rng.random(n) < scores).astype(int)
+    return frame, scores, y_true, Evaluation.build(scores, y_true, frame)
+
+
+def brute_force(scores, y_true, threshold):
+    flagged = scores >= threshold
+    positive = y_true == 1
+    return {
+        'tp': int((flagged & positive).sum()),
+        'fp': int((flagged & ~positive).sum()),
+        'fn': int((~flagged & positive).sum()),
+        'tn': int((~flagged & ~positive).sum())
+    }
+
+
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+def test_overall_metrics_match_brute_force(scored, threshold):
+    _, scores, y_true, evaluation = scored
+    metrics = evaluation.metrics(threshold)
+    expected = brute_force(scores, y_true, threshold)
+    assert {name: metrics[name] for name in expected} == expected
+    assert metrics['flagged'] == expected['tp'] + expected['fp']
+    if expected['tp'] + expected['fp']:
+        assert metrics['precision'] == pytest.approx(
+            expected['tp'] / (expected['tp'] + expected['fp']))
+    else:
+        assert np.isnan(metrics['precision'])
+
+
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+@pytest.mark.parametrize('filters', FILTERS)
+def test_filter_metrics_match_brute_force(scored, threshold, filters):
+    frame, scores, y_true, evaluation = scored
+    mask = np.ones(len(frame), dtype=bool)
+    if 'genders' in filters:
+        mask &= frame['Gender'].isin(filters['genders']).to_numpy()
+    if 'age_range' in filters:
+        mask &= frame['Age'].between(*filters['age_range']).to_numpy()
+    if 'city' in filters:
+        mask &= (frame['City'] == filters['city']).to_numpy()
+
+    groups = evaluation.filter_groups(**filters)
+    metrics = evaluation.metrics(threshold, slice_by=FILTER_SLICE, groups=groups)
+    expected = brute_force(scores[mask], y_true[mask], threshold)
+    assert {name: metrics[name] for name in expected} == expected
+
+
+@pytest.mark.parametrize('threshold', [0.0, 0.5, 0.9])
+@pytest.mark.parametrize('column', ['Gender', 'City', 'Degree_Level'])
+def test_by_slice_matches_brute_force(scored, threshold, column):
+    frame, scores, y_true, evaluation = scored
+    table = evaluation.by_slice(threshold, column)
+    assert sorted(table[column]) == sorted(frame[column].unique())
+    for row in table.itertuples(index=False):
+        mask = (frame[column] == getattr(row, column)).to_numpy()
+        expected = brute_force(scores[mask], y_true[mask], threshold)
+        assert {name: int(getattr(row, name)) for name in expected} == expected
+
+
+def test_auc_matches_sklearn(scored):
+    metrics = pytest.importorskip('sklearn.metrics')
+    _, scores, y_true, evaluation = scored
+    assert evaluation.auc() == pytest.approx(metrics.roc_auc_score(y_true, scores))
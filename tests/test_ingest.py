@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from analytics.cleaning import clean, read_raw
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.ingest import LiveCube, ingest_batch, partition_paths, with_partitions
+from analytics.storage import read_survey
+from analytics.synthetic import write_synthetic_csv
+
+
+@pytest.fixture
+def raw_batch(tmp_path):
+    path = tmp_path / 'batch.csv'
+    write_synthetic_csv(path, 200, seed=1, raw=True)
+    return path
+
+
+def kept_rows(raw):
+    return raw.index[(raw['Profession'].astype(str) == 'Student')
+                     & (pd.to_numeric(raw['Work Pressure'], errors='coerce') == 0)
+                     & (raw['Financial Stress'].astype(str) != '?')]
+
+
+def test_valid_batch_is_ingested(raw_batch, tmp_path):
+    path = ingest_batch(raw_batch, tmp_path / 'store')
+    assert partition_paths(tmp_path / 'store') == [str(path)]
+
+
+@pytest.mark.parametrize('column, value', [
+    ('Age', ''),
+    ('CGPA', ''),
+    ('Academic Pressure', 'high'),
+    ('Financial Stress', 'unknown'),
+    ('Depression', ''),
+    ('Depression', '2'),
+    ('Age', '300'),
+    ('Age', '25.5'),
+    ('Academic Pressure', '7'),
+    ('Study Satisfaction', '-1'),
+    ('Gender', ''),
+    ('City', ''),
+    ('Degree', ' '),
+    ('Dietary Habits', '')
+])
+def test_malformed_batch_is_rejected(raw_batch, tmp_path, column, value):
+    raw = pd.read_csv(raw_batch, dtype=str, keep_default_na=False)
+    bad_rows = kept_rows(raw)[[2, 7]]
+    raw.loc[bad_rows, column] = value
+    raw.to_csv(raw_batch, index=False)
+
+    with pytest.raises(ValueError, match=rf"{column} \(rows {bad_rows[0]}, {bad_rows[1]}\)"):
+        ingest_batch(raw_batch, tmp_path / 'store')
+    assert partition_paths(tmp_path / 'store') == []
+
+
+def test_every_invalid_column_is_reported(raw_batch, tmp_path):
+    raw = pd.read_csv(raw_batch, dtype=str, keep_default_na=False)
+    bad_row = kept_rows(raw)[0]
+    raw.loc[bad_row, ['Gender', 'Depression']] = ['', '2']
+    raw.to_csv(raw_batch, index=False)
+
+    with pytest.raises(ValueError, match=rf"Gender \(rows {bad_row}\) is blank; "
+                                         rf"Depression \(rows {bad_row}\) needs a whole"):
+        ingest_batch(raw_batch, tmp_path / 'store')
+
+
+def test_dropped_rows_are_not_validated(raw_batch):
+    raw = read_raw(raw_batch)
+    dropped = raw.index.difference(kept_rows(raw))[0]
+    raw.loc[dropped, 'Age'] = None
+    assert len(clean(raw)) == len(kept_rows(raw))
+
+
+def test_partitions_reach_the_row_level_frame(raw_batch, tmp_path):
+    survey = read_survey('IP_Student_Depression.csv')
+    live = LiveCube(FilterCube.from_frame(survey), tmp_path / 'store')
+    path = ingest_batch(raw_batch, tmp_path / 'store')
+    cube = live.refresh()
+    assert live.partitions == (path,)
+
+    rows = with_partitions(survey, live.partitions)
+    assert len(rows) == cube.slice().kpis()['total_students']
+    assert Dataset.from_frame(rows).select(city='Pune').size == \
+        cube.slice(city='Pune').kpis()['total_students']
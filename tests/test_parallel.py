@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from analytics.cube import FilterCube
+from analytics.dataset import Dataset
+from analytics.parallel import parallel_cube
+from analytics.storage import read_survey
+
+DATA_FILE = 'IP_Student_Depression.csv'
+
+
+@pytest.fixture(scope='module')
+def survey():
+    return read_survey(DATA_FILE)
+
+
+@pytest.fixture(scope='module')
+def exact(survey):
+    return FilterCube.from_dataset(Dataset.from_frame(survey))
+
+
+@pytest.mark.parametrize('workers', [1, 2, 3, 4, 8])
+def test_gender_order_does_not_depend_on_workers(survey, exact, workers):
+    cube = parallel_cube(survey, workers=workers)
+    assert cube.genders == exact.genders
+    assert np.array_equal(cube.counts, exact.counts)
+
+
+def test_gender_order_with_threads(survey, exact):
+    assert parallel_cube(survey, executor='threads', workers=3).genders == exact.genders
+
+
+def test_gender_order_with_row_ranges(survey, exact):
+    assert parallel_cube(survey[::-1], workers=3, by=None).genders == \
+        FilterCube.from_frame(survey[::-1]).genders
+
+
+def test_reorder_genders_rejects_other_genders(exact):
+    with pytest.raises(ValueError):
+        exact.reorder_genders(['Male'])
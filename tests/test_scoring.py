@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from analytics.scoring import RiskModel
+from analytics.storage import read_survey
+
+pytest.importorskip('sklearn')
+
+from analytics.model import FEATURES, train  # noqa: E402
+
+DATA_FILE = 'IP_Student_Depression.csv'
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    pipeline, (_, _, test_df) = train(read_survey(DATA_FILE))
+    return pipeline, RiskModel.from_pipeline(pipeline), test_df[FEATURES].reset_index(drop=True)
+
+
+def as_float64(frame):
+    numeric = frame.select_dtypes('number').columns
+    return frame.astype({column: 'float64' for column in numeric})
+
+
+def test_scores_match_the_pipeline(fitted):
+    pipeline, model, frame = fitted
+    exact = as_float64(frame)
+    np.testing.assert_allclose(model.predict_proba(exact), pipeline.predict_proba(exact)[:, 1],
+                               rtol=1e-12, atol=1e-14)
+    # sklearn scales the stored float32 columns in float32
+    np.testing.assert_allclose(model.predict_proba(frame), pipeline.predict_proba(frame)[:, 1],
+                               rtol=1e-6, atol=1e-7)
+    np.testing.assert_array_equal(model.predict(frame), pipeline.predict(frame))
+
+
+def test_missing_and_unseen_values_match_the_pipeline(fitted):
+    pipeline, model, frame = fitted
+    frame = as_float64(frame.head(50))
+    frame.loc[::2, 'Sleep_Hours'] = np.nan
+    for column in ('Dietary Habits', 'Degree_Level'):
+        frame[column] = frame[column].astype(object)
+        frame.loc[::3, column] = 'Unseen'
+    expected = pipeline.predict_proba(frame)[:, 1]
+    np.testing.assert_allclose(model.predict_proba(frame), expected, rtol=1e-12, atol=1e-14)
+    records = frame.to_dict('records')
+    np.testing.assert_allclose([model.score_record(record) for record in records], expected,
+                               rtol=1e-12, atol=1e-14)
+
+
+def test_saved_model_scores_the_same(fitted, tmp_path):
+    _, model, frame = fitted
+    path = tmp_path / 'risk_model.json'
+    model.save(path)
+    loaded = RiskModel.load(path)
+    assert loaded.version == model.version
+    np.testing.assert_array_equal(loaded.predict_proba(frame), model.predict_proba(frame))
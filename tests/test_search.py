@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics.model import split
+from analytics.search import candidates, evaluate_fold, fold_matrices, leaderboard, search
+from analytics.storage import read_survey
+
+COLUMNS = ['family', 'params', 'folds', 'auc', 'precision', 'recall']
+
+
+@pytest.fixture(scope='module')
+def searched():
+    train, valid, _ = split(read_survey('IP_Student_Depression.csv'))
+    return pd.concat([train, valid])
+
+
+def fold_by_fold(df, families, n_folds, tolerance):
+    """The search with every fold waiting for the previous one."""
+    configs = candidates(families)
+    results = [[] for _ in configs]
+    alive = list(range(len(configs)))
+    for fold in fold_matrices(df, n_folds):
+        for i in alive:
+            results[i].append(evaluate_fold(*configs[i], fold))
+        mean_auc = {i: np.mean([r['auc'] for r in results[i]]) for i in alive}
+        alive = [i for i in alive if mean_auc[i] >= max(mean_auc.values()) - tolerance]
+    return leaderboard(configs, results)
+
+
+@pytest.mark.parametrize('executor', ['serial', 'threads'])
+def test_early_stopping_matches_fold_by_fold_search(searched, executor):
+    expected = fold_by_fold(searched, ['sgd'], 3, tolerance=0.001)
+    board = search(searched, ['sgd'], 3, executor=executor, workers=2, tolerance=0.001)
+    assert expected['folds'].min() < 3
+    assert board[COLUMNS].equals(expected[COLUMNS])
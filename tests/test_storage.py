@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from analytics.storage import apply_schema
+from analytics.streaming import iter_chunks
+
+
+@pytest.mark.parametrize('column, value', [
+    ('Age', 300),
+    ('Age', 25.5),
+    ('Age', None),
+    ('Academic Pressure', 9999),
+    ('id', 2 ** 40)
+])
+def test_values_that_do_not_fit_are_rejected(column, value):
+    df = pd.DataFrame({column: [3, value]})
+    with pytest.raises(ValueError, match=column):
+        apply_schema(df)
+
+
+def test_whole_floats_are_narrowed():
+    df = apply_schema(pd.DataFrame({'Age': [18.0, 34.0], 'Depression': [0, 1]}))
+    assert df['Age'].dtype == 'int8' and df['Age'].tolist() == [18, 34]
+
+
+def test_streamed_chunks_are_checked(tmp_path):
+    path = tmp_path / 'survey.csv'
+    pd.read_csv('IP_Student_Depression.csv', nrows=10).assign(Age=[20] * 9 + [300]).to_csv(
+        path, index=False)
+    with pytest.raises(ValueError, match='Age'):
+        list(iter_chunks(path, chunksize=4))